@@ -0,0 +1,182 @@
+"""
+Parser and renderer for the generated project bash scripts.
+
+The crews emit a bash script made of ``mkdir``/``cd`` commands and
+``cat << 'EOF' > path`` heredocs (see ``outputs/bash_script.sh``).
+``parse_bash_script`` turns such a script into the directories and files it
+would create, with paths resolved relative to the directory the script is
+run from, plus the remaining commands (e.g. Maven builds).
+"""
+
+import posixpath
+import re
+import shlex
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+HEREDOC_PATTERN = re.compile(
+    r"""^\s*cat\s+(?:
+        <<(?P<dash1>-?)\s*(?P<q1>['"]?)(?P<delim1>[A-Za-z_][A-Za-z0-9_]*)(?P=q1)\s*(?P<op1>>>?)\s*(?P<path1>\S+)
+      | (?P<op2>>>?)\s*(?P<path2>\S+)\s*<<(?P<dash2>-?)\s*(?P<q2>['"]?)(?P<delim2>[A-Za-z_][A-Za-z0-9_]*)(?P=q2)
+    )\s*$""",
+    re.VERBOSE,
+)
+FENCE_PATTERN = re.compile(r"^\s*```")
+
+
+@dataclass
+class ScriptFile:
+    path: str
+    content: str
+    append: bool = False
+
+
+@dataclass
+class ScriptCommand:
+    cwd: str
+    command: str
+
+
+@dataclass
+class ParsedScript:
+    directories: List[str] = field(default_factory=list)
+    files: List[ScriptFile] = field(default_factory=list)
+    commands: List[ScriptCommand] = field(default_factory=list)
+
+    def file_contents(self) -> Dict[str, str]:
+        """Final content of every file, applying appends in script order."""
+        contents: Dict[str, str] = {}
+        for script_file in self.files:
+            if script_file.append:
+                contents[script_file.path] = contents.get(script_file.path, "") + script_file.content
+            else:
+                contents[script_file.path] = script_file.content
+        return contents
+
+
+def expand_braces(word: str) -> List[str]:
+    """Bash brace expansion, e.g. ``src/{main,test}/java`` -> two paths."""
+    match = re.search(r"\{([^{}]*,[^{}]*)\}", word)
+    if not match:
+        return [word]
+    prefix, suffix = word[:match.start()], word[match.end():]
+    expanded = []
+    for option in match.group(1).split(","):
+        expanded.extend(expand_braces(prefix + option + suffix))
+    return expanded
+
+
+def _resolve(cwd: str, path: str) -> str:
+    path = path.strip("'\"")
+    if path.startswith("/"):
+        return posixpath.normpath(path)
+    return posixpath.normpath(posixpath.join(cwd, path))
+
+
+def _strip_code_fence(lines: List[str]) -> List[str]:
+    """LLM output is often wrapped in a ```bash fence; drop the fence lines."""
+    if lines and FENCE_PATTERN.match(lines[0]):
+        lines = lines[1:]
+        for i in range(len(lines) - 1, -1, -1):
+            if FENCE_PATTERN.match(lines[i]):
+                return lines[:i]
+            if lines[i].strip():
+                break
+    return lines
+
+
+def parse_bash_script(text: str) -> ParsedScript:
+    """
+    Parse a generated script. Heredoc bodies are located with a single
+    ``list.index`` lookup for their terminator, so large scripts parse in
+    one linear pass. Heredocs are taken literally; variable expansion in
+    unquoted heredocs is not performed.
+    """
+    lines = _strip_code_fence(text.splitlines())
+    parsed = ParsedScript()
+    cwd = "."
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        match = HEREDOC_PATTERN.match(line)
+        if match:
+            delimiter = match.group("delim1") or match.group("delim2")
+            dash = match.group("dash1") or match.group("dash2")
+            operator = match.group("op1") or match.group("op2")
+            path = match.group("path1") or match.group("path2")
+            end = _find_terminator(lines, i, delimiter, bool(dash))
+            body = lines[i:end]
+            if dash:
+                body = [body_line.lstrip("\t") for body_line in body]
+            content = "\n".join(body) + ("\n" if body else "")
+            parsed.files.append(ScriptFile(_resolve(cwd, path), content, append=operator == ">>"))
+            i = end + 1
+            continue
+
+        try:
+            words = shlex.split(stripped, comments=True)
+        except ValueError:
+            words = stripped.split()
+        if not words:
+            continue
+        if words[0] == "mkdir":
+            for word in words[1:]:
+                if not word.startswith("-"):
+                    parsed.directories.extend(_resolve(cwd, path) for path in expand_braces(word))
+        elif words[0] == "cd" and len(words) == 2 and "&&" not in stripped:
+            cwd = _resolve(cwd, words[1])
+        else:
+            parsed.commands.append(ScriptCommand(cwd, stripped))
+    return parsed
+
+
+def _find_terminator(lines: List[str], start: int, delimiter: str, dash: bool) -> int:
+    if not dash:
+        try:
+            return lines.index(delimiter, start)
+        except ValueError:
+            pass
+    for j in range(start, len(lines)):
+        if lines[j].strip() == delimiter:
+            return j
+    return len(lines)
+
+
+def _heredoc_delimiter(content: str) -> str:
+    delimiter = "EOF"
+    lines = set(content.splitlines())
+    while delimiter in lines:
+        delimiter += "_"
+    return delimiter
+
+
+def render_bash_script(directories: List[str], files: Dict[str, str],
+                       commands: Optional[List[ScriptCommand]] = None) -> str:
+    """Render directories, files and trailing commands back into a bash script."""
+    out = ["#!/bin/bash", "set -e", ""]
+    directories = sorted({d for d in directories if d != "."})
+    for directory in directories:
+        out.append(f"mkdir -p {shlex.quote(directory)}")
+    if directories:
+        out.append("")
+    for path in sorted(files):
+        content = files[path]
+        parent = posixpath.dirname(path)
+        if parent and parent != ".":
+            out.append(f"mkdir -p {shlex.quote(parent)}")
+        delimiter = _heredoc_delimiter(content)
+        out.append(f"cat << '{delimiter}' > {shlex.quote(path)}")
+        out.append(content[:-1] if content.endswith("\n") else content)
+        out.append(delimiter)
+        out.append("")
+    for command in commands or []:
+        if command.cwd == ".":
+            out.append(command.command)
+        else:
+            out.append(f"(cd {shlex.quote(command.cwd)} && {command.command})")
+    return "\n".join(out) + "\n"
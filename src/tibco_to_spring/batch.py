@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+Batch conversion of many TIBCO projects.
+
+Usage:
+    run_batch <manifest.json | projects_root> [--company-code DIR] [--workers N]
+              [--requests-per-minute N] [--output-dir DIR] [--resume]
+
+A manifest is a JSON list of project directories or of
+``{"name": ..., "path": ...}`` objects; relative paths resolve against the
+manifest's directory. A root directory converts every immediate
+subdirectory that looks like a TIBCO project.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.partition import run_partitioned
+from tibco_to_spring.tracing import install_tracing, trace_span, write_trace_report
+from tibco_to_spring.training_store import install_training_store
+
+# Set up logging
+logger = get_logger(__name__)
+
+OUTPUT_DIR = Path("outputs")
+SUMMARY_FILE_NAME = "batch_summary.json"
+TIBCO_PROJECT_MARKERS = ("project.xml", "*.process", "*/*.process")
+
+
+@dataclass
+class BatchProject:
+    name: str
+    path: str
+
+
+@dataclass
+class BatchResult:
+    name: str
+    path: str
+    status: str
+    wall_time: float
+    output: Optional[str] = None
+    error: Optional[str] = None
+
+
+def snake_case(name: str) -> str:
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", name)
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower()
+
+
+def is_tibco_project(path: Path) -> bool:
+    return path.is_dir() and any(next(path.glob(marker), None) for marker in TIBCO_PROJECT_MARKERS)
+
+
+def _check_unique_outputs(projects: List[BatchProject]):
+    """Raise ValueError if two projects would write the same ``bash_script_<name>.sh``."""
+    seen = {}
+    for project in projects:
+        key = snake_case(project.name)
+        if key in seen:
+            raise ValueError(f"Projects {seen[key]!r} and {project.name!r} would both write "
+                             f"bash_script_{key}.sh; give one of them a different name")
+        seen[key] = project.name
+
+
+def load_projects(source) -> List[BatchProject]:
+    """
+    Projects listed in a JSON manifest, or the TIBCO projects directly under
+    a root directory. Raises ValueError when two project names map to the
+    same output file.
+    """
+    source = Path(source)
+    if source.is_dir():
+        projects = [
+            BatchProject(name=child.name, path=str(child))
+            for child in sorted(source.iterdir())
+            if is_tibco_project(child)
+        ]
+    else:
+        entries = json.loads(source.read_text(encoding="utf-8"))
+        projects = []
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            path = Path(entry["path"])
+            if not path.is_absolute():
+                path = source.parent / path
+            projects.append(BatchProject(name=entry.get("name", path.name), path=str(path)))
+    _check_unique_outputs(projects)
+    return projects
+
+
+def convert_project(project: BatchProject, company_code: str, context_provider,
+                    output_dir: Path, resume: bool = False) -> BatchResult:
+    started = time.monotonic()
+    try:
+        bash_file = output_dir / f"bash_script_{snake_case(project.name)}.sh"
+        with trace_span(project.name, "project"):
+            run_partitioned(tibco_path=project.path, base_path=company_code, output_path=bash_file,
+                            context_provider=context_provider, resume=resume)
+
+        return BatchResult(project.name, project.path, "ok", time.monotonic() - started, output=str(bash_file))
+    except Exception as e:
+        logger.error("Conversion of %s failed: %s", project.name, e)
+        return BatchResult(project.name, project.path, "failed", time.monotonic() - started, error=str(e))
+
+
+def run_batch(projects: List[BatchProject], company_code: str, workers: int = 4,
+              requests_per_minute: float = 0, output_dir: Path = OUTPUT_DIR,
+              resume: bool = False) -> List[BatchResult]:
+    """
+    Convert ``projects`` with at most ``workers`` crews in flight. All crews
+    share one company-code index and one LLM request rate limit. With
+    ``resume`` checkpointed task outputs of earlier runs are reused.
+    """
+    _check_unique_outputs(projects)
+    from tibco_to_spring.compact.crew import CompanyCodeContext
+    from tibco_to_spring.llm_cache import default_llm_cache, default_rate_limiter
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if requests_per_minute:
+        default_rate_limiter().set_rate(requests_per_minute)
+
+    # Build the company-code index once; every crew searches the same one
+    context_provider = CompanyCodeContext(company_code)
+
+    started = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_project, project, company_code, context_provider, output_dir, resume): project
+            for project in projects
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            logger.info("[%d/%d] %s: %s in %.1fs", len(results), len(projects),
+                        result.name, result.status, result.wall_time)
+
+    results.sort(key=lambda result: result.name)
+    summary = {
+        "projects": len(results),
+        "succeeded": sum(result.status == "ok" for result in results),
+        "failed": sum(result.status != "ok" for result in results),
+        "wall_time": time.monotonic() - started,
+        "llm_cache": default_llm_cache().stats(),
+        "results": [asdict(result) for result in results],
+    }
+    (output_dir / SUMMARY_FILE_NAME).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    _log_summary(summary)
+    return results
+
+
+def _log_summary(summary: dict):
+    lines = [f"{'Project':<40} {'Status':<8} {'Time (s)':>9}"]
+    for result in summary["results"]:
+        lines.append(f"{result['name']:<40} {result['status']:<8} {result['wall_time']:>9.1f}")
+    lines.append(f"{summary['succeeded']} succeeded, {summary['failed']} failed "
+                 f"in {summary['wall_time']:.1f}s")
+    logger.info("Batch summary:\n%s", "\n".join(lines))
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Convert many TIBCO projects to Spring Boot concurrently")
+    parser.add_argument("source", help="JSON manifest of projects, or a directory containing TIBCO projects")
+    parser.add_argument("--company-code", default=os.getenv("COMPANY_CODE_DIRECTORY", "./company-repos"),
+                        help="Company code repository used for code examples")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "4")),
+                        help="Maximum number of crews running at once")
+    parser.add_argument("--requests-per-minute", type=float,
+                        default=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+                        help="Global LLM request rate limit (0 for none)")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse task outputs checkpointed by earlier runs whose inputs are unchanged")
+    args = parser.parse_args()
+
+    try:
+        projects = load_projects(args.source)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if not projects:
+        raise SystemExit(f"No TIBCO projects found in {args.source}")
+    logger.info("Converting %d projects with %d workers", len(projects), args.workers)
+
+    install_tracing()
+    install_training_store()
+    try:
+        with trace_span("batch", "run"):
+            results = run_batch(projects, args.company_code, args.workers, args.requests_per_minute, args.output_dir,
+                                args.resume)
+    finally:
+        write_trace_report()
+    if any(result.status != "ok" for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+"""
+Offline benchmark suite.
+
+Usage:
+    benchmark [--sizes 10,100,1000,10000] [--phases tibco_ir,scan,...]
+              [--workdir DIR] [--output FILE] [--compare PREVIOUS.json]
+              [--embedding-model NAME] [--llm-latency SECONDS]
+
+Synthetic TIBCO projects and company-code repositories are generated once
+per size under ``--workdir`` and reused across runs. Every phase runs in a
+fresh process so its peak RSS and cold-start costs are measured on their
+own. The LLM is always the deterministic ``StubLLM``; embeddings use the
+feature-hashing stand-in unless ``--embedding-model`` names a real
+sentence-transformer. Results are written as JSON, and ``--compare``
+prints the wall-time change against an earlier results file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Runs stay offline and timings stay free of network calls: crewAI reads these when it is
+# first imported (by the stubs below), and the spawned phase processes inherit them
+os.environ["CREWAI_DISABLE_TELEMETRY"] = "true"
+os.environ["OTEL_SDK_DISABLED"] = "true"
+os.environ["CREWAI_TRACING_ENABLED"] = "false"
+
+from tibco_to_spring.benchmarks.stubs import HASHING_EMBEDDING_MODEL
+from tibco_to_spring.benchmarks.synthetic import generate_company_repo, generate_tibco_project
+from tibco_to_spring.logging_config import get_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Set up logging
+logger = get_logger(__name__)
+
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "tibco_to_spring_benchmarks"
+RESULTS_DIR = Path("outputs") / "benchmarks"
+SEARCH_QUERIES = 200
+
+
+@dataclass
+class Measurement:
+    items: int
+    unit: str
+    wall_time: float
+    extra: Dict = field(default_factory=dict)
+
+
+@dataclass
+class PhaseResult:
+    phase: str
+    size: int
+    wall_time: float
+    items: int
+    unit: str
+    throughput: float
+    peak_rss_mb: Optional[float]
+    extra: Dict = field(default_factory=dict)
+
+
+@dataclass
+class Workspace:
+    root: Path
+    size: int
+    embedding_model: str
+    llm_latency: float
+
+    @property
+    def tibco_project(self) -> Path:
+        return self.root / f"tibco-{self.size}"
+
+    @property
+    def company_repo(self) -> Path:
+        return self.root / f"company-{self.size}"
+
+    def scratch(self, name: str) -> Path:
+        """An empty per-phase directory for indexes and databases."""
+        path = self.root / "scratch" / f"{name}-{self.size}"
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        return path
+
+
+PHASES: Dict[str, Callable[[Workspace], Measurement]] = {}
+
+
+def phase(name: str):
+    def register(fn):
+        PHASES[name] = fn
+        return fn
+    return register
+
+
+def _timed(fn) -> tuple:
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+# ------------------ Phases ------------------
+
+@phase("tibco_ir")
+def bench_tibco_ir(ws: Workspace) -> Measurement:
+    from tibco_to_spring.tibco_ir import parse_tibco_project, to_json
+
+    ir, elapsed = _timed(lambda: parse_tibco_project(ws.tibco_project))
+    return Measurement(len(ir.get("processes", {})), "processes", elapsed, {"ir_bytes": len(to_json(ir))})
+
+
+@phase("partition")
+def bench_partition(ws: Workspace) -> Measurement:
+    from tibco_to_spring.partition import partition_project
+    from tibco_to_spring.tibco_ir import parse_tibco_project
+
+    ir = parse_tibco_project(ws.tibco_project)
+    units, elapsed = _timed(lambda: partition_project(ir))
+    return Measurement(len(ir.get("processes", {})), "processes", elapsed, {"units": len(units)})
+
+
+@phase("scan")
+def bench_scan(ws: Workspace) -> Measurement:
+    from tibco_to_spring.compact.crew import scan_code
+
+    docs, elapsed = _timed(lambda: scan_code(str(ws.company_repo)))
+    files = len({doc.metadata["source"] for doc in docs})
+    return Measurement(files, "files", elapsed, {"chunks": len(docs)})
+
+
+@phase("code_index_cold")
+def bench_code_index_cold(ws: Workspace) -> Measurement:
+    from tibco_to_spring.compact.crew import CompanyCodeContext
+
+    cache_dir = ws.scratch("code-index")
+    context, elapsed = _timed(lambda: CompanyCodeContext(str(ws.company_repo), cache_dir, ws.embedding_model))
+    return Measurement(ws.size, "files", elapsed, {"chunks": len(context.doc_texts)})
+
+
+@phase("code_index_warm")
+def bench_code_index_warm(ws: Workspace) -> Measurement:
+    from tibco_to_spring.compact.crew import CompanyCodeContext
+
+    cache_dir = ws.scratch("code-index")
+    CompanyCodeContext(str(ws.company_repo), cache_dir, ws.embedding_model)
+    context, elapsed = _timed(lambda: CompanyCodeContext(str(ws.company_repo), cache_dir, ws.embedding_model))
+    return Measurement(ws.size, "files", elapsed, {"chunks": len(context.doc_texts)})
+
+
+@phase("code_search")
+def bench_code_search(ws: Workspace) -> Measurement:
+    from tibco_to_spring.compact.crew import TOPIC_QUERIES, CompanyCodeContext
+
+    context = CompanyCodeContext(str(ws.company_repo), ws.scratch("code-index"), ws.embedding_model)
+    queries = [f"{topic} example {i}" for i in range(SEARCH_QUERIES // len(TOPIC_QUERIES))
+               for topic in TOPIC_QUERIES]
+
+    def search():
+        context.get_context()
+        for query in queries:
+            context.get_examples(query)
+
+    _, elapsed = _timed(search)
+    return Measurement(len(queries) + 1, "queries", elapsed, {"chunks": len(context.doc_texts)})
+
+
+def _memory_items(size: int) -> List[str]:
+    return [f"Task {i} result: converted process {i % 97} into a Spring service with "
+            f"{i % 7} repositories and {i % 5} controllers" for i in range(size)]
+
+
+@phase("memory_save")
+def bench_memory_save(ws: Workspace) -> Measurement:
+    from tibco_to_spring.local_vector_memory import LocalVectorMemory
+
+    db_path = ws.scratch("memory") / "memory.db"
+    items = _memory_items(ws.size)
+
+    def save():
+        with LocalVectorMemory(str(db_path), ws.embedding_model, buffer_size=64) as memory:
+            for i, item in enumerate(items):
+                memory.save(item, {"task": i}, agent=f"agent-{i % 3}")
+
+    _, elapsed = _timed(save)
+    return Measurement(len(items), "items", elapsed, {"db_bytes": db_path.stat().st_size})
+
+
+@phase("memory_load")
+def bench_memory_load(ws: Workspace) -> Measurement:
+    from tibco_to_spring.local_vector_memory import LocalVectorMemory
+
+    db_path = ws.scratch("memory") / "memory.db"
+    with LocalVectorMemory(str(db_path), ws.embedding_model, buffer_size=64) as memory:
+        for i, item in enumerate(_memory_items(ws.size)):
+            memory.save(item, {"task": i}, agent=f"agent-{i % 3}")
+    memory, elapsed = _timed(lambda: LocalVectorMemory(str(db_path), ws.embedding_model))
+    return Measurement(len(memory.metadata), "items", elapsed)
+
+
+@phase("memory_search")
+def bench_memory_search(ws: Workspace) -> Measurement:
+    from tibco_to_spring.local_vector_memory import LocalVectorMemory
+
+    db_path = ws.scratch("memory") / "memory.db"
+    with LocalVectorMemory(str(db_path), ws.embedding_model, buffer_size=64) as memory:
+        for i, item in enumerate(_memory_items(ws.size)):
+            memory.save(item, {"task": i}, agent=f"agent-{i % 3}")
+    queries = [f"converted process {i} into a Spring service" for i in range(SEARCH_QUERIES)]
+
+    def search():
+        return sum(len(memory.search(query, limit=5, score_threshold=2.0)) for query in queries)
+
+    hits, elapsed = _timed(search)
+    return Measurement(len(queries), "queries", elapsed, {"hits": hits})
+
+
+def _install_stub_llm(ws: Workspace):
+    from tibco_to_spring.benchmarks.stubs import StubLLM
+    import tibco_to_spring.compact.crew as compact_crew
+
+    compact_crew.llm = StubLLM(latency=ws.llm_latency)
+    return compact_crew.llm
+
+
+@phase("crew_build")
+def bench_crew_build(ws: Workspace) -> Measurement:
+    from tibco_to_spring.compact.crew import CompanyCodeContext, create_crew
+
+    _install_stub_llm(ws)
+    context = CompanyCodeContext(str(ws.company_repo), ws.scratch("code-index"), ws.embedding_model)
+    crew, elapsed = _timed(lambda: create_crew(str(ws.company_repo), str(ws.tibco_project), context_provider=context))
+    return Measurement(len(crew.tasks), "tasks", elapsed)
+
+
+@phase("crew_kickoff")
+def bench_crew_kickoff(ws: Workspace) -> Measurement:
+    from tibco_to_spring.compact.crew import CompanyCodeContext
+    from tibco_to_spring.partition import run_partitioned
+
+    llm = _install_stub_llm(ws)
+    context = CompanyCodeContext(str(ws.company_repo), ws.scratch("code-index"), ws.embedding_model)
+    output_path = ws.scratch("kickoff") / "bash_script.sh"
+    script, elapsed = _timed(lambda: run_partitioned(
+        str(ws.tibco_project), str(ws.company_repo), output_path, context_provider=context
+    ))
+    return Measurement(ws.size, "processes", elapsed, {
+        "llm_calls": llm.calls, "prompt_chars": llm.prompt_chars, "script_bytes": len(script)
+    })
+
+
+# ------------------ Runner ------------------
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def _run_phase(name: str, ws: Workspace) -> PhaseResult:
+    if ws.embedding_model == HASHING_EMBEDDING_MODEL:
+        from tibco_to_spring.benchmarks.stubs import HashingEmbeddingProvider
+        from tibco_to_spring.embeddings import register_embedding_provider
+
+        register_embedding_provider(HASHING_EMBEDDING_MODEL, HashingEmbeddingProvider())
+
+    measurement = PHASES[name](ws)
+    return PhaseResult(
+        phase=name,
+        size=ws.size,
+        wall_time=measurement.wall_time,
+        items=measurement.items,
+        unit=measurement.unit,
+        throughput=measurement.items / measurement.wall_time if measurement.wall_time else 0.0,
+        peak_rss_mb=_peak_rss_mb(),
+        extra=measurement.extra,
+    )
+
+
+def run_benchmarks(sizes: List[int], phases: List[str], workdir: Path = DEFAULT_WORKDIR,
+                   embedding_model: str = HASHING_EMBEDDING_MODEL, llm_latency: float = 0.0) -> List[PhaseResult]:
+    """Run every phase at every size, each in a fresh spawned process."""
+    # Keep the LLM cache and code index caches out of the user's real ones
+    os.environ.setdefault("LLM_CACHE_PATH", str(workdir / "llm_cache.db"))
+    os.environ.setdefault("CODE_INDEX_CACHE_DIR", str(workdir / "code_index"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    for size in sizes:
+        ws = Workspace(workdir, size, embedding_model, llm_latency)
+        logger.info("Generating synthetic corpora of size %d in %s", size, workdir)
+        generate_tibco_project(ws.tibco_project, size)
+        generate_company_repo(ws.company_repo, size)
+        for name in phases:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                result = executor.submit(_run_phase, name, ws).result()
+            logger.info("%-16s size %-6d %8.3fs %10.1f %s/s  peak RSS %s MB", name, size, result.wall_time,
+                        result.throughput, result.unit, f"{result.peak_rss_mb:.0f}" if result.peak_rss_mb else "n/a")
+            results.append(result)
+    return results
+
+
+def compare(results: List[PhaseResult], previous: Dict) -> str:
+    baseline = {(entry["phase"], entry["size"]): entry for entry in previous.get("results", [])}
+    lines = [f"{'Phase':<16} {'Size':>6} {'Before (s)':>11} {'After (s)':>10} {'Change':>8}"]
+    for result in results:
+        before = baseline.get((result.phase, result.size))
+        if before is None or not before["wall_time"]:
+            continue
+        change = (result.wall_time - before["wall_time"]) / before["wall_time"] * 100
+        lines.append(f"{result.phase:<16} {result.size:>6} {before['wall_time']:>11.3f} "
+                     f"{result.wall_time:>10.3f} {change:>+7.1f}%")
+    return "\n".join(lines)
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated corpus sizes (TIBCO processes, company files, memory items)")
+    parser.add_argument("--phases", default=",".join(PHASES), help="Comma-separated phases to run")
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR,
+                        help="Where synthetic corpora and scratch data are kept")
+    parser.add_argument("--output", type=Path, help="Results JSON file (default outputs/benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare wall times against")
+    parser.add_argument("--embedding-model", default=HASHING_EMBEDDING_MODEL,
+                        help="Embedding model; the default hashing model needs no download")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the stub LLM sleeps per call")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    phases = args.phases.split(",")
+    unknown = [name for name in phases if name not in PHASES]
+    if unknown:
+        raise SystemExit(f"Unknown phases: {', '.join(unknown)} (available: {', '.join(PHASES)})")
+
+    started = time.time()
+    results = run_benchmarks(sizes, phases, args.workdir, args.embedding_model, args.llm_latency)
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "embedding_model": args.embedding_model,
+        "llm_latency": args.llm_latency,
+        "results": [asdict(result) for result in results],
+    }
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logger.info("Benchmark results written to %s", output)
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        logger.info("Compared with %s:\n%s", args.compare, compare(results, previous))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,129 @@
+"""
+Offline stand-ins for the Mistral LLM and the sentence-transformer model.
+
+Both are deterministic: the same prompt always gets the same completion and
+the same text always gets the same embedding, so benchmark runs only differ
+in the code under test.
+"""
+
+import hashlib
+import re
+import time
+import zlib
+from typing import List, Optional, Union
+
+import numpy as np
+from crewai import BaseLLM
+
+from tibco_to_spring.embeddings import EmbeddingProvider
+
+HASHING_EMBEDDING_MODEL = "hashing-384"
+HASHING_DIMENSION = 384
+TOKEN_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+UNIT_PROCESSES_PATTERN = re.compile(r"covering processes ([^\n.]+)\.")
+MERGE_PATH_PATTERN = re.compile(r"versions of `([^`]+)`")
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Feature-hashing bag-of-words embedder with the provider interface.
+    Needs no model download and is cheap enough that benchmark timings are
+    dominated by the surrounding code rather than by inference.
+    """
+
+    def __init__(self, dimension: int = HASHING_DIMENSION):
+        super().__init__(HASHING_EMBEDDING_MODEL, workers=1)
+        self._dimension = dimension
+
+    @property
+    def loaded(self) -> bool:
+        return True
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self._dimension, dtype="float32")
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self._dimension] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts: Union[str, List[str]], batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self._embed(texts)
+        if not texts:
+            return np.empty((0, self._dimension), dtype="float32")
+        return np.stack([self._embed(text) for text in texts])
+
+
+class StubLLM(BaseLLM):
+    """
+    Deterministic LLM for offline crew runs. Analysis prompts get a short
+    structured summary, conversion prompts a bash script with one Java class
+    per process named in the prompt, and merge prompts the first version
+    shown. ``latency`` seconds are slept per call to model network time.
+    """
+
+    def __init__(self, model: str = "stub/benchmark", latency: float = 0.0):
+        super().__init__(model=model, temperature=0.0)
+        self.latency = latency
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128_000
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        if isinstance(messages, str):
+            prompt = messages
+        else:
+            prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return f"Thought: I now can give a great answer\nFinal Answer: {self._answer(prompt)}"
+
+    def _answer(self, prompt: str) -> str:
+        merge = MERGE_PATH_PATTERN.search(prompt)
+        if merge and "#### Version 1" in prompt:
+            return prompt.split("#### Version 1", 1)[1].split("```", 2)[1].lstrip("\n")
+        if "Bash Script Requirements" in prompt:
+            return self._bash_script(prompt)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return (f"Analysis {digest}: the project consists of orchestrator processes calling worker "
+                "processes, JDBC persistence, XSLT mappings and a global error handler.")
+
+    def _bash_script(self, prompt: str) -> str:
+        unit = UNIT_PROCESSES_PATTERN.search(prompt)
+        processes = [name.strip() for name in unit.group(1).split(",")] if unit else ["Application"]
+        unit_id = hashlib.sha256(",".join(processes).encode("utf-8")).hexdigest()[:8]
+        package_dir = "src/main/java/com/synthetic/service"
+        lines = ["#!/bin/bash", "set -e", "mkdir -p synthetic-project", "cd synthetic-project",
+                 f"mkdir -p {package_dir} src/main/resources",
+                 "cat << 'EOF' > pom.xml",
+                 "<project><artifactId>synthetic-project</artifactId></project>",
+                 "EOF",
+                 # Differs per unit so partitioned runs exercise the merge crew
+                 "cat << 'EOF' > src/main/resources/application.properties",
+                 f"spring.application.name=synthetic-{unit_id}",
+                 "EOF"]
+        for process in processes:
+            lines += [f"cat << 'EOF' > {package_dir}/{process}Service.java",
+                      "package com.synthetic.service;",
+                      "",
+                      "@Service",
+                      f"public class {process}Service {{",
+                      "    public void execute() {",
+                      f'        log.info("{process} executed");',
+                      "    }",
+                      "}",
+                      "EOF"]
+        lines.append("mvn -q package")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,263 @@
+"""
+Deterministic generators for synthetic benchmark corpora.
+
+``generate_tibco_project`` writes a BusinessWorks project laid out like
+``tibco_samples/FintechTransactionProcessor`` (project.xml, processes,
+schemas, a WSDL, routing rules and properties), with processes arranged as
+orchestrators calling worker processes. ``generate_company_repo`` writes a
+Spring Boot repository of controllers, services, repositories, configs,
+exception handlers, XML/YAML resources and docs. The same seed and size
+always produce the same files.
+"""
+
+import random
+from pathlib import Path
+
+MARKER_FILE = ".synthetic"
+
+DOMAINS = ("Transaction", "Payment", "Account", "Customer", "Invoice", "Ledger", "Order", "Settlement",
+           "Refund", "Card", "Loan", "Transfer", "Statement", "Merchant", "Fraud", "Notification")
+VERBS = ("Validate", "Enrich", "Persist", "Route", "Audit", "Publish", "Reconcile", "Transform", "Score", "Archive")
+ACTIVITY_TYPES = ("JavaMethod", "XSLTTransformation", "JDBCUpdate", "JDBCQuery", "JMSQueueSender", "Email")
+FIELD_TYPES = ("xs:string", "xs:decimal", "xs:dateTime", "xs:int", "xs:boolean")
+
+# Worker processes called by each orchestrator
+CALLS_PER_ORCHESTRATOR = 4
+
+
+def _is_generated(dest: Path, size: int, seed: int) -> bool:
+    marker = dest / MARKER_FILE
+    return marker.exists() and marker.read_text() == f"{size}:{seed}"
+
+
+def _mark_generated(dest: Path, size: int, seed: int):
+    (dest / MARKER_FILE).write_text(f"{size}:{seed}")
+
+
+def _write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+# ------------------ TIBCO projects ------------------
+
+def _activity(rng: random.Random, name: str, domain: str) -> str:
+    kind = rng.choice(ACTIVITY_TYPES)
+    if kind == "JavaMethod":
+        body = f"<method>com.fintech.{domain}Service.{name[0].lower() + name[1:]}</method>"
+    elif kind == "XSLTTransformation":
+        body = f"<stylesheet>{name[0].lower() + name[1:]}.xsl</stylesheet>"
+    elif kind == "JDBCUpdate":
+        body = f"<sql>INSERT INTO {domain.lower()}s (id, amount, status) VALUES (?, ?, ?)</sql>"
+    elif kind == "JDBCQuery":
+        body = f"<sql>SELECT id, amount, status FROM {domain.lower()}s WHERE id = ?</sql>"
+    elif kind == "JMSQueueSender":
+        body = f"<destination>queue.{domain.lower()}.{name.lower()}</destination>"
+    else:
+        body = (f"<to>support@fintech.com</to>\n"
+                f"            <subject>{domain} processing notice</subject>")
+    return (f'        <activity name="{name}" type="{kind}">\n'
+            f"            {body}\n"
+            f"        </activity>\n")
+
+
+def _process(name: str, description: str, activities: str, error_handler: str = None) -> str:
+    handler = ""
+    if error_handler:
+        handler = (f"    <errorHandler>\n"
+                   f"        <processName>{error_handler}</processName>\n"
+                   f"    </errorHandler>\n")
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<process xmlns="http://www.tibco.com/xmlns/repo/types/2002">\n'
+            f"    <name>{name}</name>\n"
+            f"    <description>{description}</description>\n"
+            f"    <activities>\n{activities}    </activities>\n"
+            f"{handler}"
+            f"</process>\n")
+
+
+def generate_tibco_project(dest, processes: int, seed: int = 0) -> Path:
+    """
+    Write a TIBCO project with ``processes`` process files to ``dest``.
+    Every fifth process is an orchestrator calling up to
+    CALLS_PER_ORCHESTRATOR of the workers that follow it, and all
+    orchestrators hand errors to a shared ErrorHandler process.
+    """
+    dest = Path(dest)
+    if _is_generated(dest, processes, seed):
+        return dest
+    rng = random.Random(seed)
+    processes = max(processes, 2)
+
+    names = ["ErrorHandler"] + [
+        f"{VERBS[i % len(VERBS)]}{DOMAINS[(i // len(VERBS)) % len(DOMAINS)]}{i}" for i in range(processes - 1)
+    ]
+    domains = [DOMAINS[(i // len(VERBS)) % len(DOMAINS)] for i in range(processes - 1)]
+    _write(dest / "processes" / "ErrorHandler.process", _process(
+        "ErrorHandler", "Global error handler",
+        _activity(rng, "LogError", "Error") + _activity(rng, "NotifySupport", "Error")
+    ))
+
+    i = 0
+    while i < processes - 1:
+        orchestrator, domain = names[i + 1], domains[i]
+        workers = names[i + 2:i + 2 + CALLS_PER_ORCHESTRATOR]
+        calls = "".join(
+            f'        <activity name="{worker}" type="ProcessCall">\n'
+            f"            <processName>{worker}</processName>\n"
+            f"        </activity>\n"
+            for worker in workers
+        )
+        _write(dest / "processes" / f"{orchestrator}.process", _process(
+            orchestrator, f"Orchestrates {domain.lower()} processing", calls, error_handler="ErrorHandler"
+        ))
+        for worker, worker_domain in zip(workers, domains[i + 1:]):
+            activities = "".join(
+                _activity(rng, f"Step{step}{worker_domain}", worker_domain) for step in range(rng.randint(2, 6))
+            )
+            _write(dest / "processes" / f"{worker}.process",
+                   _process(worker, f"Worker process for {worker_domain.lower()} data", activities))
+        i += 1 + len(workers)
+
+    for domain in DOMAINS[:max(1, min(len(DOMAINS), processes // 5))]:
+        fields = "".join(
+            f'                <xs:element name="{domain[0].lower() + domain[1:]}Field{n}" '
+            f'type="{rng.choice(FIELD_TYPES)}"/>\n'
+            for n in range(rng.randint(4, 12))
+        )
+        _write(dest / "schemas" / f"{domain}.xsd", (
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">\n'
+            f'    <xs:element name="{domain}">\n'
+            f"        <xs:complexType>\n"
+            f"            <xs:sequence>\n{fields}            </xs:sequence>\n"
+            f"        </xs:complexType>\n"
+            f"    </xs:element>\n"
+            f"</xs:schema>\n"
+        ))
+
+    _write(dest / "wsdl" / "SyntheticService.wsdl", (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<definitions xmlns="http://schemas.xmlsoap.org/wsdl/" xmlns:tns="http://fintech.com/synthetic"\n'
+        '             targetNamespace="http://fintech.com/synthetic">\n'
+        '    <message name="ProcessRequest"><part name="payload" element="tns:Transaction"/></message>\n'
+        '    <message name="ProcessResponse"><part name="payload" element="tns:Transaction"/></message>\n'
+        '    <portType name="SyntheticService">\n'
+        '        <operation name="process">\n'
+        '            <input message="tns:ProcessRequest"/>\n'
+        '            <output message="tns:ProcessResponse"/>\n'
+        '        </operation>\n'
+        '    </portType>\n'
+        '    <service name="SyntheticService">\n'
+        '        <port name="SyntheticServicePort" binding="tns:SyntheticServiceBinding"/>\n'
+        '    </service>\n'
+        '</definitions>\n'
+    ))
+    _write(dest / "resources" / "routingRules.xml", (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<routingRules>\n'
+        + "".join(f"    <rule>\n        <condition>transaction.amount &gt; {10 ** n}</condition>\n"
+                  f"        <action>routeToTier{n}Queue</action>\n    </rule>\n" for n in range(3, 7))
+        + "    <defaultAction>routeToStandardQueue</defaultAction>\n</routingRules>\n"
+    ))
+    _write(dest / "resources" / "config.properties", (
+        "db.url=jdbc:mysql://localhost:3306/fintech_db\n"
+        "db.username=fintech_user\n"
+        "db.password=<db_password_goes_here>\n"
+        "transaction.timeout=30000\n"
+        "transaction.maxRetries=3\n"
+    ))
+    _write(dest / "project.xml", (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<project xmlns="http://www.tibco.com/xmlns/repo/types/2002">\n'
+        f"    <name>SyntheticProject{processes}</name>\n"
+        "    <description>Synthetic TIBCO BW project for benchmarks</description>\n"
+        "    <version>1.0.0</version>\n"
+        "    <dependencies>\n        <dependency>TIBCO-BW-6.5.0</dependency>\n    </dependencies>\n"
+        "</project>\n"
+    ))
+    _mark_generated(dest, processes, seed)
+    return dest
+
+
+# ------------------ Company code repositories ------------------
+
+def _java_class(rng: random.Random, package: str, layer: str, domain: str, n: int) -> str:
+    name = f"{domain}{layer.capitalize()}{n}"
+    methods = []
+    for m in range(rng.randint(2, 10)):
+        verb = rng.choice(VERBS)
+        methods.append(
+            f"    public {domain}Dto {verb[0].lower() + verb[1:]}{domain}{m}({domain}Dto request) {{\n"
+            f'        log.info("{verb} {domain.lower()} {{}}", request.getId());\n'
+            f"        if (request.getAmount() == null) {{\n"
+            f'            throw new {domain}Exception("Missing amount for " + request.getId());\n'
+            f"        }}\n"
+            f"        return request.toBuilder().status(\"{verb.upper()}D\").build();\n"
+            f"    }}\n"
+        )
+    annotation = {
+        "controller": f'@RestController\n@RequestMapping("/api/{domain.lower()}s")',
+        "service": "@Service\n@Transactional",
+        "repository": "@Repository",
+        "config": "@Configuration",
+        "exception": "@ControllerAdvice",
+    }[layer]
+    return (f"package {package}.{layer};\n\n"
+            "import lombok.RequiredArgsConstructor;\n"
+            "import lombok.extern.slf4j.Slf4j;\n"
+            "import org.springframework.stereotype.*;\n"
+            "import org.springframework.web.bind.annotation.*;\n\n"
+            f"@Slf4j\n@RequiredArgsConstructor\n{annotation}\n"
+            f"public class {name} {{\n\n" + "\n".join(methods) + "}\n")
+
+
+def generate_company_repo(dest, files: int, seed: int = 0) -> Path:
+    """
+    Write a company code repository with ``files`` source files to ``dest``:
+    mostly Java classes spread over the usual layers, plus pom.xml,
+    application.yml and README files in the same proportions as a typical
+    multi-module Spring Boot repository.
+    """
+    dest = Path(dest)
+    if _is_generated(dest, files, seed):
+        return dest
+    rng = random.Random(seed)
+    layers = ("controller", "service", "repository", "config", "exception")
+
+    for n in range(files):
+        module = dest / f"service-{n // 200}"
+        domain = DOMAINS[n % len(DOMAINS)]
+        kind = n % 20
+        if n % 200 == 0:
+            _write(module / "pom.xml", (
+                "<project>\n  <modelVersion>4.0.0</modelVersion>\n"
+                f"  <artifactId>service-{n // 200}</artifactId>\n  <dependencies>\n"
+                + "".join(f"    <dependency><groupId>org.springframework.boot</groupId>"
+                          f"<artifactId>spring-boot-starter-{starter}</artifactId></dependency>\n"
+                          for starter in ("web", "data-jpa", "security", "validation", "actuator"))
+                + "  </dependencies>\n</project>\n"
+            ))
+        elif kind == 0:
+            _write(module / "src" / "main" / "resources" / f"{domain.lower()}-{n}.xml",
+                   f"<mapping>\n  <name>{domain.lower()}-{n}</name>\n  <target>{domain}Dto</target>\n</mapping>\n")
+        elif kind == 1:
+            _write(module / "src" / "main" / "resources" / f"application-{n}.yml", (
+                f"spring:\n  application:\n    name: {domain.lower()}-{n}\n"
+                "  datasource:\n    url: jdbc:postgresql://localhost:5432/app\n"
+                f"server:\n  port: {8000 + n % 1000}\n"
+            ))
+        elif kind == 2:
+            _write(module / "docs" / f"{domain}-{n}.md", (
+                f"# {domain} service {n}\n\n"
+                + " ".join(rng.choice(VERBS).lower() + " " + domain.lower() for _ in range(rng.randint(40, 200)))
+                + "\n"
+            ))
+        else:
+            layer = layers[n % len(layers)]
+            package = f"com.company.{domain.lower()}"
+            path = (module / "src" / "main" / "java" / "com" / "company" / domain.lower() / layer
+                    / f"{domain}{layer.capitalize()}{n}.java")
+            _write(path, _java_class(rng, package, layer, domain, n))
+
+    _mark_generated(dest, files, seed)
+    return dest
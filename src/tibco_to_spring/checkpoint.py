@@ -0,0 +1,180 @@
+"""
+Content-addressed checkpoints of crew task outputs.
+
+Each task's output is stored under a hash of everything that determines
+it: the TIBCO directory contents, the task description and expected
+output (which carry the config/tasks.yaml text, the parsed IR and the
+company-code context), the agent, the model settings and the outputs of
+the upstream tasks it receives as context. Checkpoints are written as
+each task completes, so a run that fails in a later task keeps the
+earlier outputs. With ``resume`` the leading tasks whose checkpoint is
+still valid are not run again; the crew starts at the first task whose
+inputs changed, and everything downstream of it runs as usual.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from crewai import Crew, Task
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.constants import NOT_SPECIFIED
+
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+CHECKPOINT_DIR = Path(os.getenv("CHECKPOINT_DIR", "outputs/checkpoints"))
+# Bumped when the key payload changes so old checkpoints are not matched by mistake
+CHECKPOINT_VERSION = 1
+
+
+def directory_digest(directory) -> str:
+    """SHA-256 over the relative paths and contents of every file under ``directory``."""
+    digest = hashlib.sha256()
+    root = Path(directory)
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        digest.update(path.relative_to(root).as_posix().encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _model_settings(agent) -> Dict:
+    llm = getattr(agent, "llm", None)
+    if llm is None:
+        return {}
+    return {name: getattr(llm, name, None) for name in ("model", "temperature", "top_p", "max_tokens")}
+
+
+def upstream_tasks(tasks: List[Task], position: int) -> List[Task]:
+    """The tasks whose outputs the task at ``position`` receives as context in a sequential crew."""
+    context = tasks[position].context
+    if context is NOT_SPECIFIED:
+        return tasks[:position]
+    return list(context or [])
+
+
+def task_key(task: Task, upstream: List[Task], inputs_digest: str) -> str:
+    """Checkpoint key of ``task``; the ``upstream`` tasks must already have an output."""
+    agent = task.agent
+    payload = {
+        "version": CHECKPOINT_VERSION,
+        "inputs": inputs_digest,
+        "description": task.description,
+        "expected_output": task.expected_output,
+        "agent": {
+            "role": getattr(agent, "role", None),
+            "goal": getattr(agent, "goal", None),
+            "backstory": getattr(agent, "backstory", None),
+            "tools": sorted(tool.name for tool in (getattr(agent, "tools", None) or [])),
+        },
+        "model": _model_settings(agent),
+        "upstream": [_text_digest(task.output.raw) for task in upstream],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class TaskCheckpointStore:
+    """One JSON file per checkpoint key, written atomically."""
+
+    def __init__(self, directory=CHECKPOINT_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            return json.loads(self._path(key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", key, e)
+            return None
+
+    def put(self, key: str, task: Task, output: TaskOutput):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps({
+            "key": key,
+            "task": task.name,
+            "agent": output.agent,
+            "raw": output.raw,
+            "created_at": time.time(),
+        }), encoding="utf-8")
+        os.replace(temp_path, path)
+
+
+def _restore(task: Task, checkpoint: Dict) -> TaskOutput:
+    return TaskOutput(
+        description=task.description,
+        name=task.name,
+        expected_output=task.expected_output,
+        raw=checkpoint["raw"],
+        agent=checkpoint.get("agent") or getattr(task.agent, "role", ""),
+    )
+
+
+def _checkpointing_callback(task: Task, upstream: List[Task], inputs_digest: str,
+                            store: TaskCheckpointStore, callback=None):
+    def on_complete(output: TaskOutput):
+        store.put(task_key(task, upstream, inputs_digest), task, output)
+        if callback is not None:
+            callback(output)
+    return on_complete
+
+
+def kickoff_with_checkpoints(crew: Crew, inputs_digest: str, resume: bool = False,
+                             store: Optional[TaskCheckpointStore] = None, inputs: Optional[Dict] = None) -> CrewOutput:
+    """
+    Run a sequential ``crew``, checkpointing every task output. With
+    ``resume`` the leading tasks with a valid checkpoint are restored
+    instead of run, and only the tasks from the first invalidated one on
+    are kicked off. ``inputs_digest`` identifies the conversion inputs,
+    e.g. ``directory_digest(tibco_path)``.
+    """
+    store = store or TaskCheckpointStore()
+    tasks = list(crew.tasks)
+    upstream = [upstream_tasks(tasks, position) for position in range(len(tasks))]
+
+    start = 0
+    if resume:
+        while start < len(tasks):
+            checkpoint = store.get(task_key(tasks[start], upstream[start], inputs_digest))
+            if checkpoint is None:
+                break
+            tasks[start].output = _restore(tasks[start], checkpoint)
+            start += 1
+        if start:
+            logger.info("Resuming from checkpoints: reused %d of %d tasks (%s)", start, len(tasks),
+                        ", ".join(task.name or f"task {i + 1}" for i, task in enumerate(tasks[:start])))
+
+    if start == len(tasks):
+        outputs = [task.output for task in tasks]
+        return CrewOutput(raw=outputs[-1].raw, tasks_output=outputs)
+
+    for position in range(start, len(tasks)):
+        task = tasks[position]
+        task.callback = _checkpointing_callback(task, upstream[position], inputs_digest, store, task.callback)
+        if start and task.context is NOT_SPECIFIED:
+            # Restored tasks are not part of this kickoff, so name them as context explicitly
+            task.context = upstream[position]
+
+    crew.tasks = tasks[start:]
+    try:
+        return crew.kickoff(inputs=inputs)
+    finally:
+        crew.tasks = tasks
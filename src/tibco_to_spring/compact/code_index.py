@@ -0,0 +1,303 @@
+# code_index.py
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from tibco_to_spring.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 2
+MANIFEST_FILE_NAME = "code_index.json"
+# Rows per block when writing embeddings to disk
+EMBEDDING_BLOCK_ROWS = 65_536
+# Chunks handed to ``encode`` at once: enough for length bucketing and a worker pool to pay off,
+# few enough that only one batch of texts is held at a time
+ENCODE_BATCH_CHUNKS = 8192
+DEFAULT_CACHE_ROOT = Path(os.path.expanduser("~")) / ".cache" / "tibco_to_spring" / "code_index"
+
+
+def default_cache_dir(base_path) -> Path:
+    """Per-repository cache directory, overridable with CODE_INDEX_CACHE_DIR."""
+    root = Path(os.getenv("CODE_INDEX_CACHE_DIR", DEFAULT_CACHE_ROOT))
+    key = hashlib.sha256(str(Path(base_path).resolve()).encode("utf-8")).hexdigest()[:16]
+    return root / key
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class FileEntry:
+    mtime_ns: int
+    size: int
+    sha256: str
+    chunks: List[str] = field(default_factory=list)
+    embeddings: Optional[np.ndarray] = None
+
+
+class CodeIndexCache:
+    """
+    On-disk chunk/embedding cache for a company code repository.
+
+    Every indexed file is recorded in a manifest with its mtime, size and
+    content hash, together with its chunks and their embeddings. ``update``
+    re-chunks and re-embeds only files that were added or whose content
+    changed, and drops files that no longer exist. Chunks are always laid
+    out in sorted path order, so an incremental update yields the same
+    index as a full rebuild.
+
+    The cache also stores embeddings for a fixed set of named topic queries,
+    recomputed only when the query texts or the embedding model change.
+
+    The manifest is a JSON file; the chunk embeddings are a ``.npy`` file
+    written block by block and memory-mapped on load, so stored vectors
+    are paged in from disk rather than held in memory. Only the vectors
+    of files re-embedded since the last save are in RAM.
+    """
+
+    def __init__(self, cache_dir, embedding_model: str):
+        self.cache_dir = Path(cache_dir)
+        self.embedding_model = embedding_model
+        self.files: Dict[str, FileEntry] = {}
+        self.dimension: Optional[int] = None
+        self.topics: Dict[str, str] = {}
+        self.topic_embeddings: Dict[str, np.ndarray] = {}
+        self._dirty = False
+        self._embeddings_file: Optional[str] = None
+        self._encoded_chunks = 0
+        self._encode_seconds = 0.0
+        self._load()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.cache_dir / MANIFEST_FILE_NAME
+
+    def _load(self):
+        if self.manifest_path.exists():
+            self._load_manifest()
+
+    def _model_matches(self, manifest: Dict) -> bool:
+        if manifest.get("version") == INDEX_FORMAT_VERSION and manifest.get("embedding_model") == self.embedding_model:
+            return True
+        logger.info("Code index cache %s was built with a different format or model; rebuilding", self.cache_dir)
+        return False
+
+    def _load_manifest(self):
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if not self._model_matches(manifest):
+                return
+            embeddings = np.load(self.cache_dir / manifest["embeddings_file"], mmap_mode="r", allow_pickle=False)
+        except Exception as e:
+            logger.warning("Ignoring unreadable code index cache %s: %s", self.cache_dir, e)
+            return
+        if len(embeddings) != sum(len(entry["chunks"]) for entry in manifest["files"].values()):
+            logger.warning("Ignoring code index cache %s: embeddings do not match the manifest", self.cache_dir)
+            return
+
+        self._embeddings_file = manifest["embeddings_file"]
+        self._populate(manifest, embeddings)
+        self.topic_embeddings = {name: np.asarray(vector, dtype="float32")
+                                 for name, vector in manifest.get("topic_embeddings", {}).items()}
+
+    def _populate(self, manifest: Dict, embeddings: np.ndarray):
+        self.dimension = manifest.get("dimension")
+        offset = 0
+        for rel_path, entry in manifest["files"].items():
+            count = len(entry["chunks"])
+            self.files[rel_path] = FileEntry(
+                mtime_ns=entry["mtime_ns"],
+                size=entry["size"],
+                sha256=entry["sha256"],
+                chunks=entry["chunks"],
+                embeddings=embeddings[offset:offset + count],
+            )
+            offset += count
+        self.topics = manifest.get("topics", {})
+
+    def update_topics(self, topics: Dict[str, str], encode: Callable[[List[str]], np.ndarray]) -> Dict[str, np.ndarray]:
+        """Return topic name -> query embedding, encoding only when the query texts changed."""
+        if topics != self.topics or set(self.topic_embeddings) != set(topics):
+            vectors = np.asarray(encode(list(topics.values())), dtype="float32")
+            self.topics = dict(topics)
+            self.topic_embeddings = dict(zip(topics, vectors))
+            self._dirty = True
+        return self.topic_embeddings
+
+    def update(self, base_path, paths: List[Path],
+               split_files: Callable[[List[Path]], Iterator[Tuple[Path, List[str]]]],
+               encode: Callable[[List[str]], np.ndarray]) -> bool:
+        """
+        Bring the cache in line with ``paths`` (files under ``base_path``).
+
+        ``split_files`` streams ``(path, chunks)`` for the files that need
+        re-chunking; their chunks are encoded in batches as they arrive.
+        Returns True when anything changed and the cache was rewritten.
+        """
+        base_path = Path(base_path)
+        current = {}
+        for path in paths:
+            current[path.relative_to(base_path).as_posix()] = path
+
+        removed = [rel_path for rel_path in self.files if rel_path not in current]
+        for rel_path in removed:
+            del self.files[rel_path]
+
+        stale: Dict[str, Tuple[int, int, str]] = {}
+        touched = False
+        for rel_path, path in current.items():
+            stat = path.stat()
+            entry = self.files.get(rel_path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                continue
+
+            sha256 = file_sha256(path)
+            if entry is not None and entry.sha256 == sha256:
+                # Touched but unchanged: keep the chunks, refresh the stat fields
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                touched = True
+                continue
+
+            # Dropped until re-chunked, so a file that fails to load is retried next run
+            self.files.pop(rel_path, None)
+            stale[rel_path] = (stat.st_mtime_ns, stat.st_size, sha256)
+
+        batch: List[Tuple[str, List[str]]] = []
+        batch_chunks = 0
+        for path, chunks in split_files([current[rel_path] for rel_path in stale]):
+            rel_path = Path(path).relative_to(base_path).as_posix()
+            batch.append((rel_path, chunks))
+            batch_chunks += len(chunks)
+            if batch_chunks >= ENCODE_BATCH_CHUNKS:
+                self._add_files(batch, stale, encode)
+                batch, batch_chunks = [], 0
+        if batch:
+            self._add_files(batch, stale, encode)
+
+        logger.info("Code index: %d files indexed, %d added or changed, %d removed",
+                    len(self.files), len(stale), len(removed))
+        if self._encoded_chunks:
+            logger.info("Code index: embedded %d chunks in %.2fs (%.0f chunks/s)", self._encoded_chunks,
+                        self._encode_seconds, self._encoded_chunks / self._encode_seconds if self._encode_seconds else 0.0)
+
+        if stale or removed or touched or self._dirty or not self.manifest_path.exists():
+            self._save()
+            return True
+        return False
+
+    def _add_files(self, batch: List[Tuple[str, List[str]]], stale: Dict[str, Tuple[int, int, str]],
+                   encode: Callable[[List[str]], np.ndarray]):
+        texts = [chunk for _, chunks in batch for chunk in chunks]
+        vectors = None
+        if texts:
+            started = time.perf_counter()
+            vectors = np.asarray(encode(texts), dtype="float32")
+            self._encode_seconds += time.perf_counter() - started
+            self._encoded_chunks += len(texts)
+            self.dimension = vectors.shape[1]
+
+        offset = 0
+        for rel_path, chunks in batch:
+            mtime_ns, size, sha256 = stale[rel_path]
+            count = len(chunks)
+            if count:
+                embeddings = vectors[offset:offset + count]
+            else:
+                embeddings = np.empty((0, self.dimension or 0), dtype="float32")
+            self.files[rel_path] = FileEntry(mtime_ns, size, sha256, chunks, embeddings)
+            offset += count
+
+    def texts(self) -> List[str]:
+        return [chunk for rel_path in sorted(self.files) for chunk in self.files[rel_path].chunks]
+
+    def sources(self) -> List[str]:
+        return [rel_path for rel_path in sorted(self.files) for _ in self.files[rel_path].chunks]
+
+    def embedding_blocks(self, rows: int) -> Iterator[np.ndarray]:
+        """
+        The chunk embeddings in ``texts()`` order, as new float32 arrays of at
+        least ``rows`` rows (except the last) that callers may modify in place.
+        """
+        pending: List[np.ndarray] = []
+        count = 0
+        for rel_path in sorted(self.files):
+            entry = self.files[rel_path]
+            if not entry.chunks:
+                continue
+            pending.append(entry.embeddings)
+            count += len(entry.chunks)
+            if count >= rows:
+                yield np.ascontiguousarray(np.vstack(pending), dtype="float32")
+                pending, count = [], 0
+        if pending:
+            yield np.ascontiguousarray(np.vstack(pending), dtype="float32")
+
+    def _save(self):
+        """
+        Write the embeddings block by block to a new ``.npy`` file, then
+        the manifest naming it, each renamed into place so a crash never
+        leaves a half-written cache. The entries are then re-pointed at the
+        memory-mapped file, releasing the vectors encoded in this update.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        rows = sum(len(entry.chunks) for entry in self.files.values())
+        embeddings_file = f"code_index.{uuid.uuid4().hex[:12]}.npy"
+        tmp_path = self.cache_dir / (embeddings_file + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.lib.format.write_array_header_1_0(f, {
+                "descr": np.lib.format.dtype_to_descr(np.dtype("float32")),
+                "fortran_order": False,
+                "shape": (rows, self.dimension or 0),
+            })
+            for block in self.embedding_blocks(EMBEDDING_BLOCK_ROWS):
+                f.write(block.tobytes())
+        os.replace(tmp_path, self.cache_dir / embeddings_file)
+
+        manifest = {
+            "version": INDEX_FORMAT_VERSION,
+            "embedding_model": self.embedding_model,
+            "dimension": self.dimension,
+            "embeddings_file": embeddings_file,
+            "files": {
+                rel_path: {
+                    "mtime_ns": entry.mtime_ns,
+                    "size": entry.size,
+                    "sha256": entry.sha256,
+                    "chunks": entry.chunks,
+                }
+                for rel_path, entry in sorted(self.files.items())
+            },
+            "topics": self.topics,
+            "topic_embeddings": {name: self.topic_embeddings[name].tolist() for name in self.topics},
+        }
+        # Unique per writer, so concurrent saves never write into each other's temp file
+        tmp_path = self.manifest_path.with_name(f"{MANIFEST_FILE_NAME}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+        # Only the file this instance loaded is removed; another process may be writing its own
+        if self._embeddings_file:
+            superseded = self.cache_dir / self._embeddings_file
+            try:
+                superseded.unlink(missing_ok=True)
+            except OSError as e:  # Still mapped on Windows; removed on a later save
+                logger.debug("Could not remove superseded code index file %s: %s", superseded, e)
+
+        self._embeddings_file = embeddings_file
+        self.files.clear()
+        self._populate(manifest, np.load(self.cache_dir / embeddings_file, mmap_mode="r", allow_pickle=False))
+        self._dirty = False
@@ -0,0 +1,148 @@
+# context_assembly.py
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from tibco_to_spring.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+# Nearest neighbours fetched per category before MMR selection
+CANDIDATES_PER_CATEGORY = 10
+CHARS_PER_TOKEN = 4
+# Longest chunk overlap looked for; the splitters overlap by 150-200 characters
+MAX_OVERLAP_CHARS = 300
+# Shorter matches are coincidences such as a shared closing brace
+MIN_OVERLAP_CHARS = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for code and English)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _overlap(head: str, tail: str, max_chars: int = MAX_OVERLAP_CHARS) -> int:
+    """Length of the longest suffix of ``head`` that is also a prefix of ``tail``."""
+    for size in range(min(len(head), len(tail), max_chars), MIN_OVERLAP_CHARS - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+
+def _category_header(category: str) -> str:
+    return f"🔹 {category.capitalize()} Examples:\n"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+@dataclass
+class AssembledContext:
+    text: str
+    chunks: int
+    tokens: int
+    baseline_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.baseline_tokens - self.tokens)
+
+
+def assemble_context(categories: Sequence[str], query_vectors: np.ndarray, candidates: Sequence[Sequence[int]],
+                     doc_vectors: np.ndarray, texts: Sequence[str], sources: Sequence[str],
+                     per_category: int = 3, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                     mmr_lambda: float = CONTEXT_MMR_LAMBDA) -> AssembledContext:
+    """
+    Build the company-code context from per-category nearest-neighbour
+    ``candidates`` (chunk ids, best first) within ``token_budget`` tokens.
+
+    Categories take turns picking their next chunk, so a tight budget is
+    shared evenly. Each pick maximises maximal marginal relevance,
+    ``mmr_lambda * sim(query, chunk) - (1 - mmr_lambda) * max sim(chunk, picked)``,
+    over chunks not yet used by any category; exact duplicates are skipped
+    and text that overlaps an adjacent chunk of the same file already in
+    the context is trimmed. ``doc_vectors`` must be L2-normalised.
+    ``baseline_tokens`` is the size of the untrimmed top ``per_category``
+    chunks per category, i.e. the context without budgeting.
+    """
+    query_vectors = normalize_rows(query_vectors)
+    baseline_tokens = sum(
+        estimate_tokens(_category_header(category))
+        + sum(estimate_tokens(texts[i]) for i in ids[:per_category] if i >= 0)
+        for category, ids in zip(categories, candidates)
+    )
+
+    remaining = {category: [i for i in ids if i >= 0] for category, ids in zip(categories, candidates)}
+    relevance = {
+        category: {i: float(doc_vectors[i] @ query) for i in remaining[category]}
+        for category, query in zip(categories, query_vectors)
+    }
+    picks: Dict[str, List[str]] = {category: [] for category in categories}
+    picked_ids: List[int] = []
+    picked_hashes = set()
+    picked_by_source: Dict[str, List[int]] = {}
+    budget = token_budget
+    active = list(categories)
+
+    while active:
+        for category in list(active):
+            if len(picks[category]) >= per_category:
+                active.remove(category)
+                continue
+            header_cost = 0 if picks[category] else estimate_tokens(_category_header(category))
+            chosen = None
+            while remaining[category] and chosen is None:
+                best = _best_mmr(remaining[category], relevance[category], doc_vectors, picked_ids, mmr_lambda)
+                remaining[category].remove(best)
+                if best in picked_ids:
+                    continue
+                digest = hashlib.sha1(texts[best].encode("utf-8")).digest()
+                if digest in picked_hashes:
+                    continue
+                text = _trim_overlaps(texts[best], [texts[i] for i in picked_by_source.get(sources[best], [])])
+                cost = estimate_tokens(text) + header_cost
+                if not text.strip() or cost > budget:
+                    continue
+                chosen = best
+                budget -= cost
+                picked_ids.append(best)
+                picked_hashes.add(digest)
+                picked_by_source.setdefault(sources[best], []).append(best)
+                picks[category].append(text)
+            if chosen is None:
+                active.remove(category)
+
+    blocks = [_category_header(category) + "\n\n".join(picks[category]) for category in categories if picks[category]]
+    text = "\n\n".join(blocks)
+    return AssembledContext(text=text, chunks=len(picked_ids), tokens=estimate_tokens(text),
+                            baseline_tokens=baseline_tokens)
+
+
+def _best_mmr(ids: List[int], relevance: Dict[int, float], doc_vectors: np.ndarray,
+              picked_ids: List[int], mmr_lambda: float) -> int:
+    if not picked_ids:
+        return max(ids, key=lambda i: relevance[i])
+    redundancy = (doc_vectors[ids] @ doc_vectors[picked_ids].T).max(axis=1)
+    scores = [mmr_lambda * relevance[i] - (1 - mmr_lambda) * r for i, r in zip(ids, redundancy)]
+    return ids[int(np.argmax(scores))]
+
+
+def _trim_overlaps(text: str, neighbours: List[str]) -> str:
+    """Drop text already present at the end/start of an adjacent chunk of the same file."""
+    for neighbour in neighbours:
+        head = _overlap(neighbour, text)
+        if head:
+            text = text[head:]
+        tail = _overlap(text, neighbour)
+        if tail:
+            text = text[:-tail]
+    return text
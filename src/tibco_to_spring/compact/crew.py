@@ -1,15 +1,29 @@
 # crew.py
 
-from crewai import Crew, Agent, Task, LLM
+from crewai import Crew, Agent, Task
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Type,Any
 from crewai_tools import FileReadTool, DirectoryReadTool
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
-from langchain_community.document_loaders import DirectoryLoader
-from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+import os
+import re
+import threading
+from collections import OrderedDict
+from tibco_to_spring.tibco_ir import tibco_ir_prompt
+from tibco_to_spring.llm_cache import CachedLLM, default_llm_cache, default_rate_limiter
+from tibco_to_spring.embeddings import DEFAULT_EMBEDDING_MODEL, get_embedding_provider
+from tibco_to_spring.compact.code_index import CodeIndexCache, default_cache_dir
+from tibco_to_spring.compact.context_assembly import (
+    CANDIDATES_PER_CATEGORY, CONTEXT_TOKEN_BUDGET, assemble_context
+)
+from tibco_to_spring.compact.scanner import RepositoryScanner
+from tibco_to_spring.tools.bulk_file_read_tool import BulkFileReadTool
+from tibco_to_spring.tracing import trace_span
+from tibco_to_spring.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 class CompanyCodeInput(BaseModel):
     query: str = Field(..., description="Search query for company code examples")
@@ -27,86 +41,131 @@ class CompanyCodeTool(BaseTool):
 # ------------------ Code Scanner ------------------
 
 def scan_code(path):
-    file_types = ["**/*.java", "**/*.xml", "**/*.yml", "**/*.md"]
-    loaders = [
-        DirectoryLoader(path, glob=pattern, show_progress=True, loader_kwargs={"autodetect_encoding": True})
-        for pattern in file_types
-    ]
-
-    documents = []
-    for loader in loaders:
-        documents.extend(loader.load())
-
-    java_splitter = RecursiveCharacterTextSplitter.from_language(
-        language=Language.JAVA, chunk_size=1000, chunk_overlap=200
-    )
-    generic_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
+    from langchain_core.documents import Document
 
+    scanner = RepositoryScanner()
     split_docs = []
-    for doc in documents:
-        file_path = doc.metadata.get("file_path", "")
-        splitter = java_splitter if file_path.endswith(".java") else generic_splitter
-        split_docs.extend(splitter.split_documents([doc]))
-
+    for file_path, chunks in scanner.split_files(scanner.iter_files(path)):
+        for chunk in chunks:
+            split_docs.append(Document(page_content=chunk, metadata={"source": str(file_path)}))
     return split_docs
 
 # ------------------ Context Provider ------------------
 
+TOPIC_QUERIES = {
+    "controller": (
+        "Spring Boot RestController @GetMapping @PostMapping @RequestMapping "
+        "HTTP endpoint input validation response entity"
+    ),
+    "service": (
+        "@Service business logic orchestration transactional method delegation "
+        "domain service pattern internal API"
+    ),
+    "repository": (
+        "@Repository JPA interface JpaRepository CrudRepository database access "
+        "query methods native SQL annotations"
+    ),
+    "configuration": (
+        "@Configuration @Bean application setup dependency injection custom config "
+        "property binding environment profiles"
+    ),
+    "security": (
+        "SecurityFilterChain authentication authorization HttpSecurity role-based access "
+        "JWT OAuth2 login logout"
+    ),
+    "exception": (
+        "@ControllerAdvice @ExceptionHandler global error handling custom exceptions "
+        "response status error mapping"
+    ),
+    "conversion": (
+        "DTO to entity mapping model transformation controller-service-exception flow "
+        "MapStruct custom converter"
+    ),
+    "tibco": (
+        "TIBCO BW XML process flow mapping integration orchestration legacy system "
+        "adapter transformation activity"
+    )
+}
+
+QUERY_CACHE_SIZE = 256
+# Embeddings normalised and added to the FAISS index per block
+INDEX_ADD_BLOCK_ROWS = 65_536
+
 class CompanyCodeContext:
-    def __init__(self, base_path):
-        self.docs = scan_code(base_path)
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    def __init__(self, base_path, cache_dir=None, embedding_model=DEFAULT_EMBEDDING_MODEL):
+        self.model = get_embedding_provider(embedding_model)
+        self.cache = CodeIndexCache(cache_dir or default_cache_dir(base_path), embedding_model)
+        self.topic_embeddings = self.cache.update_topics(TOPIC_QUERIES, self.model.encode)
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        scanner = RepositoryScanner()
+        self.cache.update(
+            base_path,
+            list(scanner.iter_files(base_path)),
+            split_files=scanner.split_files,
+            encode=self.model.encode_bulk,
+        )
         self.index, self.doc_texts = self._build_faiss_index()
+        self.doc_sources = self.cache.sources()
+        self._context_cache = {}
 
     def _build_faiss_index(self):
-        texts = [doc.page_content for doc in self.docs]
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        index = faiss.IndexFlatL2(embeddings.shape[1])
-        index.add(embeddings)
+        """
+        Fill a flat index with the L2-normalised chunk embeddings, streamed
+        from the memory-mapped cache one block at a time. The index holds the
+        only in-memory copy of the vectors: ``doc_vectors``, used by the MMR
+        computations in get_context, is a view of its storage. Peak memory is
+        the index (chunks x dimension x 4 bytes) plus one block.
+        """
+        texts = self.cache.texts()
+        index = faiss.IndexFlatL2(self.cache.dimension or self.model.dimension)
+        for block in self.cache.embedding_blocks(INDEX_ADD_BLOCK_ROWS):
+            faiss.normalize_L2(block)
+            index.add(block)
+        if index.ntotal:
+            # Valid while the index is alive and not added to, which holds after construction
+            self.doc_vectors = faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+        else:
+            self.doc_vectors = np.empty((0, index.d), dtype="float32")
         return index, texts
 
-    def get_examples(self, topic, k=3):
-        query_map = {
-            "controller": (
-                "Spring Boot RestController @GetMapping @PostMapping @RequestMapping "
-                "HTTP endpoint input validation response entity"
-            ),
-            "service": (
-                "@Service business logic orchestration transactional method delegation "
-                "domain service pattern internal API"
-            ),
-            "repository": (
-                "@Repository JPA interface JpaRepository CrudRepository database access "
-                "query methods native SQL annotations"
-            ),
-            "configuration": (
-                "@Configuration @Bean application setup dependency injection custom config "
-                "property binding environment profiles"
-            ),
-            "security": (
-                "SecurityFilterChain authentication authorization HttpSecurity role-based access "
-                "JWT OAuth2 login logout"
-            ),
-            "exception": (
-                "@ControllerAdvice @ExceptionHandler global error handling custom exceptions "
-                "response status error mapping"
-            ),
-            "conversion": (
-                "DTO to entity mapping model transformation controller-service-exception flow "
-                "MapStruct custom converter"
-            ),
-            "tibco": (
-                "TIBCO BW XML process flow mapping integration orchestration legacy system "
-                "adapter transformation activity"
-            )
-        }
+    def _embed_query(self, query):
+        # Crews running in parallel threads share one context provider
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(query)
+            if embedding is not None:
+                self._query_cache.move_to_end(query)
+                return embedding
+        embedding = self.model.encode([query])[0]
+        with self._query_cache_lock:
+            self._query_cache[query] = embedding
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return embedding
+
+    def _topic_vector(self, topic):
+        if topic in self.topic_embeddings:
+            return self.topic_embeddings[topic]
+        return self._embed_query(TOPIC_QUERIES.get(topic, topic))
 
-        query = query_map.get(topic, topic)
-        query_embedding = self.model.encode([query], convert_to_numpy=True)
-        distances, indices = self.index.search(query_embedding, k)
-        return "\n\n".join(self.doc_texts[i] for i in indices[0])
+    def get_examples(self, topic, k=3):
+        with trace_span("company_code.search", "retrieval", k=k) as span:
+            query_embedding = np.asarray([self._topic_vector(topic)], dtype="float32")
+            distances, indices = self.index.search(query_embedding, k)
+            examples = "\n\n".join(self.doc_texts[i] for i in indices[0] if i >= 0)
+            span.add(bytes_read=len(examples.encode("utf-8")))
+            return examples
+
+    def get_context(self, token_budget=CONTEXT_TOKEN_BUDGET):
+        """
+        Company code examples for every category, de-duplicated across
+        categories and assembled within ``token_budget`` tokens
+        (CONTEXT_TOKEN_BUDGET). The result is cached per budget, since every
+        conversion task built from this provider asks for the same context.
+        """
+        if token_budget in self._context_cache:
+            return self._context_cache[token_budget]
 
-    def get_context(self):
         categories = [
             "controller",
             "service",
@@ -116,11 +175,21 @@ class CompanyCodeContext:
             "exception",
             "conversion"
         ]
-        context_blocks = []
-        for category in categories:
-            examples = self.get_examples(category)
-            context_blocks.append(f"🔹 {category.capitalize()} Examples:\n{examples}")
-        return "\n\n".join(context_blocks)
+        with trace_span("company_code.context", "retrieval", categories=len(categories)) as span:
+            # One batched search for every category instead of a search per category
+            query_embeddings = np.asarray([self._topic_vector(c) for c in categories], dtype="float32")
+            distances, indices = self.index.search(query_embeddings, CANDIDATES_PER_CATEGORY)
+
+            assembled = assemble_context(
+                categories, query_embeddings, indices, self.doc_vectors, self.doc_texts, self.doc_sources,
+                per_category=3, token_budget=token_budget
+            )
+            logger.info("Company code context: %d chunks, ~%d tokens (budget %d, ~%d tokens saved)",
+                        assembled.chunks, assembled.tokens, token_budget, assembled.tokens_saved)
+            span.add(bytes_read=len(assembled.text.encode("utf-8")))
+            span.attributes.update(tokens=assembled.tokens, tokens_saved=assembled.tokens_saved)
+            self._context_cache[token_budget] = assembled.text
+            return assembled.text
 
 # ------------------ Tool Wrapper ------------------
 
@@ -132,14 +201,24 @@ def setup_company_knowledge_tool(base_path):
 # ------------------ Agents ------------------
 
 
-llm_cache = {}
-llm = LLM(
-    # model="mistral/mistral-large-2411",
-    # model="mistral/mistral-large-latest",
-    model="mistral/codestral-2508",
-    temperature=0.7,
-    cache=llm_cache  # Enable caching
-)
+# Created on first use so importing this module does not set up LiteLLM; assign it to substitute another LLM
+llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    global llm
+    with _llm_lock:
+        if llm is None:
+            llm = CachedLLM(
+                # model="mistral/mistral-large-2411",
+                # model="mistral/mistral-large-latest",
+                model="mistral/codestral-2508",
+                temperature=0.7,
+                cache=default_llm_cache(),  # Persistent response cache
+                rate_limiter=default_rate_limiter(),
+                stream=os.getenv("STREAM_OUTPUT", "0") == "1"  # Emit token chunks for the streaming output writer
+            )
+        return llm
 
 def create_java_architect(tool):
     return Agent(
@@ -153,10 +232,10 @@ def create_java_architect(tool):
         tools=[tool],
         allow_delegation=False,
         verbose=True,
-        llm=llm
+        llm=get_llm()
     )
 
-def create_tibco_parser(dir_tool, file_tool):
+def create_tibco_parser(dir_tool, file_tool, bulk_read_tool=None):
     return Agent(
         role="TIBCO BusinessWorks and BusinessEvents Project Analyst",
         goal="""
@@ -171,15 +250,16 @@ def create_tibco_parser(dir_tool, file_tool):
         Known for delivering precise, actionable insights that support modernization, migration, and optimization efforts.
         You extract flow definitions, service invocations, mappings, and transformation logic from process definitions and prepare them for conversion to Spring Boot.
         """,
-        tools=[dir_tool, file_tool],
+        # The bulk reader fetches many project files per turn instead of one file per LLM round trip
+        tools=[dir_tool, file_tool] + ([bulk_read_tool] if bulk_read_tool is not None else []),
         allow_delegation=False,
         verbose=True,
-        llm=llm
+        llm=get_llm()
     )
 
 # ------------------ Tasks ------------------
 
-def create_tibco_parsing_task(agent):
+def create_tibco_parsing_task(agent, tibco_ir=""):
     return Task(
         description=f"""
         Perform a comprehensive analysis of the provided TIBCO BusinessEvents and TIBCO BusinessWorks projects, focusing on key architectural 
@@ -189,7 +269,7 @@ def create_tibco_parsing_task(agent):
         role, behavior, and interdependencies. Provide actionable insights on how these components can be mapped, adapted, or re-engineered 
         during migration to Spring Boot. Highlight considerations for preserving functional parity and mitigating migration risks.
         Output a structured summary of the process logic that can be used for Spring Boot conversion.
-        """,
+        {tibco_ir}""",
         agent=agent,
         expected_output="""
         A detailed technical analysis documenting all relevant aspects of the TIBCO project's architecture and functionality. 
@@ -201,7 +281,7 @@ def create_tibco_parsing_task(agent):
         """
     )
 
-def create_conversion_task(agent, context_provider):
+def create_conversion_task(agent, context_provider, scope=""):
     return Task(
         description=f"""Convert TIBCO BusinessWorks process to Spring Boot.
 
@@ -247,7 +327,7 @@ def create_conversion_task(agent, context_provider):
         - Maintain clean, modular, and well-documented code.
         - Validate that the Bash script produces a fully functional Spring Boot application.
         - Ensure the final application mirrors the original TIBCO workflows and logic with precision.
-        """,
+        {scope}""",
         agent=agent,
         expected_output=f"""
         A complete Spring Boot application matching company standards, that replicates the full functionality of the original TIBCO BusinessWorks and BusinessEvents projects. 
@@ -256,15 +336,69 @@ def create_conversion_task(agent, context_provider):
         """
     )
 
+def create_merge_agent():
+    return Agent(
+        role="Spring Boot Integration Engineer",
+        goal="Merge independently generated versions of the same project file into one consistent file",
+        backstory="""
+        You assemble Spring Boot projects whose parts were generated in parallel. You combine Maven dependencies,
+        configuration properties and shared classes from every version without losing anything any part relies on,
+        and you resolve duplicates and contradictions so the project compiles.
+        """,
+        allow_delegation=False,
+        verbose=True,
+        llm=get_llm()
+    )
+
+def create_merge_task(agent, path, versions):
+    variants = "\n\n".join(
+        f"#### Version {i}\n```\n{content}\n```" for i, content in enumerate(versions, start=1)
+    )
+    return Task(
+        description=f"""Merge the following {len(versions)} versions of `{path}` into a single file.
+        Keep every dependency, property, bean and member that any version needs, remove duplicates,
+        and resolve conflicting values in favour of the most complete version.
+
+        {variants}
+        """,
+        agent=agent,
+        expected_output=f"The complete merged content of `{path}` only, without code fences or commentary."
+    )
+
+def resolve_file_conflicts(conflicts):
+    """Merge differing versions of each file with one merge task per file. Returns {path: content}."""
+    agent = create_merge_agent()
+    paths = sorted(conflicts)
+    tasks = [create_merge_task(agent, path, conflicts[path]) for path in paths]
+    crew_output = Crew(agents=[agent], tasks=tasks, verbose=True).kickoff()
+    merged = {}
+    for path, task_output in zip(paths, crew_output.tasks_output):
+        content = re.sub(r"^```[^\n]*\n|\n```\s*$", "", task_output.raw.strip())
+        merged[path] = content + "\n"
+    return merged
+
 # ------------------ Crew Setup ------------------
 
-def create_crew(base_path="./company-repos", tibco_path="./tibco-project"):
-    tool, context_provider = setup_company_knowledge_tool(base_path)
+def create_crew(base_path="./company-repos", tibco_path="./tibco-project", context_provider=None,
+                tibco_ir=None, scope=""):
+    """
+    Build the conversion crew. Pass an existing ``context_provider`` to reuse
+    one company-code index across many crews instead of loading it per crew.
+    ``tibco_ir`` overrides the parsed-project prompt section and ``scope``
+    narrows the conversion task, as used for partitioned conversions.
+    """
+    if context_provider is None:
+        tool, context_provider = setup_company_knowledge_tool(base_path)
+    else:
+        tool = CompanyCodeTool(context_provider=context_provider)
     java_architect = create_java_architect(tool)
-    tibco_parser = create_tibco_parser(DirectoryReadTool(directory=tibco_path), FileReadTool())
+    tibco_parser = create_tibco_parser(DirectoryReadTool(directory=tibco_path), FileReadTool(),
+                                       BulkFileReadTool(directory=tibco_path))
 
-    task_parse = create_tibco_parsing_task(tibco_parser)
-    task_convert = create_conversion_task(java_architect, context_provider)
+    if tibco_ir is None:
+        tibco_ir = tibco_ir_prompt(tibco_path)
+    task_parse = create_tibco_parsing_task(tibco_parser, tibco_ir)
+    task_convert = create_conversion_task(java_architect, context_provider, scope)
 
     return Crew(
         agents=[tibco_parser, java_architect],
@@ -0,0 +1,153 @@
+# scanner.py
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from tibco_to_spring.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CODE_EXTENSIONS = (".java", ".xml", ".yml", ".md")
+IGNORED_DIRS = ("target", ".git", "node_modules")
+MAX_FILE_SIZE = 1 << 20  # 1 MiB
+
+
+@lru_cache(maxsize=None)
+def _splitters():
+    """(java, generic) splitters; LangChain is imported on the first split, so warm index loads skip it."""
+    from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+    java_splitter = RecursiveCharacterTextSplitter.from_language(
+        language=Language.JAVA, chunk_size=1000, chunk_overlap=200
+    )
+    generic_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
+    return java_splitter, generic_splitter
+
+
+def split_code_file(file_path) -> List[str]:
+    from langchain_community.document_loaders import TextLoader
+
+    documents = TextLoader(str(file_path), autodetect_encoding=True).load()
+    java_splitter, generic_splitter = _splitters()
+    splitter = java_splitter if str(file_path).endswith(".java") else generic_splitter
+    return [doc.page_content for doc in splitter.split_documents(documents)]
+
+
+def _split_worker(file_path: str) -> Tuple[str, Optional[List[str]], int, Optional[str]]:
+    try:
+        return file_path, split_code_file(file_path), os.path.getsize(file_path), None
+    except Exception as e:
+        return file_path, None, 0, str(e)
+
+
+@dataclass
+class ScanStats:
+    files: int = 0
+    bytes: int = 0
+    chunks: int = 0
+    skipped_large: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+
+class RepositoryScanner:
+    """
+    Single-pass repository scanner.
+
+    ``iter_files`` walks the tree once, pruning ignored directories and
+    skipping files over ``max_file_size``. ``split_files`` hands files to a
+    process pool that reads and splits them, and yields ``(path, chunks)``
+    as soon as each file is done, so callers can start embedding before the
+    scan finishes. Results arrive in completion order, not path order.
+    """
+
+    def __init__(self, extensions: Iterable[str] = CODE_EXTENSIONS,
+                 ignored_dirs: Iterable[str] = IGNORED_DIRS,
+                 max_file_size: int = MAX_FILE_SIZE,
+                 workers: Optional[int] = None):
+        self.extensions = tuple(extensions)
+        self.ignored_dirs = set(ignored_dirs)
+        self.max_file_size = max_file_size
+        self.workers = workers if workers is not None else int(os.getenv("SCAN_WORKERS", os.cpu_count() or 1))
+        self.stats = ScanStats()
+
+    def iter_files(self, base_path) -> Iterator[Path]:
+        for root, dirs, files in os.walk(base_path):
+            dirs[:] = sorted(d for d in dirs if d not in self.ignored_dirs)
+            for name in sorted(files):
+                if not name.endswith(self.extensions):
+                    continue
+                path = Path(root) / name
+                try:
+                    size = path.stat().st_size
+                except OSError:
+                    continue
+                if size > self.max_file_size:
+                    self.stats.skipped_large += 1
+                    logger.debug("Skipping %s (%d bytes exceeds the %d byte cap)", path, size, self.max_file_size)
+                    continue
+                yield path
+
+    def split_files(self, paths: Iterable[Path]) -> Iterator[Tuple[Path, List[str]]]:
+        started = time.monotonic()
+        try:
+            if self.workers <= 1:
+                for path in paths:
+                    result = self._split_serial(path)
+                    if result is not None:
+                        yield result
+                return
+
+            # Spawned rather than forked: the embedding model (and torch's thread pools)
+            # may already be loaded in this process, and forking those can deadlock
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn")) as executor:
+                # Keep a bounded window in flight so huge trees never queue every file at once
+                window = self.workers * 4
+                pending = set()
+                for path in paths:
+                    pending.add(executor.submit(_split_worker, str(path)))
+                    if len(pending) >= window:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        yield from self._collect(done)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self._collect(done)
+        finally:
+            self.stats.elapsed += time.monotonic() - started
+            logger.info("Scanned %d files (%.1f MB, %d chunks) in %.2fs: %.1f files/s, %.2f MB/s",
+                        self.stats.files, self.stats.bytes / 1e6, self.stats.chunks, self.stats.elapsed,
+                        self.stats.files_per_sec, self.stats.bytes_per_sec / 1e6)
+
+    def _split_serial(self, path: Path) -> Optional[Tuple[Path, List[str]]]:
+        return self._record(*_split_worker(str(path)))
+
+    def _collect(self, futures) -> Iterator[Tuple[Path, List[str]]]:
+        for future in futures:
+            result = self._record(*future.result())
+            if result is not None:
+                yield result
+
+    def _record(self, file_path: str, chunks: Optional[List[str]], size: int,
+                error: Optional[str]) -> Optional[Tuple[Path, List[str]]]:
+        if error is not None:
+            self.stats.errors += 1
+            logger.error("Error scanning %s: %s", file_path, error)
+            return None
+        self.stats.files += 1
+        self.stats.bytes += size
+        self.stats.chunks += len(chunks)
+        return Path(file_path), chunks
@@ -1,10 +1,10 @@
-from crewai import Agent, Crew, Process, Task, LLM
+from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import FileReadTool, DirectoryReadTool
 import os
-from tibco_to_spring.local_vector_memory import LocalVectorMemory
 from crewai.memory.external.external_memory import ExternalMemory
 from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.tibco_ir import tibco_ir_prompt
+from tibco_to_spring.llm_cache import CachedLLM, default_llm_cache, default_rate_limiter
 
 # Set up logging
 logger = get_logger(__name__)
@@ -15,29 +15,56 @@ class TibcoToSpring():
 	agents_config = 'config/agents.yaml'
 	tasks_config = 'config/tasks.yaml'
 	tibco_directory = os.getenv('TIBCO_DIRECTORY', 'tibco_samples/FintechTransactionProcessorAsString')
-	logger.info(f"Using TIBCO directory: {tibco_directory}")
-	dir_tool = DirectoryReadTool(directory=tibco_directory)
-	file_tool = FileReadTool()
+
+	# Tools and the LLM are built on first use rather than in the class body,
+	# so importing this module costs no tool or LiteLLM setup
+	_analyst_tools = None
+	_llm = None
+
+	def _tools(self):
+		if self._analyst_tools is None:
+			from crewai_tools import FileReadTool, DirectoryReadTool
+			from tibco_to_spring.tools.bulk_file_read_tool import BulkFileReadTool
+
+			logger.info(f"Using TIBCO directory: {self.tibco_directory}")
+			self._analyst_tools = [
+				DirectoryReadTool(directory=self.tibco_directory),
+				FileReadTool(),
+				BulkFileReadTool(directory=self.tibco_directory)
+			]
+		return self._analyst_tools
+
+	def _get_llm(self):
+		if self._llm is None:
+			self._llm = CachedLLM(
+				# model="mistral/mistral-large-2411",
+				# model="mistral/mistral-large-latest",
+				model="mistral/codestral-2508",
+				temperature=0.7,
+				cache=default_llm_cache(),  # Persistent response cache
+				rate_limiter=default_rate_limiter()
+			)
+		return self._llm
 
 	# Create a unique memory instance for each crew run
 	def _create_memory(self):
-		return ExternalMemory(storage=LocalVectorMemory())
+		from tibco_to_spring.local_vector_memory import memory_retention_settings
+		from tibco_to_spring.mapped_vector_memory import create_memory_storage
 
-	llm_cache = {}
-	llm = LLM(
-        # model="mistral/mistral-large-2411",
-        # model="mistral/mistral-large-latest",
-		model="mistral/codestral-2508",
-        temperature=0.7,
-        cache=llm_cache  # Enable caching
-    )
+		return ExternalMemory(storage=create_memory_storage(
+			buffer_size=int(os.getenv('MEMORY_BUFFER_SIZE', '1')),
+			flush_interval=float(os.getenv('MEMORY_FLUSH_INTERVAL', '5')),
+			index_type=os.getenv('MEMORY_INDEX_TYPE', 'auto'),
+			metric=os.getenv('MEMORY_METRIC', 'l2'),
+			**memory_retention_settings()
+		))
 
 	@agent
 	def tibco_analyst(self) -> Agent:
 		return Agent(
 			config=self.agents_config['tibco_analyst'],
-			tools=[self.dir_tool, self.file_tool],
-			llm=self.llm,
+			tools=self._tools(),
+			llm=self._get_llm(),
 			verbose=True,
 			allow_delegation=False
 		)
@@ -47,7 +74,7 @@ class TibcoToSpring():
 		return Agent(
 			config=self.agents_config['java_architect'],
 			verbose=True,
-			llm=self.llm,
+			llm=self._get_llm(),
 			allow_delegation=False
 		)
 
@@ -56,14 +83,17 @@ class TibcoToSpring():
 		return Agent(
 			config=self.agents_config['java_reviewer'],
 			verbose=True,
-			llm=self.llm,
+			llm=self._get_llm(),
 			allow_delegation=False
 		)
 
 	@task
 	def analyze_tibco(self) -> Task:
+		config = self.tasks_config['analyze_tibco']
 		return Task(
-			config=self.tasks_config['analyze_tibco']
+			config=config,
+			# Hand the analyst the pre-parsed project instead of making it read every file
+			description=config['description'] + tibco_ir_prompt(self.tibco_directory)
 		)
 
 	@task
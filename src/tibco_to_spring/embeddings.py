@@ -0,0 +1,167 @@
+import atexit
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.tracing import trace_span
+
+# Set up logging
+logger = get_logger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Below this many texts a worker pool costs more to start than it saves
+MULTI_PROCESS_MIN_TEXTS = 2_000
+# CPU threads per embedding worker process when EMBEDDING_WORKERS is not set
+THREADS_PER_WORKER = 4
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class EmbeddingProvider:
+    """
+    Lazily loaded sentence-transformer shared by crew memory and code retrieval.
+
+    The model is loaded on the first call that needs it. ``batch_size``,
+    ``device``, ``num_threads`` and ``workers`` default to the
+    EMBEDDING_BATCH_SIZE, EMBEDDING_DEVICE, EMBEDDING_THREADS and
+    EMBEDDING_WORKERS environment variables. ``workers`` is the number of
+    processes ``encode_bulk`` spreads large CPU encodes over; by default one
+    per THREADS_PER_WORKER available cores.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, batch_size: Optional[int] = None,
+                 device: Optional[str] = None, num_threads: Optional[int] = None,
+                 workers: Optional[int] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+        self.device = device or os.getenv("EMBEDDING_DEVICE") or None
+        threads = num_threads or os.getenv("EMBEDDING_THREADS")
+        self.num_threads = int(threads) if threads else None
+        workers = workers or os.getenv("EMBEDDING_WORKERS")
+        self.workers = int(workers) if workers else max(1, available_cores() // THREADS_PER_WORKER)
+        self._model = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    if self.num_threads:
+                        import torch
+                        torch.set_num_threads(self.num_threads)
+                    logger.info("Loading embedding model %s", self.model_name)
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: Union[str, List[str]], batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        """
+        Encode one string (returns a 1-D vector) or a list of strings (returns
+        a 2-D array) as float32 in batches of ``batch_size``.
+        """
+        kwargs.setdefault("convert_to_numpy", True)
+        kwargs.setdefault("show_progress_bar", False)
+        with trace_span("encode", "embedding", texts=1 if isinstance(texts, str) else len(texts)):
+            embeddings = self.model.encode(texts, batch_size=batch_size or self.batch_size, **kwargs)
+        return np.asarray(embeddings, dtype="float32")
+
+    def encode_bulk(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode a large list of texts for indexing and return the vectors in
+        input order. Texts are sorted by length first, so every batch holds
+        texts of similar length and little of it is padding. With at least
+        MULTI_PROCESS_MIN_TEXTS texts on CPU, the sorted texts are encoded
+        across ``workers`` processes. Logs the throughput in chunks/s.
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype="float32")
+        started = time.perf_counter()
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+
+        workers = 1
+        if self.workers > 1 and len(texts) >= MULTI_PROCESS_MIN_TEXTS and self.model.device.type == "cpu":
+            pool = self._encode_pool()
+            with trace_span("encode", "embedding", texts=len(texts), workers=self.workers):
+                vectors = self.model.encode_multi_process(sorted_texts, pool, batch_size=self.batch_size)
+            workers = self.workers
+        else:
+            vectors = self.encode(sorted_texts)
+
+        vectors = np.asarray(vectors, dtype="float32")
+        embeddings = np.empty_like(vectors)
+        embeddings[order] = vectors
+        elapsed = time.perf_counter() - started
+        logger.info("Embedded %d chunks in %.2fs (%.0f chunks/s, %d worker%s)", len(texts), elapsed,
+                    len(texts) / elapsed if elapsed else 0.0, workers, "" if workers == 1 else "s")
+        return embeddings
+
+    def _encode_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                threads = self.num_threads or max(1, available_cores() // self.workers)
+                # Workers are spawned and read the thread count when they import torch
+                previous = os.environ.get("OMP_NUM_THREADS")
+                os.environ["OMP_NUM_THREADS"] = str(threads)
+                try:
+                    self._pool = self.model.start_multi_process_pool(["cpu"] * self.workers)
+                finally:
+                    if previous is None:
+                        os.environ.pop("OMP_NUM_THREADS", None)
+                    else:
+                        os.environ["OMP_NUM_THREADS"] = previous
+                atexit.register(self.close)
+                logger.info("Started %d embedding worker processes with %d threads each", self.workers, threads)
+            return self._pool
+
+    def close(self):
+        """Stop the ``encode_bulk`` worker processes, if started."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self.model.stop_multi_process_pool(self._pool)
+                self._pool = None
+
+
+_providers: Dict[str, EmbeddingProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_embedding_provider(model_name: str = DEFAULT_EMBEDDING_MODEL) -> EmbeddingProvider:
+    """Return the process-wide provider for ``model_name``, creating it on first request."""
+    with _providers_lock:
+        provider = _providers.get(model_name)
+        if provider is None:
+            provider = EmbeddingProvider(model_name)
+            _providers[model_name] = provider
+        return provider
+
+
+def register_embedding_provider(model_name: str, provider: EmbeddingProvider):
+    """Make ``provider`` the process-wide provider for ``model_name``, e.g. an offline stand-in."""
+    with _providers_lock:
+        _providers[model_name] = provider
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from crewai import LLM
+from litellm.integrations.custom_logger import CustomLogger
+from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.tracing import trace_span
+
+# Set up logging
+logger = get_logger(__name__)
+
+LLM_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "llm_cache.db"))
+
+
+class LLMResponseCache:
+    """
+    Persistent LLM completion cache shared across runs and processes.
+
+    Entries live in SQLite (WAL mode, so several processes can read and
+    write concurrently) keyed by a hash of model, temperature, messages and
+    tools. Entries older than ``ttl`` seconds are ignored and removed, and
+    least recently used entries are evicted once the cache holds more than
+    ``max_entries`` rows or ``max_bytes`` of responses.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = 10_000,
+                 max_bytes: int = 256 * 1024 * 1024, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._init_tables()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite handles locking between processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_tables(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    size INTEGER,
+                    created_at REAL,
+                    last_access REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+
+    @staticmethod
+    def make_key(model: str, temperature: Optional[float], messages: Any, tools: Any = None) -> str:
+        payload = json.dumps(
+            {"model": model, "temperature": temperature, "messages": messages, "tools": tools},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+            with self.conn:
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            row = None
+
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        with self.conn:
+            self.conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, response: str, model: Optional[str] = None):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        if self.ttl is not None:
+            self.conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk from least recently used and drop rows until both limits hold
+        to_delete = []
+        for key, size in self.conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            count -= 1
+            total -= size
+        self.conn.executemany("DELETE FROM llm_cache WHERE key = ?", to_delete)
+        logger.debug("Evicted %d LLM cache entries", len(to_delete))
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class RateLimiter:
+    """
+    Process-wide limit on LLM requests per minute, shared by every crew and
+    thread. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, requests_per_minute: float = 0):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.set_rate(requests_per_minute)
+
+    def set_rate(self, requests_per_minute: float):
+        with self._lock:
+            self.requests_per_minute = requests_per_minute
+            self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+
+    def acquire(self):
+        """Block until the caller may send the next request."""
+        with self._lock:
+            if not self._interval:
+                return
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _UsageRecorder(CustomLogger):
+    """
+    Collects the token usage of one LLM call. crewAI hands usage to the
+    callbacks of a call directly, with zero timestamps; it also registers
+    them with litellm globally, so litellm's own invocations (which may
+    belong to another thread's call) are ignored.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        if start_time or end_time or not isinstance(response_obj, dict):
+            return
+        usage = response_obj.get("usage")
+        if usage:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+
+class CachedLLM(LLM):
+    """
+    crewAI ``LLM`` that replays completions from an ``LLMResponseCache`` and
+    passes cache misses through an optional ``RateLimiter``. Every call is
+    recorded as an ``llm`` trace span with its token usage and cache hit.
+    """
+
+    def __init__(self, *args, cache: Optional[LLMResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.response_cache = cache
+        self.rate_limiter = rate_limiter
+
+    def _call_model(self, span, messages, tools=None, callbacks=None, available_functions=None,
+                    from_task=None, from_agent=None):
+        if self.rate_limiter is not None:
+            waiting_since = time.monotonic()
+            self.rate_limiter.acquire()
+            span.add(rate_limit_wait=time.monotonic() - waiting_since)
+        usage = _UsageRecorder()
+        response = super().call(messages, tools=tools, callbacks=list(callbacks or []) + [usage],
+                                available_functions=available_functions, from_task=from_task, from_agent=from_agent)
+        span.add(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        return response
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        # Same signature as crewAI's LLM.call: the agent loop passes from_task and from_agent by keyword
+        with trace_span(self.model, "llm") as span:
+            if self.response_cache is None:
+                return self._call_model(span, messages, tools, callbacks, available_functions, from_task, from_agent)
+
+            key = self.response_cache.make_key(self.model, self.temperature, messages, tools)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                logger.debug("LLM cache hit for %s", self.model)
+                span.add(cache_hits=1)
+                return cached
+
+            response = self._call_model(span, messages, tools, callbacks, available_functions, from_task, from_agent)
+            # Only plain completions are replayable; tool-call results depend on live state
+            if isinstance(response, str):
+                self.response_cache.set(key, response, model=self.model)
+            return response
+
+
+_default_cache: Optional[LLMResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_llm_cache() -> LLMResponseCache:
+    """
+    Process-wide cache configured from LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_MB and LLM_CACHE_TTL.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.getenv("LLM_CACHE_TTL")
+            _default_cache = LLMResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", LLM_CACHE_PATH),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                ttl=float(ttl) if ttl else None,
+            )
+        return _default_cache
+
+
+_default_rate_limiter = RateLimiter(float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")))
+
+
+def default_rate_limiter() -> RateLimiter:
+    """Process-wide limiter configured from LLM_REQUESTS_PER_MINUTE."""
+    return _default_rate_limiter
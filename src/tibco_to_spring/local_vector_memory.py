@@ -3,25 +3,170 @@ import faiss
 import json
 import numpy as np
 import os
-from typing import List, Optional, Union
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
 from crewai.memory.storage.interface import Storage
+from tibco_to_spring.embeddings import get_embedding_provider
 from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.tracing import trace_span
 
 # Set up logging
 logger = get_logger(__name__)
 
 CREW_MEMORY_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "crew_memory.db"))
 
+INDEX_TYPES = ("auto", "flat", "ivf", "hnsw")
+METRICS = ("l2", "cosine")
+
+# Item counts at which index_type="auto" moves to the next index tier
+IVF_THRESHOLD = 20_000
+HNSW_THRESHOLD = 200_000
+
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+
+# Items beyond max_items or past their TTL are evicted in batches of this share of
+# the memory, so one save does not rebuild the index every time an item ages out
+RETENTION_SLACK = 0.1
+# Neighbours compared per item when compacting near-duplicates
+DEDUP_NEIGHBOURS = 8
+# Filtered searches with at most this many candidates scan just the candidates;
+# larger subsets are searched in the main index through an ID selector
+FILTERED_SCAN_MAX = 20_000
+
+
+def filter_key(key: str, value) -> Tuple[str, str]:
+    """Hashable form of one ``metadata`` filter entry (a top-level key and its exact value)."""
+    return key, json.dumps(value, sort_keys=True)
+
+
+def build_faiss_index(kind: str, vectors: np.ndarray, metric: str = "l2") -> faiss.Index:
+    """
+    Build and fill a FAISS index of the given kind ("flat", "ivf" or "hnsw").
+    With metric="cosine" the vectors must already be L2-normalised.
+    """
+    dimension = vectors.shape[1]
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if metric == "cosine" else faiss.METRIC_L2
+
+    if kind == "ivf":
+        nlist = max(1, min(int(4 * np.sqrt(len(vectors))), len(vectors) // 39))
+        quantizer = faiss.IndexFlatIP(dimension) if metric == "cosine" else faiss.IndexFlatL2(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss_metric)
+        sample = vectors
+        if len(vectors) > 256 * nlist:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(len(vectors), 256 * nlist, replace=False)]
+        index.train(sample)
+        index.nprobe = max(1, nlist // 16)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss_metric)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    else:
+        index = faiss.IndexFlatIP(dimension) if metric == "cosine" else faiss.IndexFlatL2(dimension)
+
+    if len(vectors):
+        index.add(vectors)
+    return index
+
+
+def memory_retention_settings() -> dict:
+    """Retention keyword arguments from MEMORY_MAX_ITEMS, MEMORY_TTL and MEMORY_DEDUP_THRESHOLD."""
+    max_items = os.getenv("MEMORY_MAX_ITEMS")
+    ttl = os.getenv("MEMORY_TTL")
+    dedup_threshold = os.getenv("MEMORY_DEDUP_THRESHOLD")
+    return {
+        "max_items": int(max_items) if max_items else None,
+        "ttl": float(ttl) if ttl else None,
+        "dedup_threshold": float(dedup_threshold) if dedup_threshold else None,
+    }
+
+
+@dataclass
+class CompactionReport:
+    items_before: int
+    items_after: int
+    expired: int
+    over_limit: int
+    duplicates: int
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return max(0, self.bytes_before - self.bytes_after)
+
+
 class LocalVectorMemory(Storage):
-    def __init__(self, db_path=CREW_MEMORY_PATH, embedding_model="all-MiniLM-L6-v2"):
-        self.conn = sqlite3.connect(db_path)
+    """
+    SQLite-backed crew memory with a FAISS index over the stored embeddings.
+
+    With ``buffer_size`` > 1 saves are written behind: they are queued and
+    written in one transaction with a single batched encode once the buffer
+    holds ``buffer_size`` items, once ``flush_interval`` seconds have passed
+    since the oldest queued item, or before any ``search``. Call ``flush()``
+    or use the instance as a context manager to force pending items to disk.
+
+    ``index_type`` selects the FAISS index: "flat" (exact scan), "ivf", "hnsw",
+    or "auto", which starts flat and moves to IVF and then HNSW as the item
+    count crosses IVF_THRESHOLD and HNSW_THRESHOLD. Approximate indexes are
+    (re)built on a background thread and swapped in when ready; searches keep
+    using the current index meanwhile. With ``metric="cosine"`` vectors are
+    normalised and ``score_threshold`` is a minimum cosine similarity;
+    with the default "l2" it is a maximum squared L2 distance.
+
+    Retention: with ``max_items`` only the newest items are kept, and with
+    ``ttl`` items older than ``ttl`` seconds expire (expired items are never
+    returned by ``search``). Both are enforced on load and trimmed in batches
+    of RETENTION_SLACK while running. With ``dedup_threshold`` a save whose
+    cosine similarity to an existing item reaches the threshold is dropped.
+    ``compact()`` applies all three to the whole database and vacuums it.
+
+    ``search`` can be restricted to the items of one ``agent`` and/or items
+    whose metadata has the given top-level values. Candidates come from
+    in-memory postings per agent and per metadata value, and the top
+    ``limit`` is taken among them only: small subsets are scanned directly
+    (cost proportional to the subset) and large ones are searched in the
+    main index through a FAISS ID selector.
+    """
+
+    def __init__(self, db_path=CREW_MEMORY_PATH, embedding_model="all-MiniLM-L6-v2",
+                 buffer_size: int = 1, flush_interval: float = 5.0,
+                 index_type: str = "auto", metric: str = "l2",
+                 max_items: Optional[int] = None, ttl: Optional[float] = None,
+                 dedup_threshold: Optional[float] = None):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {INDEX_TYPES}, got {index_type!r}")
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, got {metric!r}")
+        # The flush timer writes from its own thread; all access goes through self._lock
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.buffer_size = max(1, buffer_size)
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._pending_since = None
+        self._flush_timer = None
         self._init_tables()
-        self.model = SentenceTransformer(embedding_model)
-        self.dimension = self.model.get_sentence_embedding_dimension()
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.embeddings = []
-        self.metadata = []
+        self.embedding_model = embedding_model
+        self.model = get_embedding_provider(embedding_model)
+        # Take the dimension from the stamp when possible so a warm start never loads the model
+        stamped_dimension = self._get_meta("dimension")
+        if stamped_dimension and self._get_meta("embedding_model") == embedding_model:
+            self.dimension = int(stamped_dimension)
+        else:
+            self.dimension = self.model.dimension
+        self.index_type = index_type
+        self.metric = metric
+        self.max_items = max_items
+        self.ttl = ttl
+        self.dedup_threshold = dedup_threshold
+        self._index_generation = 0
+        self._retrain_thread = None
+        self._clear_in_memory()
         self._load_persistent_memory()  # Load persistent memory
 
     def _init_tables(self):
@@ -31,11 +176,96 @@ class LocalVectorMemory(Storage):
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 agent TEXT,
                 metadata TEXT,
-                content TEXT
+                content TEXT,
+                embedding BLOB
             )
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS memory_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        # Databases created before embeddings were persisted lack the column
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(memory)")]
+        if "embedding" not in columns:
+            cursor.execute("ALTER TABLE memory ADD COLUMN embedding BLOB")
+        if "created_at" not in columns:
+            # Existing rows start their TTL now rather than expiring all at once
+            cursor.execute("ALTER TABLE memory ADD COLUMN created_at REAL")
+            cursor.execute("UPDATE memory SET created_at = ?", (time.time(),))
         self.conn.commit()
 
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM memory_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO memory_meta (key, value) VALUES (?, ?)",
+            (key, value)
+        )
+
+    def _embedding_stamp_matches(self) -> bool:
+        return (self._get_meta("embedding_model") == self.embedding_model
+                and self._get_meta("dimension") == str(self.dimension))
+
+    def _write_embedding_stamp(self):
+        self._set_meta("embedding_model", self.embedding_model)
+        self._set_meta("dimension", str(self.dimension))
+
+    def _prepare_vectors(self, vectors) -> np.ndarray:
+        vectors = np.array(vectors, dtype="float32").reshape(-1, self.dimension)
+        if self.metric == "cosine":
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _target_index_kind(self, count: int) -> str:
+        if self.index_type != "auto":
+            return self.index_type
+        if count >= HNSW_THRESHOLD:
+            return "hnsw"
+        if count >= IVF_THRESHOLD:
+            return "ivf"
+        return "flat"
+
+    def _maybe_retrain(self):
+        """Start a background rebuild when the index tier changes or an IVF index has doubled in size."""
+        count = len(self.embeddings)
+        target = self._target_index_kind(count)
+        outgrown = target == "ivf" and self._index_kind == "ivf" and count >= 2 * self._index_size_at_build
+        if target == self._index_kind and not outgrown:
+            return
+        if self._retrain_thread is not None and self._retrain_thread.is_alive():
+            return
+
+        snapshot = self._prepare_vectors(self.embeddings) if count else None
+        if snapshot is None:
+            return
+        generation = self._index_generation
+        self._retrain_thread = threading.Thread(
+            target=self._retrain, args=(target, snapshot, generation), daemon=True
+        )
+        self._retrain_thread.start()
+
+    def _retrain(self, kind: str, snapshot: np.ndarray, generation: int):
+        try:
+            started = time.monotonic()
+            index = build_faiss_index(kind, snapshot, self.metric)
+            with self._lock:
+                if generation != self._index_generation:
+                    return  # reset() happened while building
+                # Catch up with items added while the new index was being built
+                if len(self.embeddings) > len(snapshot):
+                    index.add(self._prepare_vectors(self.embeddings[len(snapshot):]))
+                self.index = index
+                self._index_kind = kind
+                self._index_size_at_build = len(self.embeddings)
+            logger.info("Rebuilt memory index as %s over %d items in %.2fs",
+                        kind, len(snapshot), time.monotonic() - started)
+        except Exception as e:
+            logger.error("Error rebuilding memory index as %s: %s", kind, e)
+
     def save(self, value: str, metadata: Optional[Union[str, dict]] = None, agent: Optional[str] = None):
         if isinstance(metadata, str):
             metadata_dict = {"value": metadata}
@@ -44,101 +274,423 @@ class LocalVectorMemory(Storage):
         else:
             metadata_dict = {}
 
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO memory (agent, metadata, content) VALUES (?, ?, ?)",
-            (agent, json.dumps(metadata_dict), value)
-        )
-        self.conn.commit()
+        with self._lock:
+            self._pending.append((agent, metadata_dict, value))
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+
+            if (len(self._pending) >= self.buffer_size
+                    or time.monotonic() - self._pending_since >= self.flush_interval):
+                self.flush()
+            else:
+                self._schedule_flush()
+
+    def flush(self):
+        """Write all queued saves in one transaction with one batched encode."""
+        with self._lock:
+            self._cancel_flush_timer()
+            if not self._pending:
+                return
+            pending = list(self._pending)
+
+            # The queue is only cleared once the batch is committed, so a failed
+            # encode or insert leaves every buffered save for the next flush
+            try:
+                embeddings = np.asarray(
+                    self.model.encode([value for _, _, value in pending]), dtype="float32"
+                ).reshape(len(pending), self.dimension)
+
+                if self.dedup_threshold is not None:
+                    keep = self._non_duplicates(embeddings)
+                    if len(keep) < len(pending):
+                        logger.debug("Suppressed %d near-duplicate memory items", len(pending) - len(keep))
+                        pending = [pending[i] for i in keep]
+                        embeddings = embeddings[keep]
+
+                now = time.time()
+                with self.conn:
+                    row_ids = [
+                        self.conn.execute(
+                            "INSERT INTO memory (agent, metadata, content, embedding, created_at) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (agent, json.dumps(metadata_dict), value, embedding.tobytes(), now)
+                        ).lastrowid
+                        for (agent, metadata_dict, value), embedding in zip(pending, embeddings)
+                    ]
+            except Exception as e:
+                logger.error("Error writing %d buffered memory items; keeping them queued: %s",
+                             len(self._pending), e)
+                raise
+            self._pending = []
+            self._pending_since = None
+            if not pending:
+                return
 
-        embedding = self.model.encode(value)
-        self.index.add(np.array([embedding]).astype("float32"))
-        self.embeddings.append(embedding)
-        self.metadata.append({
-            "agent": agent,
-            "metadata": metadata_dict,
-            "content": value
-        })
-
-    def search(self, query: str, limit: int = 10, score_threshold: float = 0.5) -> List[dict]:
-        if not self.metadata:
-            return []
-
-        query_embedding = self.model.encode(query)
-        D, I = self.index.search(np.array([query_embedding]).astype("float32"), limit)
-
-        results = []
-        for dist, idx in zip(D[0], I[0]):
-            if idx < len(self.metadata) and dist <= score_threshold:
-                item = self.metadata[idx]
-                if isinstance(item, str):
-                    try:
-                        item = json.loads(item)
-                    except Exception as e:
-                        print(f"Error parsing metadata at index {idx}: {e}")
-                        continue
-                if isinstance(item, dict):
-                    results.append(item)
-        return results
+            self._add_items(pending, embeddings, row_ids, now)
+            logger.debug("Flushed %d memory items", len(pending))
+            self._maybe_retrain()
+            self._enforce_retention()
+
+    def _add_items(self, pending: list, embeddings: np.ndarray, row_ids: List[int], created_at: float):
+        """Add freshly written rows to the index and the in-memory lists."""
+        self.index.add(self._prepare_vectors(embeddings))
+        start = len(self.metadata)
+        for (agent, metadata_dict, value), embedding, row_id in zip(pending, embeddings, row_ids):
+            self.embeddings.append(embedding)
+            self.metadata.append({
+                "agent": agent,
+                "metadata": metadata_dict,
+                "content": value
+            })
+            self.row_ids.append(row_id)
+            self.created_at.append(created_at)
+        self._add_postings(start)
+
+    def _add_postings(self, start: int):
+        """Record the agent and metadata values of the items from position ``start`` on."""
+        for position in range(start, len(self.metadata)):
+            item = self.metadata[position]
+            self._agent_postings.setdefault(item["agent"], []).append(position)
+            if isinstance(item["metadata"], dict):
+                for key, value in item["metadata"].items():
+                    self._metadata_postings.setdefault(filter_key(key, value), []).append(position)
+
+    def _filtered_positions(self, agent: Optional[str], metadata: Optional[dict]) -> np.ndarray:
+        """Positions of the unexpired items matching ``agent`` and every ``metadata`` value."""
+        postings = []
+        if agent is not None:
+            postings.append(self._agent_postings.get(agent, []))
+        for key, value in (metadata or {}).items():
+            postings.append(self._metadata_postings.get(filter_key(key, value), []))
+        # Postings are in insertion order, so intersecting from the shortest keeps them sorted
+        postings.sort(key=len)
+        positions = np.asarray(postings[0], dtype="int64")
+        for other in postings[1:]:
+            if not len(positions):
+                break
+            positions = positions[np.isin(positions, other, assume_unique=True)]
+        return positions[np.searchsorted(positions, self._expired_count()):]
+
+    def _search_positions(self, query_embedding: np.ndarray, positions: np.ndarray,
+                          limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top ``limit`` (scores, positions) among ``positions`` only."""
+        if len(positions) <= FILTERED_SCAN_MAX:
+            vectors = self._prepare_vectors(np.vstack([self.embeddings[p] for p in positions]))
+            D, I = build_faiss_index("flat", vectors, self.metric).search(query_embedding, min(limit, len(positions)))
+            return D[0], positions[I[0]]
+
+        # Index ids are list positions, so the selector restricts the search to the subset
+        selector = faiss.IDSelectorBatch(positions)
+        if self._index_kind == "ivf":
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+        elif self._index_kind == "hnsw":
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=self.index.hnsw.efSearch)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        D, I = self.index.search(query_embedding, limit, params=params)
+        return D[0], I[0]
+
+    def _non_duplicates(self, embeddings: np.ndarray) -> List[int]:
+        """Positions in ``embeddings`` not within ``dedup_threshold`` cosine similarity of a stored or earlier item."""
+        unit = embeddings.copy()
+        faiss.normalize_L2(unit)
+        nearest = None
+        if self.embeddings:
+            _, nearest = self.index.search(self._prepare_vectors(embeddings), 1)
+
+        keep = []
+        for i, vector in enumerate(unit):
+            similarity = float((unit[keep] @ vector).max()) if keep else -1.0
+            if nearest is not None and 0 <= nearest[i][0] < len(self.embeddings):
+                stored = self.embeddings[nearest[i][0]]
+                norm = np.linalg.norm(stored)
+                if norm:
+                    similarity = max(similarity, float(stored @ vector) / norm)
+            if similarity < self.dedup_threshold:
+                keep.append(i)
+        return keep
+
+    def _expired_count(self) -> int:
+        """Number of leading (oldest) in-memory items past their TTL."""
+        if self.ttl is None:
+            return 0
+        return bisect_left(self.created_at, time.time() - self.ttl)
+
+    def _enforce_retention(self):
+        expired = self._expired_count()
+        over_limit = len(self.row_ids) - expired - self.max_items if self.max_items is not None else 0
+        evict = expired + max(0, over_limit)
+        if evict == 0 or evict < max(1, int(len(self.row_ids) * RETENTION_SLACK)):
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM memory WHERE id <= ?", (self.row_ids[evict - 1],))
+        logger.info("Evicted %d memory items (%d expired, %d over the %s item limit)",
+                    evict, expired, max(0, over_limit), self.max_items)
+        self._reload()
+
+    def _schedule_flush(self):
+        if self._flush_timer is None:
+            # Non-daemon so queued items still reach disk when the process exits
+            self._flush_timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._flush_timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            with self._lock:
+                self._flush_timer = None
+                self.flush()
+        except Exception as e:
+            logger.error("Error flushing memory buffer: %s", e)
+
+    def _cancel_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def search(self, query: str, limit: int = 10, score_threshold: float = 0.5,
+               agent: Optional[str] = None, metadata: Optional[dict] = None) -> List[dict]:
+        """
+        Items nearest to ``query``, optionally only those saved by ``agent``
+        and whose metadata has every key/value pair of ``metadata``.
+        """
+        with self._lock, trace_span("memory.search", "memory", limit=limit) as span:
+            self.flush()
+            if not self.metadata:
+                return []
+
+            query_embedding = self._prepare_vectors(self.model.encode(query))
+            expired = self._expired_count()
+            if agent is None and not metadata:
+                D, I = self.index.search(query_embedding, limit)
+                scores, positions = D[0], I[0]
+            else:
+                candidates = self._filtered_positions(agent, metadata)
+                span.attributes["candidates"] = len(candidates)
+                if not len(candidates):
+                    return []
+                scores, positions = self._search_positions(query_embedding, candidates, limit)
+
+            results = []
+            for score, idx in zip(scores, positions):
+                if self.metric == "cosine":
+                    matches = score >= score_threshold
+                else:
+                    matches = score <= score_threshold
+                if expired <= idx < len(self.metadata) and matches:
+                    item = self.metadata[idx]
+                    if isinstance(item, str):
+                        try:
+                            item = json.loads(item)
+                        except Exception as e:
+                            print(f"Error parsing metadata at index {idx}: {e}")
+                            continue
+                    if isinstance(item, dict):
+                        results.append(item)
+            span.attributes["results"] = len(results)
+            return results
 
 
     def reset(self):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM memory")
-        self.conn.commit()
+        with self._lock:
+            # Queued items would be deleted right after being written, so drop them instead
+            self._cancel_flush_timer()
+            self._pending.clear()
+            self._pending_since = None
+
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM memory")
+            self.conn.commit()
+
+            self._clear_in_memory()
 
-        self.index.reset()
-        self.embeddings.clear()
-        self.metadata.clear()
+    def _clear_in_memory(self):
+        # Bump the generation so a background retrain of the old index is discarded
+        self._index_generation += 1
+        self.index = build_faiss_index("flat", np.empty((0, self.dimension), dtype="float32"), self.metric)
+        self._index_kind = "flat"
+        self._index_size_at_build = 0
+        self.embeddings = []
+        self.metadata = []
+        self.row_ids = []
+        self.created_at = []
+        # Agent -> positions and filter_key() -> positions, for filtered searches
+        self._agent_postings: Dict[Optional[str], List[int]] = {}
+        self._metadata_postings: Dict[Tuple[str, str], List[int]] = {}
+
+    def _reload(self):
+        self._clear_in_memory()
+        self._load_persistent_memory()
+
+    def _apply_retention(self) -> Tuple[int, int]:
+        """Delete expired rows and rows beyond ``max_items`` (oldest first). Returns (expired, over_limit)."""
+        expired = over_limit = 0
+        if self.ttl is not None:
+            expired = self.conn.execute(
+                "DELETE FROM memory WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+        if self.max_items is not None:
+            over_limit = self.conn.execute(
+                "DELETE FROM memory WHERE id NOT IN (SELECT id FROM memory ORDER BY id DESC LIMIT ?)",
+                (self.max_items,)
+            ).rowcount
+        return expired, over_limit
+
+    def _delete_duplicates(self) -> int:
+        """Delete near-duplicates across the whole database, keeping the newest of each group."""
+        rows = self.conn.execute(
+            "SELECT id, embedding FROM memory WHERE embedding IS NOT NULL ORDER BY id DESC"
+        ).fetchall()
+        rows = [(row_id, blob) for row_id, blob in rows if len(blob) == 4 * self.dimension]
+        if len(rows) < 2:
+            return 0
+        vectors = np.vstack([np.frombuffer(blob, dtype="float32") for _, blob in rows])
+        faiss.normalize_L2(vectors)
+        index = faiss.IndexFlatIP(self.dimension)
+        index.add(vectors)
+        similarities, neighbours = index.search(vectors, min(DEDUP_NEIGHBOURS, len(rows)))
+
+        # Rows are newest first, so a row is dropped when a newer kept row is a near-duplicate
+        kept = np.zeros(len(rows), dtype=bool)
+        duplicates = []
+        for i in range(len(rows)):
+            if any(0 <= j < i and kept[j] and similarity >= self.dedup_threshold
+                   for similarity, j in zip(similarities[i], neighbours[i])):
+                duplicates.append((rows[i][0],))
+            else:
+                kept[i] = True
+        self.conn.executemany("DELETE FROM memory WHERE id = ?", duplicates)
+        return len(duplicates)
+
+    def _db_size(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.db_path, self.db_path + "-wal") if os.path.exists(path))
+
+    def compact(self) -> CompactionReport:
+        """
+        Apply retention and near-duplicate removal to the whole database,
+        VACUUM it and rebuild the index. Meant to run offline, between crew runs.
+        """
+        with self._lock:
+            self.flush()
+            bytes_before = self._db_size()
+            items_before = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+            with self.conn:
+                expired, over_limit = self._apply_retention()
+                duplicates = self._delete_duplicates() if self.dedup_threshold is not None else 0
+            self.conn.execute("VACUUM")
+            self._reload()
+            return CompactionReport(
+                items_before=items_before,
+                items_after=self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0],
+                expired=expired,
+                over_limit=over_limit,
+                duplicates=duplicates,
+                bytes_before=bytes_before,
+                bytes_after=self._db_size(),
+            )
 
     def _load_persistent_memory(self):
         """
         Load all persisted memory items from SQLite database into memory.
         This method:
-        1. Retrieves all memory records from the SQLite database
-        2. Rebuilds the FAISS index with all persisted embeddings
-        3. Populates the in-memory metadata list with all persisted records
-        This ensures that all previously stored memory is available for
-        both vector search and metadata queries when the application starts.
+        1. Retrieves all memory records, including their stored embeddings
+        2. Re-encodes only rows without a usable embedding (legacy rows, or all
+           rows when the embedding model or dimension stamp has changed)
+        3. Rebuilds the FAISS index and the in-memory metadata list
+        A warm start with an unchanged embedding model therefore loads the
+        vectors straight from the database without running the encoder.
         """
+        stamp_matches = self._embedding_stamp_matches()
+        if not stamp_matches:
+            logger.info("Embedding model stamp changed to %s (dim=%d); re-embedding stored memory",
+                        self.embedding_model, self.dimension)
+
         cursor = self.conn.cursor()
-        cursor.execute("SELECT agent, metadata, content FROM memory")
+        expired, over_limit = self._apply_retention()
+        if expired or over_limit:
+            logger.info("Dropped %d expired and %d over-limit memory items", expired, over_limit)
+        cursor.execute("SELECT id, agent, metadata, content, embedding, created_at FROM memory ORDER BY id")
         rows = cursor.fetchall()
 
-        # Prepare batches for more efficient processing
         embeddings_batch = []
         metadata_batch = []
+        row_ids_batch = []
+        created_at_batch = []
+        stale = []  # (position in batch, row id, content) of rows needing an encode
 
-        for agent, metadata_str, content in rows:
+        for row_id, agent, metadata_str, content, blob, created_at in rows:
             try:
                 metadata = json.loads(metadata_str) if metadata_str else {}
-                embedding = self.model.encode(content)
-
-                # Store for batch processing
-                embeddings_batch.append(embedding)
-                metadata_batch.append({
-                    "agent": agent,
-                    "metadata": metadata,
-                    "content": content
-                })
-
-                # Log the loaded item
-                logger.debug("Loading memory item: agent=%s, metadata_keys=%s, content_length=%d",
-                            agent, list(metadata.keys()) if metadata else [], len(content))
-
             except json.JSONDecodeError as e:
                 logger.error("JSON decode error for metadata '%s': %s", metadata_str, e)
                 continue
+
+            embedding = None
+            if stamp_matches and blob is not None:
+                embedding = np.frombuffer(blob, dtype="float32")
+                if embedding.shape[0] != self.dimension:
+                    embedding = None
+            if embedding is None:
+                stale.append((len(embeddings_batch), row_id, content or ""))
+
+            embeddings_batch.append(embedding)
+            metadata_batch.append({
+                "agent": agent,
+                "metadata": metadata,
+                "content": content
+            })
+            row_ids_batch.append(row_id)
+            created_at_batch.append(created_at or 0.0)
+
+            logger.debug("Loading memory item: agent=%s, metadata_keys=%s, content_length=%d",
+                         agent, list(metadata.keys()) if metadata else [], len(content or ""))
+
+        reembed_failed = False
+        if stale:
+            try:
+                encoded = np.asarray(
+                    self.model.encode([content for _, _, content in stale]), dtype="float32"
+                )
             except Exception as e:
-                logger.error("Error loading memory item: %s", e)
-                continue
+                logger.error("Error re-embedding memory items: %s", e)
+                encoded = None
+                reembed_failed = True
+
+            if encoded is not None:
+                for (position, row_id, _), embedding in zip(stale, encoded):
+                    embeddings_batch[position] = embedding
+                cursor.executemany(
+                    "UPDATE memory SET embedding = ? WHERE id = ?",
+                    [(embedding.tobytes(), row_id) for (_, row_id, _), embedding in zip(stale, encoded)]
+                )
+                logger.info("Re-embedded %d memory items", len(stale))
+            else:
+                stale_positions = {position for position, _, _ in stale}
+                embeddings_batch = [e for i, e in enumerate(embeddings_batch) if i not in stale_positions]
+                metadata_batch = [m for i, m in enumerate(metadata_batch) if i not in stale_positions]
+                row_ids_batch = [r for i, r in enumerate(row_ids_batch) if i not in stale_positions]
+                created_at_batch = [c for i, c in enumerate(created_at_batch) if i not in stale_positions]
+
+        if not stamp_matches and not reembed_failed:
+            self._write_embedding_stamp()
+        self.conn.commit()
 
         # Add all embeddings to FAISS index in one batch
         if embeddings_batch:
-            self.index.add(np.array(embeddings_batch).astype("float32"))
+            self.index.add(self._prepare_vectors(np.vstack(embeddings_batch)))
+            start = len(self.metadata)
             self.embeddings.extend(embeddings_batch)
             self.metadata.extend(metadata_batch)
+            self.row_ids.extend(row_ids_batch)
+            self.created_at.extend(created_at_batch)
+            self._add_postings(start)
 
             logger.info("Successfully loaded %d memory items", len(embeddings_batch))
+            self._maybe_retrain()
         else:
             logger.warning("No memory items were loaded from the database")
@@ -1,13 +1,23 @@
 import logging
 import os
+import threading
+
+_configured = False
+_configure_lock = threading.Lock()
 
 def get_logger(name):
-    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
-    logging.basicConfig(
-        level=getattr(logging, log_level, logging.INFO),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler()
-        ]
-    )
+    # Configure the root logger once per process instead of on every call
+    global _configured
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+                logging.basicConfig(
+                    level=getattr(logging, log_level, logging.INFO),
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                    handlers=[
+                        logging.StreamHandler()
+                    ]
+                )
+                _configured = True
     return logging.getLogger(name)
@@ -3,13 +3,14 @@ import os
 import sys
 import warnings
 from pathlib import Path
-from tibco_to_spring.crew import TibcoToSpring
 from tibco_to_spring.logging_config import get_logger
-from tibco_to_spring.compact.crew import create_crew
+from tibco_to_spring.tracing import install_tracing, trace_span, write_trace_report
+from tibco_to_spring.training_store import install_training_store
 
 # Constants
 OUTPUT_DIR = Path("outputs")
 BASH_FILE = OUTPUT_DIR / "bash_script.sh"
+STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "0") == "1"
 
 # Set up logging
 logger = get_logger(__name__)
@@ -38,35 +39,52 @@ def train() -> None:
     """
     Train the crew for a given number of iterations.
     """
+    # crewAI, LiteLLM and the crew are imported here rather than at module load to keep startup fast
+    from tibco_to_spring.crew import TibcoToSpring
+    from tibco_to_spring.llm_cache import default_llm_cache
+
     inputs = {
         "topic": "Tibco To Spring Boot"
     }
+    install_tracing()
+    # Training feedback and trained agent data are appended to the training store instead of pickle files
+    install_training_store()
     try:
-        TibcoToSpring().crew(training_mode=True).train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        with trace_span("train", "run"):
+            TibcoToSpring().crew(training_mode=True).train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
         logger.info("Training completed successfully")
+        logger.info(f"LLM cache: {default_llm_cache().stats()}")
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
+    finally:
+        write_trace_report()
 
 # COMPACT VERSION WITH CODE INSPECTION
 def run() -> None:
-    try:
-        # Get crew output
-        crew = create_crew(
-            base_path="<>",
-            tibco_path="<>"
-        )
-        crew_output = crew.kickoff()
+    from tibco_to_spring.llm_cache import default_llm_cache
+    from tibco_to_spring.partition import run_partitioned
 
-        # Ensure output directories exist
-        OUTPUT_DIR.mkdir(exist_ok=True)
-
-        # Write bash script to the springBootProject directory
-        BASH_FILE.write_text(crew_output.raw, encoding="utf-8")
-        if os.name != "nt":  # Not Windows
-            BASH_FILE.chmod(BASH_FILE.stat().st_mode | 0o755)
+    install_tracing()
+    # Agents read their trained suggestions from the training store
+    install_training_store()
+    try:
+        # Get crew output; large projects are split along their process-call graph into parallel sub-crews.
+        # The bash script is written atomically, and streamed to a .partial file while running with STREAM_OUTPUT=1
+        with trace_span("run", "run"):
+            run_partitioned(
+                tibco_path=os.getenv("TIBCO_DIRECTORY", "./tibco-project"),
+                base_path=os.getenv("COMPANY_CODE_DIRECTORY", "./company-repos"),
+                output_path=BASH_FILE,
+                stream=STREAM_OUTPUT,
+                # Reuse checkpointed task outputs whose inputs have not changed
+                resume="--resume" in sys.argv[1:]
+            )
 
         logger.info(f"Files created successfully in {OUTPUT_DIR.absolute()}")
+        logger.info(f"LLM cache: {default_llm_cache().stats()}")
 
     except Exception as e:
-        raise IOError(f"Error processing output: {e}")
\ No newline at end of file
+        raise IOError(f"Error processing output: {e}")
+    finally:
+        write_trace_report()
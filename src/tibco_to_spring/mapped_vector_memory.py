@@ -0,0 +1,475 @@
+import json
+import os
+import struct
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from tibco_to_spring.local_vector_memory import CREW_MEMORY_PATH, RETENTION_SLACK, LocalVectorMemory
+from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.tracing import trace_span
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in several processes are not serialised
+    fcntl = None
+
+# Set up logging
+logger = get_logger(__name__)
+
+MEMORY_STORAGES = ("memory", "mmap")
+VECTOR_DTYPES = ("float16", "int8")
+
+VECTOR_FILE_MAGIC = b"TSVF"
+VECTOR_FILE_VERSION = 1
+# magic, version, dtype code, reserved, dimension, padded to 16 bytes
+VECTOR_FILE_HEADER = struct.Struct("<4sBBHI4x")
+_DTYPE_CODES = {"float16": 1, "int8": 2}
+
+# Rows decoded to float32 at a time while scanning, which bounds the RAM a search needs
+SCAN_BLOCK_ROWS = 16_384
+# Rows re-embedded per encode/commit when the embedding model changes
+REEMBED_BATCH = 256
+
+
+def vector_file_path(db_path: str) -> str:
+    return db_path + ".vectors"
+
+
+class VectorFile:
+    """
+    Append-only file of quantized vectors, memory-mapped read-only.
+
+    Each record holds the SQLite row id and the vector, either as float16 or
+    as int8 codes with a per-vector float32 scale (max |x| / 127). Records
+    are never updated in place: deletions rewrite the file to a temporary
+    path and rename it over the old one, so readers in other processes keep
+    a consistent mapping and pick up the new file on their next ``refresh()``.
+    Appends and rewrites hold an exclusive lock on ``<path>.lock``.
+    """
+
+    def __init__(self, path: str, dimension: int, dtype: str = "float16"):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"dtype must be one of {VECTOR_DTYPES}, got {dtype!r}")
+        self.path = path
+        self.dimension = dimension
+        self.dtype = dtype
+        if dtype == "int8":
+            self.record = np.dtype([("id", "<i8"), ("scale", "<f4"), ("codes", "i1", (dimension,))])
+        else:
+            self.record = np.dtype([("id", "<i8"), ("codes", "<f2", (dimension,))])
+        self._map = None
+        self._stat = None
+        with self._locked():
+            if not self._header_matches():
+                self._write(iter(()))
+        self.refresh()
+
+    def _header(self) -> bytes:
+        return VECTOR_FILE_HEADER.pack(VECTOR_FILE_MAGIC, VECTOR_FILE_VERSION,
+                                       _DTYPE_CODES[self.dtype], 0, self.dimension)
+
+    def _header_matches(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                return f.read(VECTOR_FILE_HEADER.size) == self._header()
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def refresh(self):
+        """Remap the file if it grew or was replaced since the last call."""
+        stat = os.stat(self.path)
+        key = (stat.st_ino, stat.st_size)
+        if key == self._stat:
+            return
+        self._stat = key
+        # A partially written record from a concurrent append is left out until it is complete
+        count = (stat.st_size - VECTOR_FILE_HEADER.size) // self.record.itemsize
+        if count > 0:
+            self._map = np.memmap(self.path, dtype=self.record, mode="r",
+                                  offset=VECTOR_FILE_HEADER.size, shape=(count,))
+        else:
+            self._map = None
+
+    def __len__(self) -> int:
+        return 0 if self._map is None else len(self._map)
+
+    def encode(self, vectors: np.ndarray, ids: Iterable[int]) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype="float32").reshape(-1, self.dimension)
+        records = np.zeros(len(vectors), dtype=self.record)
+        records["id"] = np.fromiter(ids, dtype="int64", count=len(vectors))
+        if self.dtype == "int8":
+            scale = np.abs(vectors).max(axis=1) / 127.0
+            scale[scale == 0] = 1.0
+            records["scale"] = scale
+            records["codes"] = np.clip(np.rint(vectors / scale[:, None]), -127, 127)
+        else:
+            records["codes"] = vectors
+        return records
+
+    def decode(self, records: np.ndarray) -> np.ndarray:
+        vectors = records["codes"].astype("float32")
+        if self.dtype == "int8":
+            vectors *= records["scale"][:, None]
+        return vectors
+
+    def append(self, vectors: np.ndarray, ids: Iterable[int]):
+        records = self.encode(vectors, ids)
+        with self._locked(), open(self.path, "ab") as f:
+            f.write(records.tobytes())
+        self.refresh()
+
+    def blocks(self, rows: int = SCAN_BLOCK_ROWS) -> Iterable[np.ndarray]:
+        records = self._map
+        if records is None:
+            return
+        for start in range(0, len(records), rows):
+            yield records[start:start + rows]
+
+    def fingerprint(self) -> Tuple[int, int]:
+        """(record count, sum of ids), compared with SQLite to detect a stale file."""
+        return len(self), sum(int(block["id"].sum()) for block in self.blocks())
+
+    def search(self, queries: np.ndarray, k: int, inner_product: bool = False,
+               normalize: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-``k`` scan in blocks of SCAN_BLOCK_ROWS records. Returns
+        (scores, ids) shaped like a FAISS search: inner products (highest
+        first) with ``inner_product``, squared L2 distances (lowest first)
+        otherwise, padded with -1 ids. ``normalize`` L2-normalises the
+        stored vectors before scoring, for cosine similarity.
+        """
+        queries = np.asarray(queries, dtype="float32").reshape(-1, self.dimension)
+        worst = -np.inf if inner_product else np.inf
+        best_scores = np.full((len(queries), k), worst, dtype="float32")
+        best_ids = np.full((len(queries), k), -1, dtype="int64")
+        query_norms = (queries ** 2).sum(axis=1, keepdims=True)
+
+        for block in self.blocks():
+            vectors = self.decode(block)
+            if normalize:
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                vectors /= np.where(norms == 0, 1, norms)
+            products = queries @ vectors.T
+            if inner_product:
+                scores = products
+            else:
+                scores = query_norms - 2 * products + (vectors ** 2).sum(axis=1)[None, :]
+            scores = np.concatenate([best_scores, scores], axis=1)
+            ids = np.concatenate([best_ids, np.broadcast_to(np.array(block["id"]), (len(queries), len(block)))], axis=1)
+            order = np.argsort(-scores if inner_product else scores, axis=1, kind="stable")[:, :k]
+            best_scores = np.take_along_axis(scores, order, axis=1)
+            best_ids = np.take_along_axis(ids, order, axis=1)
+        return best_scores, best_ids
+
+    def _write(self, blocks: Iterable[np.ndarray]):
+        """Write a new file from ``blocks`` of records and rename it into place. Caller holds the lock."""
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self._header())
+            for block in blocks:
+                f.write(np.ascontiguousarray(block, dtype=self.record).tobytes())
+        os.replace(temp_path, self.path)
+
+    def rewrite(self, blocks: Iterable[np.ndarray]):
+        with self._locked():
+            self._write(blocks)
+        self.refresh()
+
+    def retain(self, keep_ids: np.ndarray, newer_than: int):
+        """
+        Rewrite the file keeping records whose id is in ``keep_ids`` or above
+        ``newer_than``, the last id assigned when ``keep_ids`` was read, so
+        records appended meanwhile by another process survive.
+        """
+        with self._locked():
+            self.refresh()
+            self._write(block[np.isin(block["id"], keep_ids) | (block["id"] > newer_than)]
+                        for block in self.blocks())
+        self.refresh()
+
+    def close(self):
+        self._map = None
+        self._stat = None
+
+
+class MappedVectorMemory(LocalVectorMemory):
+    """
+    Crew memory whose vectors live in a memory-mapped, quantized file.
+
+    SQLite remains the source of truth and keeps the float32 embeddings;
+    ``<db>.vectors`` holds a float16 or int8 copy (``vector_dtype``) that
+    searches scan in fixed-size blocks, so resident memory no longer grows
+    with the number of stored items, and the mapped pages are shared by
+    every process using the same database. Metadata and content are read
+    from SQLite by id for the hits only. The file is rebuilt from SQLite
+    whenever it is missing or out of step with the database.
+
+    Searches are exact scans, so ``index_type`` has no effect; buffering,
+    ``metric``, retention and deduplication behave as in LocalVectorMemory.
+    Searches filtered by ``agent`` or ``metadata`` select the matching rows
+    in SQLite (``agent`` is indexed) and score only their embeddings.
+    """
+
+    def __init__(self, db_path=CREW_MEMORY_PATH, embedding_model="all-MiniLM-L6-v2",
+                 vector_dtype: str = "float16", **kwargs):
+        if vector_dtype not in VECTOR_DTYPES:
+            raise ValueError(f"vector_dtype must be one of {VECTOR_DTYPES}, got {vector_dtype!r}")
+        self.vector_dtype = vector_dtype
+        self.vectors_path = vector_file_path(db_path)
+        self._vectors = None
+        super().__init__(db_path, embedding_model, **kwargs)
+
+    def _init_tables(self):
+        super()._init_tables()
+        # Expiry is checked in SQL on every flush and search
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memory_created_at ON memory (created_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memory_agent ON memory (agent)")
+        self.conn.commit()
+
+    def _clear_in_memory(self):
+        self._index_generation += 1
+        if self._vectors is not None:
+            self._vectors.close()
+            self._vectors = None
+
+    def _maybe_retrain(self):
+        pass  # No index to retrain: searches scan the vector file
+
+    def _embedding_filter(self) -> str:
+        return f"embedding IS NOT NULL AND length(embedding) = {4 * self.dimension}"
+
+    def _load_persistent_memory(self):
+        """
+        Re-embed rows without a usable embedding, in batches, then rebuild
+        the vector file if it does not match the database. Only the ids of
+        the stored items are ever held in memory.
+        """
+        expired, over_limit = self._apply_retention()
+        if expired or over_limit:
+            logger.info("Dropped %d expired and %d over-limit memory items", expired, over_limit)
+        self.conn.commit()
+
+        stamp_matches = self._embedding_stamp_matches()
+        reembedded, reembed_failed = self._reembed_stale(stamp_matches)
+        if not stamp_matches and not reembed_failed:
+            self._write_embedding_stamp()
+        self.conn.commit()
+
+        self._vectors = VectorFile(self.vectors_path, self.dimension, self.vector_dtype)
+        count, id_sum = self.conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(id), 0) FROM memory WHERE {self._embedding_filter()}"
+        ).fetchone()
+        if reembedded or self._vectors.fingerprint() != (count, id_sum):
+            started = time.monotonic()
+            self._vectors.rewrite(self._database_blocks())
+            logger.info("Rebuilt %s vector file over %d items in %.2fs",
+                        self.vector_dtype, len(self._vectors), time.monotonic() - started)
+
+    def _reembed_stale(self, stamp_matches: bool) -> Tuple[int, bool]:
+        """Encode rows whose embedding is missing or from another model. Returns (count, failed)."""
+        if not stamp_matches:
+            logger.info("Embedding model stamp changed to %s (dim=%d); re-embedding stored memory",
+                        self.embedding_model, self.dimension)
+            query = "SELECT id, content FROM memory WHERE id > ? ORDER BY id LIMIT ?"
+        else:
+            query = (f"SELECT id, content FROM memory WHERE id > ? AND NOT ({self._embedding_filter()}) "
+                     "ORDER BY id LIMIT ?")
+        reembedded = 0
+        last_id = 0
+        while True:
+            rows = self.conn.execute(query, (last_id, REEMBED_BATCH)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            try:
+                encoded = np.asarray(self.model.encode([content or "" for _, content in rows]), dtype="float32")
+            except Exception as e:
+                logger.error("Error re-embedding memory items: %s", e)
+                return reembedded, True
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE memory SET embedding = ? WHERE id = ?",
+                    [(embedding.tobytes(), row_id) for (row_id, _), embedding in zip(rows, encoded)]
+                )
+            reembedded += len(rows)
+        if reembedded:
+            logger.info("Re-embedded %d memory items", reembedded)
+        return reembedded, False
+
+    def _database_blocks(self) -> Iterable[np.ndarray]:
+        cursor = self.conn.execute(f"SELECT id, embedding FROM memory WHERE {self._embedding_filter()} ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(SCAN_BLOCK_ROWS)
+            if not rows:
+                return
+            vectors = np.vstack([np.frombuffer(blob, dtype="float32") for _, blob in rows])
+            yield self._vectors.encode(self._prepare_vectors(vectors), (row_id for row_id, _ in rows))
+
+    def _add_items(self, pending: list, embeddings: np.ndarray, row_ids: List[int], created_at: float):
+        self._vectors.append(self._prepare_vectors(embeddings), row_ids)
+
+    def _non_duplicates(self, embeddings: np.ndarray) -> List[int]:
+        unit = self._prepare_vectors(embeddings)
+        faiss.normalize_L2(unit)
+        self._vectors.refresh()
+        nearest, _ = self._vectors.search(unit, 1, inner_product=True, normalize=True)
+
+        keep = []
+        for i, vector in enumerate(unit):
+            similarity = float((unit[keep] @ vector).max()) if keep else -1.0
+            similarity = max(similarity, float(nearest[i][0]))
+            if similarity < self.dedup_threshold:
+                keep.append(i)
+        return keep
+
+    def _expired_count(self) -> int:
+        if self.ttl is None:
+            return 0
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM memory WHERE created_at < ?", (time.time() - self.ttl,)
+        ).fetchone()[0]
+
+    def _enforce_retention(self):
+        if self.max_items is None and self.ttl is None:
+            return
+        self._vectors.refresh()
+        count = len(self._vectors)
+        expired = self._expired_count()
+        over_limit = count - expired - self.max_items if self.max_items is not None else 0
+        evict = expired + max(0, over_limit)
+        if evict == 0 or evict < max(1, int(count * RETENTION_SLACK)):
+            return
+        with self.conn:
+            expired, over_limit = self._apply_retention()
+            keep_ids = np.array([row_id for row_id, in self.conn.execute("SELECT id FROM memory")], dtype="int64")
+            last_id = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'memory'").fetchone()
+        self._vectors.retain(keep_ids, last_id[0] if last_id else 0)
+        logger.info("Evicted %d memory items (%d expired, %d over the %s item limit)",
+                    expired + over_limit, expired, over_limit, self.max_items)
+
+    def _fetch_items(self, row_ids: List[int]) -> Dict[int, dict]:
+        """Metadata and content of the given rows, skipping expired and deleted ones."""
+        if not row_ids:
+            return {}
+        query = f"SELECT id, agent, metadata, content FROM memory WHERE id IN ({', '.join('?' * len(row_ids))})"
+        params = list(row_ids)
+        if self.ttl is not None:
+            query += " AND created_at >= ?"
+            params.append(time.time() - self.ttl)
+        items = {}
+        for row_id, agent, metadata_str, content in self.conn.execute(query, params):
+            try:
+                metadata = json.loads(metadata_str) if metadata_str else {}
+            except json.JSONDecodeError as e:
+                logger.error("JSON decode error for metadata '%s': %s", metadata_str, e)
+                continue
+            items[row_id] = {"agent": agent, "metadata": metadata, "content": content}
+        return items
+
+    def _filtered_search(self, query_embedding: np.ndarray, limit: int, agent: Optional[str],
+                         metadata: Optional[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top ``limit`` (scores, ids) over the unexpired rows matching the filters, in blocks."""
+        query = f"SELECT id, embedding FROM memory WHERE {self._embedding_filter()}"
+        params = []
+        if agent is not None:
+            query += " AND agent = ?"
+            params.append(agent)
+        for key, value in (metadata or {}).items():
+            path = '$."' + key.replace('"', '\\"') + '"'
+            if value is None:
+                query += " AND json_type(metadata, ?) = 'null'"
+                params.append(path)
+            elif isinstance(value, (dict, list)):
+                query += " AND json_extract(metadata, ?) = json(?)"
+                params.extend((path, json.dumps(value)))
+            else:
+                # JSON booleans come back from json_extract as 1 and 0
+                query += " AND json_extract(metadata, ?) = ?"
+                params.extend((path, int(value) if isinstance(value, bool) else value))
+        if self.ttl is not None:
+            query += " AND created_at >= ?"
+            params.append(time.time() - self.ttl)
+
+        cosine = self.metric == "cosine"
+        best_scores = np.empty(0, dtype="float32")
+        best_ids = np.empty(0, dtype="int64")
+        cursor = self.conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(SCAN_BLOCK_ROWS)
+            if not rows:
+                break
+            vectors = self._prepare_vectors(np.vstack([np.frombuffer(blob, dtype="float32") for _, blob in rows]))
+            if cosine:
+                scores = vectors @ query_embedding[0]
+            else:
+                scores = ((vectors - query_embedding[0]) ** 2).sum(axis=1)
+            scores = np.concatenate([best_scores, scores])
+            ids = np.concatenate([best_ids, np.array([row_id for row_id, _ in rows], dtype="int64")])
+            order = np.argsort(-scores if cosine else scores, kind="stable")[:limit]
+            best_scores, best_ids = scores[order], ids[order]
+        return best_scores, best_ids
+
+    def search(self, query: str, limit: int = 10, score_threshold: float = 0.5,
+               agent: Optional[str] = None, metadata: Optional[dict] = None) -> List[dict]:
+        with self._lock, trace_span("memory.search", "memory", limit=limit) as span:
+            self.flush()
+            self._vectors.refresh()
+            if not len(self._vectors):
+                return []
+
+            query_embedding = self._prepare_vectors(self.model.encode(query))
+            cosine = self.metric == "cosine"
+            if agent is None and not metadata:
+                D, I = self._vectors.search(query_embedding, limit, inner_product=cosine)
+            else:
+                scores, ids = self._filtered_search(query_embedding, limit, agent, metadata)
+                D, I = scores[None, :], ids[None, :]
+            hits = [int(row_id) for score, row_id in zip(D[0], I[0])
+                    if row_id >= 0 and (score >= score_threshold if cosine else score <= score_threshold)]
+            items = self._fetch_items(hits)
+            results = [items[row_id] for row_id in hits if row_id in items]
+            span.attributes["results"] = len(results)
+            return results
+
+    def reset(self):
+        with self._lock:
+            super().reset()
+            # The vector file no longer matches the emptied table, so this rewrites it empty
+            self._load_persistent_memory()
+
+    def _db_size(self) -> int:
+        vectors_size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        return super()._db_size() + vectors_size
+
+
+def create_memory_storage(db_path: str = CREW_MEMORY_PATH, storage: Optional[str] = None,
+                          vector_dtype: Optional[str] = None, **kwargs) -> LocalVectorMemory:
+    """
+    Open the crew memory with the storage mode from MEMORY_STORAGE ("memory"
+    keeps the vectors in RAM, "mmap" in a memory-mapped file) and, for
+    "mmap", the vector precision from MEMORY_VECTOR_DTYPE.
+    """
+    storage = storage or os.getenv("MEMORY_STORAGE", "memory")
+    if storage not in MEMORY_STORAGES:
+        raise ValueError(f"storage must be one of {MEMORY_STORAGES}, got {storage!r}")
+    if storage == "mmap":
+        return MappedVectorMemory(db_path=db_path,
+                                  vector_dtype=vector_dtype or os.getenv("MEMORY_VECTOR_DTYPE", "float16"),
+                                  **kwargs)
+    return LocalVectorMemory(db_path=db_path, **kwargs)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Write the project tree of a generated bash script directly to disk.
+
+Usage:
+    materialize [SCRIPT] [--dest DIR] [--workers N] [--dry-run] [--diff]
+
+Instead of executing ``outputs/bash_script.sh``, its ``mkdir``/``cd`` and
+heredoc blocks are parsed and the files are written in parallel under
+``--dest`` (by default the current directory, as if the script were run
+there). Files whose content already matches are left untouched, so applying
+a regenerated conversion over an existing checkout only writes what
+changed. A summary line per added or modified file is logged, with a
+unified diff for modified files under ``--diff``. Other commands in the
+script, such as Maven builds, are listed but not run.
+"""
+
+import argparse
+import difflib
+import os
+import posixpath
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from tibco_to_spring.bash_script import parse_bash_script
+from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.streaming_output import make_executable
+
+# Set up logging
+logger = get_logger(__name__)
+
+DEFAULT_SCRIPT = Path("outputs") / "bash_script.sh"
+MATERIALIZE_WORKERS = int(os.getenv("MATERIALIZE_WORKERS", "8"))
+
+
+@dataclass
+class FileChange:
+    path: str
+    status: str  # "added", "modified" or "unchanged"
+    added_lines: int = 0
+    removed_lines: int = 0
+    diff: str = ""
+
+
+@dataclass
+class MaterializeReport:
+    changes: List[FileChange] = field(default_factory=list)
+    skipped_paths: List[str] = field(default_factory=list)
+    commands: List[str] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(change.status == status for change in self.changes)
+
+
+def _safe_relative(path: str) -> Optional[str]:
+    """``path`` if it stays inside the destination, else None."""
+    normalized = posixpath.normpath(path)
+    if posixpath.isabs(normalized) or normalized == ".." or normalized.startswith("../"):
+        return None
+    return normalized
+
+
+def _apply_file(dest: Path, path: str, content: str, dry_run: bool, with_diff: bool) -> FileChange:
+    target = dest / path
+    data = content.encode("utf-8")
+    old = None
+    # A size mismatch settles it without reading the existing file
+    if target.is_file() and target.stat().st_size == len(data):
+        old = target.read_bytes()
+        if old == data:
+            return FileChange(path, "unchanged")
+    elif target.is_file():
+        old = target.read_bytes()
+
+    change = FileChange(path, "added" if old is None else "modified")
+    old_lines = old.decode("utf-8", errors="replace").splitlines(keepends=True) if old is not None else []
+    new_lines = content.splitlines(keepends=True)
+    for line in difflib.unified_diff(old_lines, new_lines, lineterm="", n=3 if with_diff else 0,
+                                     fromfile=f"a/{path}", tofile=f"b/{path}"):
+        if line.startswith("+") and not line.startswith("+++"):
+            change.added_lines += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            change.removed_lines += 1
+        if with_diff:
+            change.diff += line if line.endswith("\n") else line + "\n"
+
+    if not dry_run:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, target)
+        if content.startswith("#!"):
+            make_executable(target)
+    return change
+
+
+def materialize_script(script: str, dest: Path, workers: int = MATERIALIZE_WORKERS,
+                       dry_run: bool = False, with_diff: bool = False) -> MaterializeReport:
+    """Write the files of ``script`` under ``dest``, skipping files whose content is unchanged."""
+    parsed = parse_bash_script(script)
+    report = MaterializeReport(commands=[
+        command.command if command.cwd == "." else f"(cd {shlex.quote(command.cwd)} && {command.command})"
+        for command in parsed.commands
+    ])
+
+    files = {}
+    for path, content in parsed.file_contents().items():
+        relative = _safe_relative(path)
+        if relative is None:
+            report.skipped_paths.append(path)
+        else:
+            files[relative] = content
+
+    if not dry_run:
+        for directory in parsed.directories:
+            relative = _safe_relative(directory)
+            if relative is None:
+                report.skipped_paths.append(directory)
+            else:
+                (dest / relative).mkdir(parents=True, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        report.changes = list(executor.map(
+            lambda item: _apply_file(dest, item[0], item[1], dry_run, with_diff), sorted(files.items())
+        ))
+    return report
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Write a generated project script's files directly to disk")
+    parser.add_argument("script", nargs="?", type=Path, default=DEFAULT_SCRIPT, help="Generated bash script")
+    parser.add_argument("--dest", type=Path, default=Path("."),
+                        help="Directory the script would be run from")
+    parser.add_argument("--workers", type=int, default=MATERIALIZE_WORKERS, help="Files written at once")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--diff", action="store_true", help="Print a unified diff of modified files")
+    args = parser.parse_args()
+
+    if not args.script.is_file():
+        raise SystemExit(f"No script at {args.script}")
+
+    report = materialize_script(args.script.read_text(encoding="utf-8"), args.dest, args.workers,
+                                args.dry_run, args.diff)
+    for change in report.changes:
+        if change.status == "added":
+            logger.info("A %s (+%d)", change.path, change.added_lines)
+        elif change.status == "modified":
+            logger.info("M %s (+%d -%d)", change.path, change.added_lines, change.removed_lines)
+            if change.diff:
+                print(change.diff, end="")
+    for path in report.skipped_paths:
+        logger.warning("Skipped %s: outside the destination directory", path)
+    if report.commands:
+        logger.info("Commands not run by the materializer:\n%s", "\n".join(report.commands))
+    logger.info("%s %s: %d added, %d modified, %d unchanged",
+                "Would update" if args.dry_run else "Updated", args.dest.absolute(),
+                report.count("added"), report.count("modified"), report.count("unchanged"))
+
+
+if __name__ == "__main__":
+    run()
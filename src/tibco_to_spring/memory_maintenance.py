@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Offline maintenance of the crew memory database.
+
+Usage:
+    compact_memory [--db PATH] [--max-items N] [--ttl SECONDS] [--dedup-threshold SIMILARITY]
+
+Applies retention (item limit and TTL) and near-duplicate removal to every
+stored item, vacuums the SQLite file (and rebuilds the vector file when
+MEMORY_STORAGE=mmap) and reports what was reclaimed. Limits default to
+MEMORY_MAX_ITEMS, MEMORY_TTL and MEMORY_DEDUP_THRESHOLD. Run it between
+crew runs, not while a crew is using the database.
+"""
+
+import argparse
+import os
+
+from tibco_to_spring.local_vector_memory import CREW_MEMORY_PATH, memory_retention_settings
+from tibco_to_spring.mapped_vector_memory import create_memory_storage
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+
+def run() -> None:
+    defaults = memory_retention_settings()
+    parser = argparse.ArgumentParser(description="Compact the crew memory database")
+    parser.add_argument("--db", default=CREW_MEMORY_PATH, help="Crew memory SQLite file")
+    parser.add_argument("--max-items", type=int, default=defaults["max_items"],
+                        help="Keep only the newest N items")
+    parser.add_argument("--ttl", type=float, default=defaults["ttl"],
+                        help="Drop items older than this many seconds")
+    parser.add_argument("--dedup-threshold", type=float, default=defaults["dedup_threshold"],
+                        help="Drop items whose cosine similarity to a newer item reaches this value")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No crew memory database at {args.db}")
+
+    # Load without limits so that compact() sees, and reports, everything it removes
+    memory = create_memory_storage(db_path=args.db, index_type="flat", metric=os.getenv("MEMORY_METRIC", "l2"))
+    memory.max_items = args.max_items
+    memory.ttl = args.ttl
+    memory.dedup_threshold = args.dedup_threshold
+    report = memory.compact()
+    logger.info(
+        "Compacted %s: %d -> %d items (%d expired, %d over limit, %d near-duplicates), "
+        "%.1f MB -> %.1f MB (%.1f MB reclaimed)",
+        args.db, report.items_before, report.items_after, report.expired, report.over_limit,
+        report.duplicates, report.bytes_before / 1e6, report.bytes_after / 1e6, report.bytes_reclaimed / 1e6
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,277 @@
+"""
+Process-graph partitioning of large TIBCO projects.
+
+A project is split along its process-call graph (``ProcessCall`` activities
+and error-handler links from the parsed IR) into conversion units of at most
+``max_processes`` processes. Each unit is converted by its own crew, in
+parallel, and the per-unit bash scripts are merged into one project script:
+identical files are deduplicated and only files that the units generated
+differently are handed to a merge crew.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from tibco_to_spring.bash_script import ScriptCommand, parse_bash_script, render_bash_script
+from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.tibco_ir import parse_tibco_project, to_json
+
+# Set up logging
+logger = get_logger(__name__)
+
+PARTITION_MAX_PROCESSES = int(os.getenv("PARTITION_MAX_PROCESSES", "25"))
+PARTITION_WORKERS = int(os.getenv("PARTITION_WORKERS", "4"))
+
+
+@dataclass
+class ConversionUnit:
+    name: str
+    processes: List[str]
+    ir: Dict
+
+
+# ------------------ Graph partitioning ------------------
+
+def _callees(ir: Dict) -> Dict[str, Set[str]]:
+    """Process -> processes it calls or hands errors to, restricted to known processes."""
+    processes = ir.get("processes", {})
+    callees = {name: set() for name in processes}
+    for name, called in ir.get("call_graph", {}).items():
+        callees[name].update(callee for callee in called if callee in processes)
+    for name, handler in ir.get("error_handlers", {}).items():
+        if handler in processes:
+            callees[name].add(handler)
+    return callees
+
+
+def _reachable(start: str, callees: Dict[str, Set[str]], allowed: Set[str]) -> Set[str]:
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for callee in sorted(callees[queue.popleft()]):
+            if callee in allowed and callee not in seen:
+                seen.add(callee)
+                queue.append(callee)
+    return seen
+
+
+def _components(callees: Dict[str, Set[str]]) -> List[Set[str]]:
+    neighbours = {name: set(called) for name, called in callees.items()}
+    for name, called in callees.items():
+        for callee in called:
+            neighbours[callee].add(name)
+
+    components, seen = [], set()
+    for name in sorted(neighbours):
+        if name in seen:
+            continue
+        component = _reachable(name, neighbours, set(neighbours))
+        seen |= component
+        components.append(component)
+    return components
+
+
+def _chunks(names: Iterable[str], size: int) -> List[Set[str]]:
+    names = sorted(names)
+    return [set(names[i:i + size]) for i in range(0, len(names), size)]
+
+
+def _split(nodes: Set[str], roots: List[str], callees: Dict[str, Set[str]], max_processes: int) -> List[Set[str]]:
+    """Split ``nodes`` into groups: the roots, then one subtree per callee, recursively."""
+    if len(nodes) <= max_processes:
+        return [nodes]
+
+    assigned = set(roots)
+    groups: List[Set[str]] = []
+    for root in roots:
+        for callee in sorted(callees[root]):
+            if callee not in nodes or callee in assigned:
+                continue
+            subtree = _reachable(callee, callees, nodes - assigned)
+            assigned |= subtree
+            groups.extend(_split(subtree, [callee], callees, max_processes))
+
+    # Roots plus anything not reachable from them stay together, chunked if still too large
+    head = set(roots) | (nodes - assigned)
+    return _chunks(head, max_processes) + groups
+
+
+def partition_project(ir: Dict, max_processes: int = PARTITION_MAX_PROCESSES) -> List[ConversionUnit]:
+    """
+    Split the project IR into conversion units of at most ``max_processes``
+    processes. Connected parts of the call graph stay together where they
+    fit; oversized parts are cut below their entry points, and small groups
+    are packed together to keep the number of crews down.
+    """
+    callees = _callees(ir)
+    if not callees:
+        return [ConversionUnit(name="unit-1", processes=[], ir=ir)]
+
+    called = {callee for called_set in callees.values() for callee in called_set}
+    groups: List[Set[str]] = []
+    for component in _components(callees):
+        roots = sorted(name for name in component if name not in called) or [min(component)]
+        groups.extend(_split(component, roots, callees, max_processes))
+
+    # First-fit packing of groups into units, largest first
+    packed: List[Set[str]] = []
+    for group in sorted(groups, key=lambda g: (-len(g), min(g))):
+        for unit in packed:
+            if len(unit) + len(group) <= max_processes:
+                unit |= group
+                break
+        else:
+            packed.append(set(group))
+
+    return [
+        ConversionUnit(name=f"unit-{i}", processes=sorted(unit), ir=unit_ir(ir, unit))
+        for i, unit in enumerate(packed, start=1)
+    ]
+
+
+def unit_ir(ir: Dict, processes: Set[str]) -> Dict:
+    """IR restricted to ``processes``, with calls into other units listed as external."""
+    unit_processes = {name: ir["processes"][name] for name in sorted(processes)}
+    processes_json = json.dumps(unit_processes)
+
+    sub_ir = {
+        "version": ir.get("version"),
+        "project": ir.get("project", {}),
+        "processes": unit_processes,
+        "call_graph": {name: ir.get("call_graph", {}).get(name, []) for name in unit_processes},
+        "external_calls": {
+            name: [callee for callee in ir.get("call_graph", {}).get(name, []) if callee not in processes]
+            for name in unit_processes
+        },
+        "entry_points": [name for name in ir.get("entry_points", []) if name in processes],
+        "error_handlers": {name: handler for name, handler in ir.get("error_handlers", {}).items()
+                           if name in processes},
+        # Only the schemas this unit's activities mention
+        "schemas": {name: schema for name, schema in ir.get("schemas", {}).items()
+                    if re.search(rf"\b{re.escape(name)}\b", processes_json)},
+        "routing_rules": ir.get("routing_rules", []),
+        "global_variables": ir.get("global_variables", {}),
+    }
+    if sub_ir["entry_points"]:
+        sub_ir["services"] = ir.get("services", [])
+    return {key: value for key, value in sub_ir.items() if value not in ({}, [], None)}
+
+
+# ------------------ Parallel conversion ------------------
+
+def project_slug(ir: Dict, fallback: str) -> str:
+    name = ir.get("project", {}).get("name") or fallback
+    return re.sub(r"[^a-z0-9]+", "-", re.sub(r"([a-z0-9])([A-Z])", r"\1-\2", name).lower()).strip("-")
+
+
+def unit_prompt(unit: ConversionUnit) -> str:
+    return (
+        f"\n\n### Parsed TIBCO Project Unit (JSON IR)\n"
+        f"This is conversion unit {unit.name} covering processes {', '.join(unit.processes)}. "
+        "Processes listed under external_calls are converted by other units; treat them as existing Spring services. "
+        "Base the analysis on this IR; only read files when a detail you need is missing from it, "
+        "and read the files you need together in one 'Read multiple files' call rather than one at a time.\n"
+        f"{to_json(unit.ir)}\n"
+    )
+
+
+def unit_scope(unit: ConversionUnit, project_dir: str, base_package: str) -> str:
+    return (
+        f"\n\n### Conversion Unit Scope\n"
+        f"- Convert only the processes of unit {unit.name}: {', '.join(unit.processes)}. "
+        "Other units are converted in parallel and all scripts are merged into one project afterwards.\n"
+        f"- Create the project in the directory `{project_dir}` and use the base package `{base_package}`.\n"
+        "- Name each class after the TIBCO process it implements so classes from different units do not collide.\n"
+        "- Include pom.xml and application.properties entries only for what this unit needs.\n"
+    )
+
+
+def merge_unit_scripts(scripts: Dict[str, str], resolve_conflicts=None) -> str:
+    """
+    Merge per-unit bash scripts into one. Files produced identically by
+    several units are kept once; differing versions go to
+    ``resolve_conflicts({path: [versions]}) -> {path: merged}`` (by default
+    the merge crew).
+    """
+    directories: List[str] = []
+    versions: Dict[str, List[str]] = {}
+    commands: List[ScriptCommand] = []
+    for unit_name in sorted(scripts):
+        parsed = parse_bash_script(scripts[unit_name])
+        directories.extend(parsed.directories)
+        for path, content in parsed.file_contents().items():
+            if content not in versions.setdefault(path, []):
+                versions[path].append(content)
+        for command in parsed.commands:
+            if command not in commands:
+                commands.append(command)
+
+    files = {path: contents[0] for path, contents in versions.items() if len(contents) == 1}
+    conflicts = {path: contents for path, contents in versions.items() if len(contents) > 1}
+    if conflicts:
+        logger.info("Merging %d files generated differently by several units: %s",
+                    len(conflicts), ", ".join(sorted(conflicts)))
+        if resolve_conflicts is None:
+            from tibco_to_spring.compact.crew import resolve_file_conflicts
+            resolve_conflicts = resolve_file_conflicts
+        files.update(resolve_conflicts(conflicts))
+
+    return render_bash_script(directories, files, commands)
+
+
+def run_partitioned(tibco_path: str, base_path: str, output_path: Path, context_provider=None,
+                    max_processes: int = PARTITION_MAX_PROCESSES, workers: int = PARTITION_WORKERS,
+                    base_package: Optional[str] = None, stream: bool = False, resume: bool = False) -> str:
+    """
+    Convert a TIBCO project, splitting it into parallel sub-crews when it has
+    more than ``max_processes`` processes, and write the final bash script
+    atomically to ``output_path``. With ``stream`` an unsplit project streams
+    its final task into ``<output_path>.partial`` while it runs. Task outputs
+    are checkpointed; with ``resume`` tasks whose inputs are unchanged since
+    a previous run reuse their checkpoint instead of running again.
+    Returns the script.
+    """
+    from tibco_to_spring.checkpoint import directory_digest, kickoff_with_checkpoints
+    from tibco_to_spring.compact.crew import CompanyCodeContext, create_crew
+    from tibco_to_spring.streaming_output import StreamingScriptWriter, write_script_atomically
+
+    if context_provider is None:
+        context_provider = CompanyCodeContext(base_path)
+
+    ir = parse_tibco_project(tibco_path)
+    inputs_digest = directory_digest(tibco_path)
+    units = partition_project(ir, max_processes)
+    if len(units) <= 1:
+        crew = create_crew(base_path, tibco_path, context_provider=context_provider)
+        if not stream:
+            script = kickoff_with_checkpoints(crew, inputs_digest, resume).raw
+            write_script_atomically(output_path, script)
+            return script
+        with StreamingScriptWriter(output_path, final_task=crew.tasks[-1]) as writer:
+            script = kickoff_with_checkpoints(crew, inputs_digest, resume).raw
+            writer.commit(script)
+        return script
+
+    project_dir = project_slug(ir, os.path.basename(os.path.normpath(tibco_path)))
+    base_package = base_package or "com." + project_dir.replace("-", "")
+    logger.info("Converting %s as %d units of at most %d processes",
+                project_dir, len(units), max_processes)
+
+    def convert(unit: ConversionUnit) -> str:
+        crew = create_crew(
+            base_path, tibco_path, context_provider=context_provider,
+            tibco_ir=unit_prompt(unit), scope=unit_scope(unit, project_dir, base_package)
+        )
+        return kickoff_with_checkpoints(crew, inputs_digest, resume).raw
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outputs = dict(zip((unit.name for unit in units), executor.map(convert, units)))
+    script = merge_unit_scripts(outputs)
+    write_script_atomically(output_path, script)
+    return script
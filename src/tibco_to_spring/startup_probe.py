@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Startup-cost probe.
+
+Usage:
+    startup_probe [--modules tibco_to_spring.main,...] [--resources] [--top N]
+
+Imports each module in a fresh interpreter with ``python -X importtime``
+and reports the wall time of the process, the module's cumulative import
+time and the heaviest packages it pulled in. ``--resources`` additionally
+times building the lazily created resources (crew LLMs, analyst tools,
+LLM cache, embedding model) in a fresh interpreter each, separately from
+the imports they need. Use it to check that entry points stay fast and to find
+the import that made one slow.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+DEFAULT_MODULES = (
+    "tibco_to_spring.main",
+    "tibco_to_spring.batch",
+    "tibco_to_spring.materialize",
+    "tibco_to_spring.memory_maintenance",
+    "tibco_to_spring.partition",
+    "tibco_to_spring.tibco_ir",
+    "tibco_to_spring.tracing",
+    "tibco_to_spring.crew",
+    "tibco_to_spring.compact.crew",
+)
+
+# Resource name -> statement run after its imports, timed on its own
+RESOURCES: Dict[str, Tuple[str, str]] = {
+    "crew_class": ("from tibco_to_spring.crew import TibcoToSpring", "TibcoToSpring()"),
+    "crew_llm": ("from tibco_to_spring.crew import TibcoToSpring", "TibcoToSpring()._get_llm()"),
+    "analyst_tools": ("from tibco_to_spring.crew import TibcoToSpring", "TibcoToSpring()._tools()"),
+    "compact_llm": ("from tibco_to_spring.compact.crew import get_llm", "get_llm()"),
+    "llm_cache": ("from tibco_to_spring.llm_cache import default_llm_cache", "default_llm_cache()"),
+    "embedding_model": ("from tibco_to_spring.embeddings import get_embedding_provider",
+                        "get_embedding_provider().dimension"),
+}
+
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportProbe:
+    module: str
+    wall_time: float
+    cumulative: float
+    heaviest: List[Tuple[str, float]] = field(default_factory=list)
+    error: str = ""
+
+
+def probe_import(module: str, top: int = 5) -> ImportProbe:
+    """Import ``module`` in a fresh interpreter and parse its ``-X importtime`` report."""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True)
+    wall_time = time.perf_counter() - started
+
+    # Children are reported before their parent, so collect the direct imports until the module's own line
+    children: List[Tuple[str, float]] = []
+    heaviest: List[Tuple[str, float]] = []
+    cumulative = 0.0
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if not match:
+            continue
+        depth = (len(match.group(3)) - 1) // 2
+        name, seconds = match.group(4), int(match.group(2)) / 1e6
+        if depth == 1:
+            children.append((name, seconds))
+        elif depth == 0:
+            if name == module:
+                cumulative = seconds
+                heaviest = sorted(children, key=lambda item: -item[1])[:top]
+            children = []
+
+    error = ""
+    if completed.returncode:
+        lines = completed.stderr.strip().splitlines()
+        error = lines[-1] if lines else "failed"
+    return ImportProbe(module, wall_time, cumulative, heaviest, error)
+
+
+def probe_resource(name: str) -> Tuple[float, float, str]:
+    """(import seconds, construction seconds, error) for one entry of RESOURCES."""
+    imports, statement = RESOURCES[name]
+    code = (
+        "import time\n"
+        "started = time.perf_counter()\n"
+        f"{imports}\n"
+        "imported = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(imported - started, time.perf_counter() - imported)\n"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if completed.returncode:
+        lines = completed.stderr.strip().splitlines()
+        return 0.0, 0.0, lines[-1] if lines else "failed"
+    import_time, build_time = map(float, completed.stdout.split()[-2:])
+    return import_time, build_time, ""
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Measure import and initialisation cost per module")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="Comma-separated modules to import")
+    parser.add_argument("--resources", action="store_true", help="Also time building the lazy resources")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imported packages listed per module")
+    args = parser.parse_args()
+
+    lines = [f"{'Module':<38} {'Process (s)':>11} {'Import (s)':>10}  Heaviest imports"]
+    for module in args.modules.split(","):
+        probe = probe_import(module, args.top)
+        heaviest = probe.error or ", ".join(f"{name} {seconds:.2f}s" for name, seconds in probe.heaviest)
+        lines.append(f"{module:<38} {probe.wall_time:>11.2f} {probe.cumulative:>10.2f}  {heaviest}")
+    logger.info("Import cost per module (fresh interpreter each):\n%s", "\n".join(lines))
+
+    if args.resources:
+        lines = [f"{'Resource':<20} {'Imports (s)':>11} {'Build (s)':>10}"]
+        for name in RESOURCES:
+            import_time, build_time, error = probe_resource(name)
+            lines.append(f"{name:<20} {import_time:>11.2f} {build_time:>10.2f}  {error}".rstrip())
+        logger.info("Resource initialisation cost (fresh interpreter each):\n%s", "\n".join(lines))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+PARTIAL_SUFFIX = ".partial"
+
+
+def make_executable(path: Path):
+    if os.name != "nt":  # Not Windows
+        path.chmod(path.stat().st_mode | 0o755)
+
+
+def write_script_atomically(path: Path, text: str):
+    """Write ``text`` to a temp file next to ``path`` and rename it into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    make_executable(path)
+
+
+class StreamingScriptWriter:
+    """
+    Streams the final task's LLM output chunks into ``<target>.partial``
+    while a crew runs, so progress is visible and survives a crash.
+
+    Each LLM call made by the final task restarts the partial file, since only
+    the last call produces the answer. ``commit`` writes the crew's final
+    output over the partial file and atomically renames it to ``target``;
+    if the run fails the partial file is left for inspection. Time to first
+    chunk and streamed chunks/sec are logged on commit; a chunk is one stream
+    event, which may hold several tokens. Requires an LLM created with
+    ``stream=True``; cached completions arrive without chunks.
+    """
+
+    def __init__(self, target: Path, final_task: Any):
+        self.target = Path(target)
+        self.partial_path = self.target.with_name(self.target.name + PARTIAL_SUFFIX)
+        self.final_task = final_task
+        self._lock = threading.Lock()
+        self._file = None
+        self._in_final_task = False
+        self._started = None
+        self._first_chunk_at: Optional[float] = None
+        self._last_chunk_at: Optional[float] = None
+        self.chunks = 0
+
+    def __enter__(self):
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        self._started = time.monotonic()
+        _install_listener()
+        with _active_writers_lock:
+            _active_writers.add(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with _active_writers_lock:
+            _active_writers.discard(self)
+        with self._lock:
+            self._close()
+        if exc_type is not None and self.partial_path.exists():
+            logger.warning("Run failed; partial output kept at %s", self.partial_path)
+
+    def _on_task_started(self, source, event):
+        with self._lock:
+            self._in_final_task = getattr(event, "task", None) is self.final_task
+
+    def _on_llm_call_started(self, source, event):
+        with self._lock:
+            if self._in_final_task:
+                self._close()
+                self._file = open(self.partial_path, "w", encoding="utf-8")
+
+    def _on_chunk(self, source, event):
+        with self._lock:
+            if not self._in_final_task or self._file is None:
+                return
+            now = time.monotonic()
+            if self._first_chunk_at is None:
+                self._first_chunk_at = now
+            self._last_chunk_at = now
+            self.chunks += 1
+            self._file.write(event.chunk)
+            self._file.flush()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def time_to_first_chunk(self) -> Optional[float]:
+        return self._first_chunk_at - self._started if self._first_chunk_at is not None else None
+
+    @property
+    def chunks_per_sec(self) -> float:
+        if self._first_chunk_at is None or self._last_chunk_at == self._first_chunk_at:
+            return 0.0
+        return self.chunks / (self._last_chunk_at - self._first_chunk_at)
+
+    def commit(self, text: str):
+        """Replace the streamed chunks with the final ``text`` and rename into place."""
+        with self._lock:
+            self._close()
+            self._in_final_task = False
+        write_script_atomically(self.partial_path, text)
+        os.replace(self.partial_path, self.target)
+        if self.time_to_first_chunk is not None:
+            logger.info("Streamed %d chunks: time to first chunk %.1fs, %.1f chunks/s",
+                        self.chunks, self.time_to_first_chunk, self.chunks_per_sec)
+        else:
+            logger.info("No chunks were streamed (cached or non-streaming LLM)")
+
+
+_active_writers = set()
+_active_writers_lock = threading.Lock()
+_listener = None
+
+
+def _install_listener():
+    global _listener
+    with _active_writers_lock:
+        if _listener is not None:
+            return
+
+        # crewAI is imported on first use so the file helpers above stay cheap to import
+        try:
+            from crewai.events import BaseEventListener, LLMCallStartedEvent, LLMStreamChunkEvent, TaskStartedEvent
+        except ImportError:  # crewAI releases before the events package was split out
+            from crewai.utilities.events import LLMCallStartedEvent, LLMStreamChunkEvent, TaskStartedEvent
+            from crewai.utilities.events.base_event_listener import BaseEventListener
+
+        class _StreamingListener(BaseEventListener):
+            """
+            Forwards events to the active writers. Registered once per process
+            rather than per writer, since the event bus cannot unregister handlers
+            and scoped handlers would hide every other listener during the run.
+            """
+
+            def setup_listeners(self, crewai_event_bus):
+                def forward(method_name):
+                    def handler(source, event):
+                        with _active_writers_lock:
+                            writers = list(_active_writers)
+                        for writer in writers:
+                            getattr(writer, method_name)(source, event)
+                    return handler
+
+                crewai_event_bus.on(TaskStartedEvent)(forward("_on_task_started"))
+                crewai_event_bus.on(LLMCallStartedEvent)(forward("_on_llm_call_started"))
+                crewai_event_bus.on(LLMStreamChunkEvent)(forward("_on_chunk"))
+
+        _listener = _StreamingListener()
@@ -0,0 +1,389 @@
+"""
+Deterministic pre-parser for TIBCO BusinessWorks projects.
+
+Walks a project directory once and turns ``.process``, ``.xsd``, ``.wsdl``,
+``project.xml``, routing rule XML, ``.properties`` and ``.substvar`` files
+into a compact JSON intermediate representation (IR): the process-call
+graph, activities, schemas, services, error handlers and global variables.
+XML is read with ``iterparse`` and elements are cleared as soon as they are
+consumed, so memory stays bounded on large projects.
+"""
+
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+IR_VERSION = 1
+SECRET_KEY_PATTERN = re.compile(r"(password|passwd|secret|token|apikey|api_key|credential)", re.IGNORECASE)
+MASKED_VALUE = "***"
+# "{name}" in a string value, which crewAI would take for a task input placeholder (e.g. "${DB_URL}")
+PLACEHOLDER_BRACE_PATTERN = re.compile(r"\{(?=[A-Za-z_][A-Za-z0-9_\-]*\})")
+# Child tags of an activity that are structural rather than configuration
+ACTIVITY_STRUCTURAL_TAGS = {"activity", "type", "resourceType", "x", "y", "inputBindings", "description"}
+
+
+def _local(tag: str) -> str:
+    """Strip the ``{namespace}`` prefix from an ElementTree tag."""
+    return tag.rsplit("}", 1)[-1] if "}" in tag else tag
+
+
+def _text(elem: ET.Element) -> str:
+    return (elem.text or "").strip()
+
+
+def _iterparse(path: Path) -> Iterator[Tuple[str, ET.Element]]:
+    return ET.iterparse(str(path), events=("start", "end"))
+
+
+# ------------------ Processes ------------------
+
+def parse_process(path: Path) -> Dict:
+    """
+    Parse a process definition. Handles both the simple ``<process>`` layout
+    used by the samples and BW5 ``pd:ProcessDefinition`` files (``pd:activity``,
+    ``pd:starter``, ``pd:transition``).
+    """
+    process = {
+        "name": path.stem,
+        "file": path.name,
+        "description": "",
+        "starter": None,
+        "activities": [],
+        "calls": [],
+        "error_handler": None,
+        "transitions": [],
+    }
+    stack: List[str] = []
+    activity: Optional[Dict] = None
+    transition: Optional[Dict] = None
+
+    for event, elem in _iterparse(path):
+        tag = _local(elem.tag)
+        if event == "start":
+            stack.append(tag)
+            if tag in ("activity", "starter") and activity is None:
+                activity = {"name": elem.get("name", ""), "type": elem.get("type", "")}
+            elif tag == "transition":
+                transition = {}
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+        text = _text(elem)
+
+        if activity is not None:
+            if tag in ("activity", "starter") and tag not in stack:
+                if not activity["type"]:
+                    activity["type"] = "Starter" if tag == "starter" else ""
+                process["activities"].append(activity)
+                if tag == "starter":
+                    process["starter"] = activity["name"]
+                activity = None
+                elem.clear()
+            elif tag == "type" and parent in ("activity", "starter"):
+                activity["type"] = text.rsplit(".", 1)[-1]
+            elif tag == "processName":
+                activity["calls"] = text
+                process["calls"].append(text)
+            elif text and tag not in ACTIVITY_STRUCTURAL_TAGS and len(elem) == 0:
+                activity[tag] = text
+            continue
+
+        if transition is not None:
+            if tag == "transition":
+                process["transitions"].append(transition)
+                transition = None
+                elem.clear()
+            elif tag in ("from", "to", "conditionType", "xpath") and text:
+                transition[tag] = text
+            continue
+
+        if tag == "name" and parent in ("process", "ProcessDefinition"):
+            process["name"] = text
+        elif tag == "description" and parent in ("process", "ProcessDefinition"):
+            process["description"] = text
+        elif tag == "processName" and "errorHandler" in stack:
+            process["error_handler"] = text
+        elif tag == "errorHandler" and text:
+            process["error_handler"] = text
+
+    # Normalise called process paths ("/Processes/Foo.process") to process names
+    process["calls"] = [_process_ref(call) for call in process["calls"]]
+    for activity in process["activities"]:
+        if "calls" in activity:
+            activity["calls"] = _process_ref(activity["calls"])
+    if process["error_handler"]:
+        process["error_handler"] = _process_ref(process["error_handler"])
+    return {key: value for key, value in process.items() if value not in (None, [], "")}
+
+
+def _process_ref(value: str) -> str:
+    return Path(value).stem if value.endswith(".process") or "/" in value else value
+
+
+# ------------------ Schemas and WSDL ------------------
+
+def parse_schema(path: Path) -> Dict:
+    """Top-level schema elements and named complex types with their fields."""
+    schema = {"file": path.name, "elements": {}}
+    stack: List[Tuple[str, Optional[str]]] = []
+
+    for event, elem in _iterparse(path):
+        tag = _local(elem.tag)
+        if event == "start":
+            stack.append((tag, elem.get("name")))
+            if tag in ("element", "complexType") and len(stack) == 2 and elem.get("name"):
+                schema["elements"][elem.get("name")] = {}
+            elif tag in ("element", "attribute") and elem.get("name") and len(stack) > 2:
+                owner = stack[1][1]
+                if owner in schema["elements"]:
+                    field = elem.get("name")
+                    if tag == "attribute":
+                        field = "@" + field
+                    schema["elements"][owner][field] = _local(elem.get("type", "")) or "complex"
+            elif tag == "import" and elem.get("schemaLocation"):
+                schema.setdefault("imports", []).append(elem.get("schemaLocation"))
+            continue
+
+        stack.pop()
+        if len(stack) == 1:
+            elem.clear()
+    return schema
+
+
+def parse_wsdl(path: Path) -> Dict:
+    """Messages, port type operations, imports and service endpoints of a WSDL."""
+    wsdl = {"file": path.name, "messages": {}, "operations": [], "services": [], "imports": []}
+    message: Optional[str] = None
+    operation: Optional[Dict] = None
+    service: Optional[str] = None
+    in_port_type = False
+
+    for event, elem in _iterparse(path):
+        tag = _local(elem.tag)
+        if event == "start":
+            if tag == "message":
+                message = elem.get("name")
+                wsdl["messages"][message] = []
+            elif tag == "part" and message:
+                wsdl["messages"][message].append(_local(elem.get("element") or elem.get("type") or ""))
+            elif tag == "portType":
+                in_port_type = True
+            elif tag == "operation" and in_port_type:
+                operation = {"name": elem.get("name")}
+            elif tag in ("input", "output", "fault") and operation is not None and elem.get("message"):
+                operation[tag] = _local(elem.get("message").split(":")[-1])
+            elif tag == "service":
+                service = elem.get("name")
+            elif tag == "address" and service:
+                wsdl["services"].append({"name": service, "location": elem.get("location")})
+            elif tag == "import" and elem.get("schemaLocation"):
+                wsdl["imports"].append(elem.get("schemaLocation"))
+            continue
+
+        if tag == "message":
+            message = None
+        elif tag == "operation" and operation is not None:
+            wsdl["operations"].append(operation)
+            operation = None
+        elif tag == "portType":
+            in_port_type = False
+        elif tag == "service":
+            service = None
+        if tag in ("message", "portType", "binding", "service", "types"):
+            elem.clear()
+    return {key: value for key, value in wsdl.items() if value}
+
+
+# ------------------ Project resources ------------------
+
+def parse_project_file(path: Path) -> Dict:
+    project = {}
+    stack: List[str] = []
+    for event, elem in _iterparse(path):
+        tag = _local(elem.tag)
+        if event == "start":
+            stack.append(tag)
+            continue
+        stack.pop()
+        text = _text(elem)
+        if len(stack) == 1 and text:
+            project[tag] = text
+        elif len(stack) == 2 and text:
+            project.setdefault(stack[1], []).append(text)
+    return project
+
+
+def parse_routing_rules(path: Path) -> Dict:
+    rules = {"file": path.name, "rules": []}
+    rule: Optional[Dict] = None
+    for event, elem in _iterparse(path):
+        tag = _local(elem.tag)
+        if event == "start":
+            if tag == "rule":
+                rule = {}
+            continue
+        text = _text(elem)
+        if tag == "rule" and rule is not None:
+            rules["rules"].append(rule)
+            rule = None
+            elem.clear()
+        elif rule is not None and text:
+            rule[tag] = text
+        elif tag == "defaultAction":
+            rules["default"] = text
+    return rules
+
+
+def _mask(key: str, value: str) -> str:
+    return MASKED_VALUE if SECRET_KEY_PATTERN.search(key) else value
+
+
+def parse_properties(path: Path) -> Dict[str, str]:
+    properties = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(("#", "!")):
+                continue
+            match = re.match(r"([^=:\s]+)\s*[=:\s]?\s*(.*)", line)
+            if match:
+                key, value = match.groups()
+                properties[key] = _mask(key, value)
+    return properties
+
+
+def parse_substvar(path: Path) -> Dict[str, str]:
+    """Global variables from a BW ``defaultVars.substvar`` file."""
+    variables = {}
+    name = value = None
+    for event, elem in _iterparse(path):
+        tag = _local(elem.tag)
+        if event == "start":
+            continue
+        if tag == "name":
+            name = _text(elem)
+        elif tag == "value":
+            value = _text(elem)
+        elif tag == "globalVariable":
+            if name:
+                variables[name] = _mask(name, value or "")
+            name = value = None
+            elem.clear()
+    return variables
+
+
+def _root_tag(path: Path) -> str:
+    for _, elem in ET.iterparse(str(path), events=("start",)):
+        return _local(elem.tag)
+    return ""
+
+
+# ------------------ Project ------------------
+
+def _call_graph(processes: Dict[str, Dict]) -> Dict[str, List[str]]:
+    return {name: sorted(set(process.get("calls", []))) for name, process in processes.items()}
+
+
+def parse_tibco_project(directory) -> Dict:
+    """Parse every recognised file under ``directory`` into the project IR."""
+    directory = Path(directory)
+    ir = {
+        "version": IR_VERSION,
+        "project": {},
+        "processes": {},
+        "call_graph": {},
+        "entry_points": [],
+        "error_handlers": {},
+        "schemas": {},
+        "services": [],
+        "routing_rules": [],
+        "global_variables": {},
+        "other_files": [],
+    }
+
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            path = Path(root) / name
+            rel_path = path.relative_to(directory).as_posix()
+            suffix = path.suffix.lower()
+            try:
+                if suffix == ".process":
+                    process = parse_process(path)
+                    process["file"] = rel_path
+                    ir["processes"][process["name"]] = process
+                elif suffix == ".xsd":
+                    schema = parse_schema(path)
+                    schema["file"] = rel_path
+                    ir["schemas"][path.stem] = schema
+                elif suffix == ".wsdl":
+                    wsdl = parse_wsdl(path)
+                    wsdl["file"] = rel_path
+                    ir["services"].append(wsdl)
+                elif name == "project.xml":
+                    ir["project"] = parse_project_file(path)
+                elif suffix == ".properties":
+                    ir["global_variables"].update(
+                        {f"{path.stem}.{key}": value for key, value in parse_properties(path).items()}
+                    )
+                elif suffix == ".substvar":
+                    ir["global_variables"].update(parse_substvar(path))
+                elif suffix == ".xml" and _root_tag(path) == "routingRules":
+                    rules = parse_routing_rules(path)
+                    rules["file"] = rel_path
+                    ir["routing_rules"].append(rules)
+                else:
+                    ir["other_files"].append(rel_path)
+            except (ET.ParseError, OSError, UnicodeDecodeError) as e:
+                # One unreadable or malformed file should not stop the rest of the project being parsed
+                logger.warning("Could not parse %s: %s", rel_path, e)
+                ir["other_files"].append(rel_path)
+
+    processes = ir["processes"]
+    ir["call_graph"] = _call_graph(processes)
+    called = {callee for callees in ir["call_graph"].values() for callee in callees}
+    handlers = {process["error_handler"] for process in processes.values() if process.get("error_handler")}
+    ir["error_handlers"] = {
+        name: process["error_handler"] for name, process in processes.items() if process.get("error_handler")
+    }
+    ir["entry_points"] = sorted(name for name in processes if name not in called and name not in handlers)
+
+    logger.info("Parsed TIBCO project %s: %d processes, %d schemas, %d services",
+                directory, len(processes), len(ir["schemas"]), len(ir["services"]))
+    return {key: value for key, value in ir.items() if value not in ({}, [])}
+
+
+def to_json(ir: Dict) -> str:
+    """
+    Compact JSON encoding of the IR for prompts. The opening brace of any
+    ``{name}`` inside a string is written as the JSON escape ``\\u007b``, so
+    the JSON decodes to the same values but crewAI's input interpolation
+    leaves it alone.
+    """
+    return PLACEHOLDER_BRACE_PATTERN.sub(r"\\u007b", json.dumps(ir, separators=(",", ":"), ensure_ascii=False))
+
+
+def tibco_ir_prompt(directory) -> str:
+    """
+    Prompt section carrying the parsed IR of ``directory``, or an empty string
+    when no process definitions were found (e.g. a flattened text export).
+    """
+    ir = parse_tibco_project(directory)
+    if "processes" not in ir:
+        return ""
+    return (
+        "\n\n### Parsed TIBCO Project (JSON IR)\n"
+        "The project below was pre-parsed from its process, schema, WSDL and resource files. "
+        "Base the analysis on this IR; only read files when a detail you need is missing from it, "
+        "and read the files you need together in one 'Read multiple files' call rather than one at a time.\n"
+        f"{to_json(ir)}\n"
+    )
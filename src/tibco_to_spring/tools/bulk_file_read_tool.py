@@ -0,0 +1,171 @@
+import glob
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+BULK_READ_MAX_BYTES = int(os.getenv("BULK_READ_MAX_BYTES", "60000"))
+BULK_READ_WORKERS = 8
+# Files beyond this are cut even when the budget would allow more
+BULK_READ_MAX_FILE_BYTES = 200_000
+
+XML_SUFFIXES = {".xml", ".process", ".xsd", ".wsdl", ".bwp", ".substvar", ".archive", ".aliaslib",
+                ".sharedjdbc", ".sharedhttp", ".sharedjmscon", ".sharedparse", ".adr", ".palette"}
+XML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+XML_DECLARATION_PATTERN = re.compile(r"<\?xml[^>]*\?>")
+# Designer canvas coordinates and sizes carry no behaviour
+XML_LAYOUT_PATTERN = re.compile(r"<(?:pd:)?(x|y|width|height)>[^<]*</(?:pd:)?\1>")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+
+def trim_file_content(text: str, suffix: str) -> str:
+    """Drop whitespace and, for XML files, comments, declarations and designer layout elements."""
+    if suffix.lower() in XML_SUFFIXES:
+        text = XML_COMMENT_PATTERN.sub("", text)
+        text = XML_DECLARATION_PATTERN.sub("", text)
+        text = XML_LAYOUT_PATTERN.sub("", text)
+        lines = (line.strip() for line in text.splitlines())
+        return "\n".join(line for line in lines if line)
+    text = "\n".join(line.rstrip() for line in text.splitlines())
+    return BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+
+
+class BulkFileReadInput(BaseModel):
+    paths: Optional[List[str]] = Field(
+        None, description="Files to read, relative to the project directory or absolute"
+    )
+    pattern: Optional[str] = Field(
+        None, description="Glob relative to the project directory, e.g. '**/*.process' or 'Schemas/*.xsd'"
+    )
+
+    @model_validator(mode="after")
+    def _paths_or_pattern(self):
+        if not self.paths and not self.pattern:
+            raise ValueError("Provide 'paths', 'pattern' or both")
+        return self
+
+
+class BulkFileReadTool(BaseTool):
+    """
+    Reads many files in one call so an agent does not spend one LLM turn per
+    file. Files are read concurrently and trimmed (XML comments, layout
+    coordinates and blank lines removed); the combined output stops at
+    ``max_bytes`` and lists the files that did not fit so they can be
+    requested in a follow-up call. Trimmed contents are cached per file
+    (keyed by modification time and size) for the lifetime of the tool, so
+    files read again later in the run cost no I/O.
+    """
+
+    name: str = "Read multiple files"
+    description: str = (
+        "Read several files in one call. Pass 'pattern', a glob such as '**/*.process', and/or 'paths', "
+        "a list of file paths. Returns every file's trimmed content, up to a size budget; files that did "
+        "not fit are listed so you can request them in another call. Prefer this to reading files one by one."
+    )
+    args_schema: Type[BaseModel] = BulkFileReadInput
+
+    directory: Optional[str] = None
+    max_bytes: int = BULK_READ_MAX_BYTES
+    max_workers: int = BULK_READ_WORKERS
+
+    _cache: Dict[str, Tuple[Tuple[int, int], str]] = PrivateAttr(default_factory=dict)
+    _cache_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _cache_hits: int = PrivateAttr(default=0)
+
+    def _resolve(self, paths: Optional[List[str]], pattern: Optional[str]) -> List[Path]:
+        base = Path(self.directory or ".")
+        resolved = []
+        if pattern:
+            resolved.extend(Path(p) for p in glob.glob(str(base / pattern), recursive=True))
+        for path in paths or []:
+            path = Path(path)
+            resolved.append(path if path.is_absolute() else base / path)
+        # Keep the caller's order but drop repeats, directories and missing paths
+        seen = set()
+        files = []
+        for path in resolved:
+            key = os.path.normpath(path)
+            if key not in seen and path.is_file():
+                seen.add(key)
+                files.append(path)
+        return files
+
+    def _read(self, path: Path) -> str:
+        key = os.path.normpath(path)
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._cache_hits += 1
+                return cached[1]
+        with open(path, "rb") as f:
+            data = f.read(BULK_READ_MAX_FILE_BYTES)
+        text = data.decode("utf-8", errors="replace")
+        truncated = stat.st_size > len(data)
+        if truncated:
+            # The cut may split a multi-byte character
+            text = text.rstrip("\ufffd")
+        text = trim_file_content(text, path.suffix)
+        if truncated:
+            # Marked like budget truncation so the agent knows the file is incomplete
+            text += f"\n[truncated: first {len(data)} of {stat.st_size} bytes shown]"
+        with self._cache_lock:
+            self._cache[key] = (version, text)
+        return text
+
+    def _display_path(self, path: Path) -> str:
+        if self.directory:
+            try:
+                return path.relative_to(self.directory).as_posix()
+            except ValueError:
+                pass
+        return path.as_posix()
+
+    def _run(self, paths: Optional[List[str]] = None, pattern: Optional[str] = None) -> str:
+        files = self._resolve(paths, pattern)
+        if not files:
+            return f"No files matched {pattern or paths!r} in {self.directory or os.getcwd()}."
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(files))) as executor:
+            contents = list(executor.map(self._read_or_error, files))
+
+        budget = self.max_bytes
+        sections = []
+        omitted = []
+        for path, text in zip(files, contents):
+            header = f"=== {self._display_path(path)} ===\n"
+            size = len(header.encode("utf-8")) + len(text.encode("utf-8")) + 1
+            if size <= budget:
+                sections.append(header + text)
+                budget -= size
+            elif not sections and budget > len(header):
+                # A single oversized file is still returned, cut at the budget
+                cut = text.encode("utf-8")[:budget - len(header.encode("utf-8"))].decode("utf-8", errors="ignore")
+                sections.append(header + cut + "\n[truncated]")
+                budget = 0
+            else:
+                omitted.append(self._display_path(path))
+
+        if omitted:
+            sections.append(f"=== Not included (size budget of {self.max_bytes} bytes reached) ===\n"
+                            + "\n".join(omitted))
+        logger.debug("Bulk read of %d files (%d omitted, %d cache hits so far)",
+                     len(files), len(omitted), self._cache_hits)
+        return "\n".join(sections)
+
+    def _read_or_error(self, path: Path) -> str:
+        try:
+            return self._read(path)
+        except OSError as e:
+            return f"[could not read: {e}]"
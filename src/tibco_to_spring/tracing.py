@@ -0,0 +1,270 @@
+"""
+Structured tracing for crew runs.
+
+Spans form a tree per run: crew -> task -> agent -> LLM call / tool call,
+plus spans for embedding, memory search and company-code search. Crew,
+task, agent and tool spans come from the crewAI event bus; LLM spans are
+recorded by ``CachedLLM`` so cache hits and rate-limit waits are covered.
+Spans carry their duration and, where known, prompt/completion tokens,
+cache hits and bytes read.
+
+At the end of ``run``/``train`` a summary table is logged, and with
+TRACE_FILE set the spans are exported as JSON lines (TRACE_FORMAT=jsonl,
+the default) or as an OpenTelemetry OTLP/JSON file (TRACE_FORMAT=otlp).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+SERVICE_NAME = "tibco_to_spring"
+# Attributes summed per span group in the summary table
+SUMMARY_COUNTERS = ("prompt_tokens", "completion_tokens", "cache_hits", "bytes_read")
+# OTLP span kinds: spans that call out of the process are CLIENT, the rest INTERNAL
+OTLP_KIND_INTERNAL = 1
+OTLP_KIND_CLIENT = 3
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def add(self, **counters):
+        """Add to numeric attributes, e.g. ``span.add(bytes_read=n)``."""
+        for key, value in counters.items():
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Thread-safe span recorder. Each thread keeps its own stack of open
+    spans, so crews running in parallel threads build separate subtrees;
+    a thread with no open span parents its spans to the open ``run`` span.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root: Optional[Span] = None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else self._root
+
+    def start(self, name: str, kind: str, **attributes) -> Span:
+        parent = self.current()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        self._stack().append(span)
+        with self._lock:
+            self.spans.append(span)
+            if kind == "run" and self._root is None:
+                self._root = span
+        return span
+
+    def end(self, span: Optional[Span], status: str = "ok", **attributes):
+        if span is None or span.end_ns is not None:
+            return
+        span.end_ns = time.time_ns()
+        span.status = status
+        span.attributes.update(attributes)
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+        with self._lock:
+            if span is self._root:
+                self._root = None
+
+    def end_innermost(self, kind: str, status: str = "ok", **attributes):
+        """End the innermost open span of ``kind`` on this thread (for event-driven spans)."""
+        for span in reversed(self._stack()):
+            if span.kind == kind:
+                self.end(span, status, **attributes)
+                return
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes) -> Iterator[Span]:
+        span = self.start(name, kind, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, "error", error=str(e))
+            raise
+        self.end(span)
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self._root = None
+
+    # ------------------ Reporting ------------------
+
+    def summary(self) -> str:
+        """Table of span count, time and counters grouped by kind and name."""
+        groups: Dict[tuple, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            group = groups.setdefault(
+                (span.kind, span.name), dict.fromkeys(("count", "total", "max") + SUMMARY_COUNTERS, 0)
+            )
+            group["count"] += 1
+            group["total"] += span.duration
+            group["max"] = max(group["max"], span.duration)
+            for counter in SUMMARY_COUNTERS:
+                value = span.attributes.get(counter)
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    group[counter] += value
+
+        lines = [f"{'Kind':<10} {'Name':<40} {'Count':>6} {'Total (s)':>10} {'Max (s)':>8} "
+                 f"{'Prompt tok':>11} {'Compl. tok':>11} {'Cache hits':>10} {'Bytes read':>11}"]
+        for (kind, name), group in sorted(groups.items(), key=lambda item: -item[1]["total"]):
+            lines.append(
+                f"{kind:<10} {name[:40]:<40} {group['count']:>6} {group['total']:>10.2f} {group['max']:>8.2f} "
+                f"{group['prompt_tokens']:>11.0f} {group['completion_tokens']:>11.0f} "
+                f"{group['cache_hits']:>10.0f} {group['bytes_read']:>11.0f}"
+            )
+        return "\n".join(lines)
+
+    def export_jsonl(self, path):
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def export_otlp(self, path):
+        """Write spans as an OTLP/JSON ``ExportTraceServiceRequest``."""
+        with self._lock:
+            spans = list(self.spans)
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": OTLP_KIND_CLIENT if span.kind == "llm" else OTLP_KIND_INTERNAL,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns if span.end_ns is not None else span.start_ns),
+                "attributes": [_otlp_attribute("span.kind", span.kind)]
+                              + [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+                "status": {"code": 2 if span.status == "error" else 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+        }]}
+        Path(path).write_text(json.dumps(payload), encoding="utf-8")
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer shared by every crew, thread and component."""
+    return _tracer
+
+
+def trace_span(name: str, kind: str, **attributes):
+    """Shorthand for ``get_tracer().span(...)``."""
+    return _tracer.span(name, kind, **attributes)
+
+
+def write_trace_report(tracer: Optional[Tracer] = None):
+    """Log the summary table and export spans to TRACE_FILE if it is set."""
+    tracer = tracer or _tracer
+    logger.info("Trace summary:\n%s", tracer.summary())
+    trace_file = os.getenv("TRACE_FILE")
+    if not trace_file:
+        return
+    Path(trace_file).parent.mkdir(parents=True, exist_ok=True)
+    if os.getenv("TRACE_FORMAT", "jsonl").lower() == "otlp":
+        tracer.export_otlp(trace_file)
+    else:
+        tracer.export_jsonl(trace_file)
+    logger.info("Trace written to %s", trace_file)
+
+
+# ------------------ crewAI event bus ------------------
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def install_tracing():
+    """Register the event-bus listener once per process."""
+    global _listener
+    # Imported here so that modules only recording spans do not import crewAI
+    from tibco_to_spring.tracing_events import TracingListener
+
+    with _listener_lock:
+        if _listener is None:
+            _listener = TracingListener()
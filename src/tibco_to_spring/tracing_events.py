@@ -0,0 +1,93 @@
+"""
+crewAI event-bus listener that records crew, task, agent and tool spans on
+the process tracer. Kept apart from ``tracing`` so that recording spans
+does not import crewAI; ``install_tracing`` registers it.
+"""
+
+from typing import Any
+
+try:
+    from crewai.events import (
+        AgentExecutionCompletedEvent, AgentExecutionErrorEvent, AgentExecutionStartedEvent, BaseEventListener,
+        CrewKickoffCompletedEvent, CrewKickoffFailedEvent, CrewKickoffStartedEvent, TaskCompletedEvent,
+        TaskFailedEvent, TaskStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent,
+    )
+except ImportError:  # crewAI releases before the events package was split out
+    from crewai.utilities.events import (
+        AgentExecutionCompletedEvent, AgentExecutionErrorEvent, AgentExecutionStartedEvent,
+        CrewKickoffCompletedEvent, CrewKickoffFailedEvent, CrewKickoffStartedEvent, TaskCompletedEvent,
+        TaskFailedEvent, TaskStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent,
+    )
+    from crewai.utilities.events.base_event_listener import BaseEventListener
+
+from tibco_to_spring.tracing import get_tracer
+
+
+def _task_name(task: Any) -> str:
+    if task is None:
+        return "task"
+    name = getattr(task, "name", None)
+    if name:
+        return name
+    description = " ".join((getattr(task, "description", "") or "").split())
+    return description[:60] or "task"
+
+
+def _output_bytes(output: Any) -> int:
+    return len(str(output).encode("utf-8")) if output is not None else 0
+
+
+class TracingListener(BaseEventListener):
+    """Turns crew, task, agent and tool events into spans on the process tracer."""
+
+    def setup_listeners(self, crewai_event_bus):
+        tracer = get_tracer()
+
+        @crewai_event_bus.on(CrewKickoffStartedEvent)
+        def on_crew_started(source, event):
+            tracer.start(event.crew_name or "crew", "crew")
+
+        @crewai_event_bus.on(CrewKickoffCompletedEvent)
+        def on_crew_completed(source, event):
+            tracer.end_innermost("crew")
+
+        @crewai_event_bus.on(CrewKickoffFailedEvent)
+        def on_crew_failed(source, event):
+            tracer.end_innermost("crew", "error", error=event.error)
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_task_started(source, event):
+            tracer.start(_task_name(event.task), "task")
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_task_completed(source, event):
+            tracer.end_innermost("task")
+
+        @crewai_event_bus.on(TaskFailedEvent)
+        def on_task_failed(source, event):
+            tracer.end_innermost("task", "error", error=event.error)
+
+        @crewai_event_bus.on(AgentExecutionStartedEvent)
+        def on_agent_started(source, event):
+            tracer.start(getattr(event.agent, "role", "agent").strip(), "agent")
+
+        @crewai_event_bus.on(AgentExecutionCompletedEvent)
+        def on_agent_completed(source, event):
+            tracer.end_innermost("agent")
+
+        @crewai_event_bus.on(AgentExecutionErrorEvent)
+        def on_agent_error(source, event):
+            tracer.end_innermost("agent", "error", error=event.error)
+
+        @crewai_event_bus.on(ToolUsageStartedEvent)
+        def on_tool_started(source, event):
+            tracer.start(event.tool_name, "tool")
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def on_tool_finished(source, event):
+            tracer.end_innermost("tool", cache_hits=int(bool(event.from_cache)),
+                                 bytes_read=_output_bytes(event.output))
+
+        @crewai_event_bus.on(ToolUsageErrorEvent)
+        def on_tool_error(source, event):
+            tracer.end_innermost("tool", "error", error=str(event.error))
@@ -0,0 +1,71 @@
+"""
+crewAI training handler backed by the append-only training store. Kept
+apart from ``training_store`` so that the store and its CLI do not import
+crewAI; ``install_training_store`` installs it.
+"""
+
+import os
+
+import crewai.agent
+import crewai.agents.crew_agent_executor
+import crewai.crew
+from crewai.utilities.constants import TRAINING_DATA_FILE
+from crewai.utilities.training_handler import CrewTrainingHandler
+
+from tibco_to_spring.logging_config import get_logger
+from tibco_to_spring.training_store import current_run_id, default_training_store, new_run_id, records_of
+
+# Set up logging
+logger = get_logger(__name__)
+
+# Modules that create CrewTrainingHandler instances by name
+_CREWAI_MODULES = (crewai.agent, crewai.agents.crew_agent_executor, crewai.crew)
+
+
+class StoreTrainingHandler(CrewTrainingHandler):
+    """
+    Drop-in for crewAI's CrewTrainingHandler. The pickle file name becomes
+    the store namespace; saves append only the entries that changed, and
+    loads read the newest row per agent and iteration. Rows of the
+    per-run feedback file (TRAINING_DATA_FILE) are scoped to the current
+    training run, so a load never reads the feedback of earlier runs.
+    Nothing is ever deleted: ``initialize_file`` starts a new run and
+    ``clear`` (called by crewAI when training fails) keeps what was written.
+    """
+
+    def __init__(self, file_name: str) -> None:
+        super().__init__(file_name)
+        self.namespace = os.path.basename(self.file_path)
+        self.store = default_training_store()
+
+    def _run_scope(self):
+        return current_run_id() if self.namespace == TRAINING_DATA_FILE else None
+
+    def initialize_file(self) -> None:
+        if self.namespace == TRAINING_DATA_FILE:
+            new_run_id()
+
+    def load(self) -> dict:
+        return self.store.latest(self.namespace, self._run_scope())
+
+    def save(self, data) -> None:
+        current = records_of(self.load())
+        current = {(agent_id, iteration): value for agent_id, iteration, value in current}
+        changed = [(agent_id, iteration, value) for agent_id, iteration, value in records_of(data)
+                   if current.get((agent_id, iteration)) != value]
+        self.store.append(self.namespace, current_run_id(), changed)
+
+    def save_trained_data(self, agent_id: str, trained_data: dict) -> None:
+        self.store.append(self.namespace, current_run_id(), [(agent_id, None, trained_data)])
+
+    def append(self, train_iteration: int, agent_id: str, new_data) -> None:
+        self.store.append(self.namespace, current_run_id(), [(agent_id, train_iteration, new_data)])
+
+    def clear(self) -> None:
+        logger.info("Keeping the %s rows of the failed training run %s in the training store",
+                    self.namespace, current_run_id())
+
+
+def install_store_training_handler():
+    for module in _CREWAI_MODULES:
+        module.CrewTrainingHandler = StoreTrainingHandler
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""
+Append-only store for crew training data.
+
+Usage:
+    training_store import [PICKLE ...] [--store PATH]
+    training_store stats [--store PATH]
+
+crewAI keeps training feedback (``training_data.pkl``) and the trained
+agent suggestions (the ``train`` filename, ``trained_agents_data.pkl`` by
+default) in pickle files that are loaded and rewritten whole on every
+update. Here every update is one row appended to a SQLite table (WAL mode,
+so parallel training runs in several processes can write at once) and a
+crash never leaves a half-written file. Reads are indexed: the current
+view of a file is the newest row per agent and iteration, and
+``iter_records`` streams the full history. ``install_training_store``
+points crewAI's training handler at the store; ``import`` loads existing
+pickle files once.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tibco_to_spring.logging_config import get_logger
+
+# Set up logging
+logger = get_logger(__name__)
+
+TRAINING_STORE_PATH = os.getenv("TRAINING_STORE_PATH", "training_store.db")
+# crewAI's file names, imported automatically by install_training_store when present
+LEGACY_PICKLES = ("training_data.pkl", "trained_agents_data.pkl")
+
+
+@dataclass
+class TrainingRecord:
+    namespace: str
+    run_id: str
+    agent_id: str
+    iteration: Optional[int]
+    data: Any
+    created_at: float
+
+
+def records_of(data: Dict) -> List[Tuple[str, Optional[int], Any]]:
+    """
+    (agent_id, iteration, data) rows of a crewAI training dict: per-iteration
+    feedback (``{agent_id: {iteration: {...}}}``) gets one row per
+    iteration, trained agent data (``{role: {...}}``) one row per agent.
+    """
+    rows = []
+    for agent_id, value in data.items():
+        if isinstance(value, dict) and value and all(isinstance(key, int) for key in value):
+            rows.extend((str(agent_id), iteration, item) for iteration, item in value.items())
+        else:
+            rows.append((str(agent_id), None, value))
+    return rows
+
+
+class TrainingStore:
+    """SQLite table of training rows, appended to and never rewritten."""
+
+    def __init__(self, path: str = TRAINING_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._init_tables()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite handles locking between processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_tables(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS training_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    namespace TEXT NOT NULL,
+                    run_id TEXT NOT NULL,
+                    agent_id TEXT NOT NULL,
+                    iteration INTEGER,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS training_records_key "
+                              "ON training_records (namespace, agent_id, iteration)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS training_records_run ON training_records (namespace, run_id)")
+
+    def append(self, namespace: str, run_id: str, rows: Iterable[Tuple[str, Optional[int], Any]]) -> int:
+        """Append ``(agent_id, iteration, data)`` rows in one transaction; returns the number written."""
+        now = time.time()
+        params = [(namespace, run_id, agent_id, iteration, json.dumps(data, default=str), now)
+                  for agent_id, iteration, data in rows]
+        if params:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO training_records (namespace, run_id, agent_id, iteration, data, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", params
+                )
+        return len(params)
+
+    def latest(self, namespace: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Current view of ``namespace`` in crewAI's dict shape: the newest row
+        per agent and iteration, optionally only rows written by ``run_id``.
+        """
+        where = "namespace = ?"
+        params: List[Any] = [namespace]
+        if run_id is not None:
+            where += " AND run_id = ?"
+            params.append(run_id)
+        view: Dict[str, Any] = {}
+        for agent_id, iteration, data in self.conn.execute(
+            "SELECT agent_id, iteration, data FROM training_records WHERE id IN "
+            f"(SELECT MAX(id) FROM training_records WHERE {where} GROUP BY agent_id, iteration) ORDER BY id",
+            params
+        ):
+            if iteration is None:
+                view[agent_id] = json.loads(data)
+            else:
+                view.setdefault(agent_id, {})[iteration] = json.loads(data)
+        return view
+
+    def iter_records(self, namespace: Optional[str] = None, agent_id: Optional[str] = None,
+                     run_id: Optional[str] = None) -> Iterator[TrainingRecord]:
+        """Stream the matching rows, oldest first, without loading them all."""
+        clauses, params = [], []
+        for column, value in (("namespace", namespace), ("agent_id", agent_id), ("run_id", run_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        query = "SELECT namespace, run_id, agent_id, iteration, data, created_at FROM training_records"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        for row in self.conn.execute(query + " ORDER BY id", params):
+            yield TrainingRecord(*row[:4], data=json.loads(row[4]), created_at=row[5])
+
+    def has_run(self, namespace: str, run_id: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM training_records WHERE namespace = ? AND run_id = ? LIMIT 1", (namespace, run_id)
+        ).fetchone() is not None
+
+    def stats(self) -> List[Tuple[str, int, int, int]]:
+        """(namespace, rows, agents, runs) per namespace."""
+        return self.conn.execute(
+            "SELECT namespace, COUNT(*), COUNT(DISTINCT agent_id), COUNT(DISTINCT run_id) "
+            "FROM training_records GROUP BY namespace ORDER BY namespace"
+        ).fetchall()
+
+
+def import_pickle(store: TrainingStore, path, namespace: Optional[str] = None) -> int:
+    """
+    Append the contents of a crewAI training pickle to ``store`` under
+    ``namespace`` (by default the file name). A file whose exact contents
+    were imported before is skipped. Returns the number of rows written.
+    """
+    path = Path(path)
+    namespace = namespace or path.name
+    content = path.read_bytes()
+    run_id = "import:" + hashlib.sha256(content).hexdigest()
+    if store.has_run(namespace, run_id):
+        logger.info("Skipping %s: already imported", path)
+        return 0
+    data = pickle.loads(content) if content else {}  # nosec - local files written by crewAI
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} does not hold crewAI training data")
+    written = store.append(namespace, run_id, records_of(data))
+    logger.info("Imported %d training records from %s", written, path)
+    return written
+
+
+_default_store: Optional[TrainingStore] = None
+_default_store_lock = threading.Lock()
+# Scopes the rows of crewAI's per-run feedback file; a new one is started when training begins
+_run_id = uuid.uuid4().hex
+
+
+def default_training_store() -> TrainingStore:
+    """Process-wide store at TRAINING_STORE_PATH."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TrainingStore(TRAINING_STORE_PATH)
+        return _default_store
+
+
+def current_run_id() -> str:
+    return _run_id
+
+
+def new_run_id() -> str:
+    global _run_id
+    _run_id = uuid.uuid4().hex
+    return _run_id
+
+
+def install_training_store(import_legacy: bool = True):
+    """
+    Make crewAI read and write training data through the store instead of
+    pickle files, importing crewAI's pickles in the working directory first
+    (once) so earlier training stays in effect.
+    """
+    # Imported here so that the store and its CLI do not import crewAI
+    from tibco_to_spring.training_handler import install_store_training_handler
+
+    if import_legacy:
+        store = default_training_store()
+        for name in LEGACY_PICKLES:
+            if os.path.exists(name):
+                import_pickle(store, name)
+    install_store_training_handler()
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Manage the append-only crew training store")
+    parser.add_argument("--store", default=TRAINING_STORE_PATH, help="Training store SQLite file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Import crewAI training pickle files")
+    import_parser.add_argument("pickles", nargs="*", default=list(LEGACY_PICKLES),
+                               help="Pickle files; the namespace is the file name")
+    commands.add_parser("stats", help="Rows, agents and runs per file")
+    args = parser.parse_args()
+
+    store = TrainingStore(args.store)
+    if args.command == "import":
+        total = 0
+        for path in args.pickles:
+            if not os.path.exists(path):
+                logger.warning("No training file at %s", path)
+                continue
+            total += import_pickle(store, path)
+        logger.info("Imported %d training records into %s", total, args.store)
+    else:
+        lines = [f"{'File':<32} {'Rows':>8} {'Agents':>7} {'Runs':>6}"]
+        lines.extend(f"{namespace:<32} {rows:>8} {agents:>7} {runs:>6}" for namespace, rows, agents, runs in store.stats())
+        logger.info("Training store %s:\n%s", args.store, "\n".join(lines))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,24 @@
+from tibco_to_spring.tools import bulk_file_read_tool
+from tibco_to_spring.tools.bulk_file_read_tool import BulkFileReadTool
+
+
+def test_file_over_the_per_file_limit_is_marked_truncated(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_file_read_tool, "BULK_READ_MAX_FILE_BYTES", 1000)
+    content = "<pd:activity name=\"Step\"/>\n" * 200
+    (tmp_path / "Big.process").write_text(content, encoding="utf-8")
+    (tmp_path / "Small.process").write_text("<pd:activity name=\"Only\"/>\n", encoding="utf-8")
+
+    output = BulkFileReadTool(directory=str(tmp_path))._run(pattern="*.process")
+
+    sections = dict(section.split(" ===\n", 1) for section in output.split("=== ")[1:])
+    assert sections["Big.process"].rstrip().endswith(f"[truncated: first 1000 of {len(content)} bytes shown]")
+    assert "truncated" not in sections["Small.process"]
+
+
+def test_cut_inside_a_multibyte_character_adds_no_replacement_mark(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_file_read_tool, "BULK_READ_MAX_FILE_BYTES", 5)
+    (tmp_path / "notes.txt").write_text("abcdéfgh", encoding="utf-8")
+
+    output = BulkFileReadTool(directory=str(tmp_path))._run(paths=["notes.txt"])
+
+    assert output == "=== notes.txt ===\nabcd\n[truncated: first 5 of 9 bytes shown]"
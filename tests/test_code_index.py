@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+
+from tibco_to_spring.compact.code_index import MANIFEST_FILE_NAME, CodeIndexCache
+
+MODEL = "test-model"
+
+
+def encode(texts):
+    return np.asarray([[len(text), text.count("a"), 1.0] for text in texts], dtype="float32")
+
+
+def split_files(paths):
+    for path in paths:
+        yield path, [line for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def _update(cache, repo):
+    return cache.update(repo, sorted(repo.rglob("*.java")), split_files=split_files, encode=encode)
+
+
+def _repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "A.java").write_text("class A\nvoid a()\n", encoding="utf-8")
+    (repo / "B.java").write_text("class B\n", encoding="utf-8")
+    return repo
+
+
+def test_saved_embeddings_are_memory_mapped_on_reload(tmp_path):
+    repo = _repo(tmp_path)
+    cache = CodeIndexCache(tmp_path / "cache", MODEL)
+    assert _update(cache, repo)
+    expected = np.vstack(list(cache.embedding_blocks(1)))
+
+    reloaded = CodeIndexCache(tmp_path / "cache", MODEL)
+    assert isinstance(reloaded.files["A.java"].embeddings, np.memmap)
+    assert reloaded.texts() == ["class A", "void a()", "class B"]
+    np.testing.assert_array_equal(np.vstack(list(reloaded.embedding_blocks(2))), expected)
+    assert not _update(reloaded, repo)
+
+
+def test_changed_file_replaces_the_embeddings_file(tmp_path):
+    repo = _repo(tmp_path)
+    cache = CodeIndexCache(tmp_path / "cache", MODEL)
+    _update(cache, repo)
+    (repo / "B.java").write_text("class B\nvoid aa()\n", encoding="utf-8")
+    assert _update(cache, repo)
+
+    files = sorted(path.name for path in (tmp_path / "cache").glob("code_index.*.npy"))
+    manifest = json.loads((tmp_path / "cache" / MANIFEST_FILE_NAME).read_text(encoding="utf-8"))
+    assert files == [manifest["embeddings_file"]]
+    reloaded = CodeIndexCache(tmp_path / "cache", MODEL)
+    np.testing.assert_array_equal(np.vstack(list(reloaded.embedding_blocks(10))),
+                                  encode(["class A", "void a()", "class B", "void aa()"]))
+
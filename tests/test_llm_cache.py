@@ -0,0 +1,62 @@
+import pytest
+from crewai import LLM
+from crewai.utilities.agent_utils import get_llm_response
+from crewai.utilities.printer import Printer
+
+from tibco_to_spring.llm_cache import CachedLLM, LLMResponseCache, RateLimiter
+
+MESSAGES = [{"role": "user", "content": "Convert the OrderService process"}]
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    """Replace the network call of crewAI's LLM with a double that has its exact signature."""
+    calls = []
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        calls.append({"messages": messages, "tools": tools, "callbacks": callbacks,
+                      "available_functions": available_functions, "from_task": from_task, "from_agent": from_agent})
+        return "Thought: done\nFinal Answer: ok"
+
+    monkeypatch.setattr(LLM, "call", call)
+    return calls
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "llm_cache.db"))
+
+
+def test_agent_loop_arguments_reach_the_model(model_calls, cache):
+    llm = CachedLLM(model="gpt-4o-mini", cache=cache, rate_limiter=RateLimiter(0))
+    task, agent = object(), object()
+
+    # The call crewAI's agent loop makes on every turn
+    answer = get_llm_response(llm, MESSAGES, callbacks=[], printer=Printer(), from_task=task, from_agent=agent)
+
+    assert answer == "Thought: done\nFinal Answer: ok"
+    assert len(model_calls) == 1
+    assert model_calls[0]["from_task"] is task
+    assert model_calls[0]["from_agent"] is agent
+    assert model_calls[0]["messages"] == MESSAGES
+
+
+def test_cache_hit_skips_the_model(model_calls, cache):
+    llm = CachedLLM(model="gpt-4o-mini", cache=cache)
+    first = llm.call(MESSAGES, callbacks=[], from_task=None, from_agent=None)
+    second = llm.call(MESSAGES, callbacks=[], from_task=None, from_agent=None)
+
+    assert first == second
+    assert len(model_calls) == 1
+    assert cache.hits == 1
+
+
+def test_uncached_call_passes_tools_and_functions(model_calls):
+    llm = CachedLLM(model="gpt-4o-mini")
+    tools = [{"type": "function", "function": {"name": "read"}}]
+    functions = {"read": lambda: None}
+
+    llm.call(MESSAGES, tools=tools, callbacks=None, available_functions=functions, from_task=None, from_agent=None)
+
+    assert model_calls[0]["tools"] == tools
+    assert model_calls[0]["available_functions"] is functions
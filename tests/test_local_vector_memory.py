@@ -0,0 +1,35 @@
+import pytest
+
+from tibco_to_spring.benchmarks.stubs import HASHING_EMBEDDING_MODEL, HashingEmbeddingProvider
+from tibco_to_spring.embeddings import register_embedding_provider
+from tibco_to_spring.local_vector_memory import LocalVectorMemory
+
+
+class FlakyEmbeddingProvider(HashingEmbeddingProvider):
+    def __init__(self):
+        super().__init__()
+        self.failures = 0
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("encoder unavailable")
+        return super().encode(texts, batch_size, **kwargs)
+
+
+def test_failed_flush_keeps_buffered_saves(tmp_path):
+    provider = FlakyEmbeddingProvider()
+    register_embedding_provider(HASHING_EMBEDDING_MODEL, provider)
+    memory = LocalVectorMemory(str(tmp_path / "memory.db"), embedding_model=HASHING_EMBEDDING_MODEL,
+                               buffer_size=10, flush_interval=3600)
+    memory.save("first item", {}, agent="analyst")
+    memory.save("second item", {}, agent="analyst")
+
+    provider.failures = 1
+    with pytest.raises(RuntimeError):
+        memory.flush()
+    assert memory.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0] == 0
+
+    memory.flush()
+    assert [row[0] for row in memory.conn.execute("SELECT content FROM memory ORDER BY id")] == \
+        ["first item", "second item"]
@@ -0,0 +1,35 @@
+import json
+
+from crewai.utilities.string_utils import interpolate_only
+
+from tibco_to_spring.tibco_ir import parse_tibco_project, tibco_ir_prompt, to_json
+
+PROCESS = """<process>
+  <name>LoadOrders</name>
+  <activity name="Query" type="JDBCQueryActivity">
+    <statement>SELECT * FROM orders WHERE region = '{region}'</statement>
+  </activity>
+</process>
+"""
+
+
+def _project(tmp_path):
+    (tmp_path / "LoadOrders.process").write_text(PROCESS, encoding="utf-8")
+    (tmp_path / "db.properties").write_text("url=${DB_URL}\nschema=${DB_SCHEMA}/orders\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_ir_prompt_survives_crewai_input_interpolation(tmp_path):
+    prompt = "Analyze the TIBCO project for {topic}." + tibco_ir_prompt(_project(tmp_path))
+
+    interpolated = interpolate_only(prompt, {"topic": "orders"})
+
+    assert interpolated.startswith("Analyze the TIBCO project for orders.")
+    assert "{DB_URL}" not in interpolated
+
+
+def test_escaped_ir_decodes_to_the_original_values(tmp_path):
+    ir = parse_tibco_project(_project(tmp_path))
+
+    assert json.loads(to_json(ir)) == ir
+    assert ir["global_variables"]["db.url"] == "${DB_URL}"